@@ -0,0 +1,72 @@
+"""
+`log_to_history` appends at fixed live Ledger sizes, the commit that rotates, and many concurrent writers.
+"""
+import os
+import statistics
+import threading
+import time
+
+from harness import measure, scratch_project
+
+from lofi_gate.ledger import ROTATE_AT_LINES, commit
+from lofi_gate.logger import LOG_FILENAME, log_to_history
+
+# Live Ledger sizes (lines) an append is timed at. All stay under ROTATE_AT_LINES
+# for every repeat, so no rotation is part of these numbers.
+LIVE_LINES = (0, 100, 300)
+APPEND_REPEAT = 20
+WRITER_THREADS = (1, 8, 32)
+WRITES_PER_THREAD = 25
+ERROR = "AssertionError: expected 200, got 500\n" * 40
+
+
+def fill(lines):
+    """
+    A fresh live Ledger holding exactly `lines` one-line entries (no rotation, no archive).
+    """
+    if os.path.exists(LOG_FILENAME):
+        os.remove(LOG_FILENAME)
+    if lines:
+        commit(LOG_FILENAME, ["- **[seed]** ✅ **Test Suite**: PASS\n"] * lines)
+
+
+def append_pass():
+    log_to_history("Test Suite", "PASS", "", 100, 10, 1.0, "pytest")
+
+
+def rotation(repeat=5):
+    """
+    Returns: the median time of the ONE append that crosses ROTATE_AT_LINES (archive + rewrite).
+    """
+    samples = []
+    for _ in range(repeat):
+        fill(ROTATE_AT_LINES)
+        start = time.perf_counter()
+        append_pass()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def concurrent_writes(threads):
+    def writer():
+        for _ in range(WRITES_PER_THREAD):
+            log_to_history("Lint", "FAIL", "", 100, 10, 1.0, "npm run lint", error_content=ERROR)
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def run(quick=False):
+    results = {}
+    with scratch_project():
+        for lines in LIVE_LINES:
+            assert lines + APPEND_REPEAT + 1 <= ROTATE_AT_LINES
+            fill(lines)
+            results[f"ledger.append.live_lines{lines}"] = measure(append_pass, repeat=APPEND_REPEAT)
+        results["ledger.rotate"] = rotation(repeat=3 if quick else 5)
+        for threads in WRITER_THREADS:
+            fill(0)
+            results[f"ledger.concurrent.threads{threads}"] = measure(lambda: concurrent_writes(threads), repeat=3)
+    return results
@@ -0,0 +1,48 @@
+"""
+Gate overhead of `run_checks` with N synthetic checks, sequential and parallel.
+Each check runs a trivial real command; the overhead is the time on top of spawning
+the same commands directly.
+"""
+import concurrent.futures
+import subprocess
+import sys
+from unittest.mock import patch
+
+from harness import measure, quiet, scratch_project
+
+from lofi_gate import logic
+
+CHECK_COUNTS = (1, 10, 50)
+COMMAND = f'"{sys.executable}" -c "pass"'
+CONFIG = "[gate]\nstrict_tdd = false\nsecurity_check = false\nlint_check = false\n"
+
+
+def synthetic_tasks(count):
+    def build(config, scripts, *args, **kwargs):
+        return [(f"Check {i}", lambda: logic.run_command(COMMAND, "Tests"), COMMAND) for i in range(count)]
+    return build
+
+
+def bare_sequential(count):
+    for _ in range(count):
+        subprocess.run(COMMAND, shell=True, stdout=subprocess.DEVNULL)
+
+
+def bare_parallel(count):
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        list(executor.map(lambda _: subprocess.run(COMMAND, shell=True, stdout=subprocess.DEVNULL), range(count)))
+
+
+def run(quick=False):
+    results = {}
+    counts = CHECK_COUNTS[:2] if quick else CHECK_COUNTS
+    with scratch_project(CONFIG):
+        for count in counts:
+            with patch("lofi_gate.logic.build_tasks", synthetic_tasks(count)), quiet():
+                sequential = measure(lambda: logic.run_checks(), repeat=3)
+                parallel = measure(lambda: logic.run_checks(parallel=True), repeat=3)
+            results[f"orchestration.sequential.n{count}"] = sequential
+            results[f"orchestration.parallel.n{count}"] = parallel
+            results[f"orchestration.sequential_overhead.n{count}"] = max(sequential - measure(lambda: bare_sequential(count), repeat=3), 0)
+            results[f"orchestration.parallel_overhead.n{count}"] = max(parallel - measure(lambda: bare_parallel(count), repeat=3), 0)
+    return results
@@ -0,0 +1,44 @@
+"""
+Cost of presenting a check's output: draining it through the bounded capture
+(as `run_command` does, with and without the output filters) and `print_result`
+on the captured result, from 1 KB to 500 MB.
+"""
+from harness import measure, quiet, scratch_project
+
+from lofi_gate import logic
+from lofi_gate.capture import StreamCapture
+from lofi_gate.extract import extractor_for
+from lofi_gate.filters import FILTERS, build_chain
+
+SIZES = {"1KB": 1024, "1MB": 1024 ** 2, "50MB": 50 * 1024 ** 2, "500MB": 500 * 1024 ** 2}
+QUICK_SIZES = ("1KB", "1MB", "50MB")
+
+# A pytest-like failure line, repeated (exercises the extractor too).
+LINE = b"tests/test_api.py:42: AssertionError: expected 200, got 500 while calling /v1/users\n"
+CHUNK = LINE * (64 * 1024 // len(LINE))
+
+
+def capture(size, filters=None):
+    stream = StreamCapture(extractor=extractor_for("python -m pytest"), filters=build_chain(filters))
+    remaining = size
+    while remaining > 0:
+        piece = CHUNK[:remaining]
+        stream.feed(piece)
+        remaining -= len(piece)
+    return stream.close()
+
+
+def run(quick=False):
+    results = {}
+    with scratch_project():
+        for name, size in SIZES.items():
+            if quick and name not in QUICK_SIZES:
+                continue
+            repeat = 1 if size > 10 * 1024 ** 2 else 5
+            results[f"print_result.capture.{name}"] = measure(lambda: capture(size), repeat=repeat, warmup=0)
+            results[f"print_result.capture_filtered.{name}"] = measure(lambda: capture(size, list(FILTERS)), repeat=repeat, warmup=0)
+            output = capture(size)
+            with quiet():
+                results[f"print_result.fail.{name}"] = measure(lambda: logic.print_result("Test Suite", 1, output, 1.0, "pytest"), repeat=5)
+                results[f"print_result.pass.{name}"] = measure(lambda: logic.print_result("Test Suite", 0, output, 1.0, "pytest"), repeat=5)
+    return results
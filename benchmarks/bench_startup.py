@@ -0,0 +1,41 @@
+"""
+`lofi-gate verify` from a cold interpreter, with every check disabled:
+what an Agent pays before the first tool even starts.
+
+`verify_noop` is the usual repeat call (the resolved plan is cached in
+.lofi-gate/plan.json); `verify_plan_miss` re-reads lofi.toml and re-detects every time.
+"""
+import contextlib
+import os
+import subprocess
+import sys
+import time
+
+from harness import measure, scratch_project
+
+CONFIG = "[gate]\nstrict_tdd = false\nsecurity_check = false\nlint_check = false\n"
+
+
+def invoke(*args):
+    subprocess.run([sys.executable, "-m", "lofi_gate.cli"] + list(args),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def verify_plan_miss():
+    with contextlib.suppress(OSError):
+        os.remove(os.path.join(".lofi-gate", "plan.json"))
+    invoke("verify", "--no-daemon")
+
+
+def run(quick=False):
+    repeat = 3 if quick else 10
+    with scratch_project(CONFIG):
+        # A just-written lofi.toml is too fresh for the plan cache (see plan.RACY_WINDOW).
+        past = time.time() - 60
+        os.utime("lofi.toml", (past, past))
+        return {
+            "startup.interpreter": measure(lambda: subprocess.run([sys.executable, "-c", "pass"]), repeat=repeat),
+            "startup.version": measure(lambda: invoke("--version"), repeat=repeat),
+            "startup.verify_noop": measure(lambda: invoke("verify", "--no-daemon"), repeat=repeat),
+            "startup.verify_plan_miss": measure(verify_plan_miss, repeat=repeat),
+        }
@@ -0,0 +1,100 @@
+"""
+Shared helpers for the gate benchmarks: timing, scratch projects, JSON baselines.
+Every metric is a duration in seconds (lower is better).
+"""
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Relative slowdown that counts as a regression in compare mode (0.25 = 25% slower).
+DEFAULT_THRESHOLD = 0.25
+
+# Differences below this are timer noise, whatever the ratio (seconds).
+NOISE_FLOOR = 0.002
+
+
+def measure(fn, repeat=5, warmup=1):
+    """
+    Returns: the MEDIAN wall time of `fn()` over `repeat` runs.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+@contextlib.contextmanager
+def scratch_project(lofi_toml=""):
+    """
+    A throwaway working directory (the gate reads lofi.toml and writes its Ledger in CWD).
+    """
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="lofi-bench-") as path:
+        os.chdir(path)
+        try:
+            with open("lofi.toml", "w") as f:
+                f.write(lofi_toml)
+            yield path
+        finally:
+            os.chdir(previous)
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Swallows the gate's console output so printing to a terminal isn't what we measure.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def metadata():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git": rev,
+        "argv": sys.argv[1:],
+    }
+
+
+def save(path, results):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Returns: [(metric, old, new, ratio, regressed)] for every metric present in both runs.
+    """
+    rows = []
+    for metric in sorted(set(baseline) & set(current)):
+        old, new = baseline[metric], current[metric]
+        ratio = new / old if old else float("inf")
+        regressed = new - old > NOISE_FLOOR and ratio > 1 + threshold
+        rows.append((metric, old, new, ratio, regressed))
+    return rows
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Runs the gate benchmarks and saves (or compares against) a JSON baseline.
+
+    python benchmarks/run.py                                  # all suites -> benchmarks/results/latest.json
+    python benchmarks/run.py --quick --only ledger            # a fast subset
+    python benchmarks/run.py --save benchmarks/results/main.json
+    python benchmarks/run.py --compare benchmarks/results/main.json --threshold 0.2
+
+Compare mode exits with 1 if any metric is slower than the baseline by more than the threshold.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_ledger  # noqa: E402
+import bench_orchestration  # noqa: E402
+import bench_print_result  # noqa: E402
+import bench_startup  # noqa: E402
+from harness import DEFAULT_THRESHOLD, compare, load, save  # noqa: E402
+
+SUITES = {
+    "orchestration": bench_orchestration,
+    "print_result": bench_print_result,
+    "ledger": bench_ledger,
+    "startup": bench_startup,
+}
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "latest.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", action="append", choices=sorted(SUITES), help="Run just this suite (repeatable).")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes and fewer repeats (skips 500 MB).")
+    parser.add_argument("--save", default=DEFAULT_OUTPUT, help="Where to write the results JSON.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against this results JSON.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative slowdown (default: 0.25).")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or SUITES:
+        print(f"⏱️  {name}...", flush=True)
+        results.update(SUITES[name].run(quick=args.quick))
+
+    save(args.save, results)
+    width = max(len(m) for m in results)
+    for metric in sorted(results):
+        print(f"  {metric:<{width}}  {results[metric] * 1000:10.2f} ms")
+    print(f"💾 Saved {len(results)} metrics to {args.save}")
+
+    if not args.compare:
+        return 0
+    rows = compare(load(args.compare), results, args.threshold)
+    regressions = [row for row in rows if row[4]]
+    print(f"\n📊 Against {args.compare} (threshold +{args.threshold:.0%}):")
+    for metric, old, new, ratio, regressed in rows:
+        flag = "❌ REGRESSION" if regressed else "✅"
+        print(f"  {metric:<{width}}  {old * 1000:10.2f} → {new * 1000:10.2f} ms  ({ratio:5.2f}x)  {flag}")
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s).")
+        return 1
+    print("✨ No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
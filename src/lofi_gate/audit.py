@@ -0,0 +1,126 @@
+import hashlib
+import os
+import re
+import subprocess
+import time
+
+from .cache import ResultCache
+from .capture import prepend_output
+
+# --- Constants ---
+
+# The lockfile an audit's result depends on (first one found wins).
+LOCKFILES = {
+    "npm audit": ["package-lock.json", "npm-shrinkwrap.json"],
+    "cargo audit": ["Cargo.lock"],
+}
+
+# The local RustSec checkout `cargo audit` fetches into; its commit is the advisory DB revision.
+# npm has no local database (the registry is asked on every run), so for npm the TTL alone bounds staleness.
+CARGO_ADVISORY_DB = "advisory-db"
+
+# An audit that failed because it couldn't reach the registry / advisory DB, not because of a finding.
+NETWORK_ERROR = re.compile(
+    r"ENOTFOUND|EAI_AGAIN|ECONNREFUSED|ECONNRESET|ETIMEDOUT|getaddrinfo|Could not resolve host|"
+    r"failed to resolve address|couldn't fetch advisory database|network is unreachable|request to https?://\S+ failed",
+    re.I,
+)
+
+
+def parse_ttl(value):
+    """
+    `cache_ttl` as seconds: a number, or `30m` / `6h` / `1d` / `1w`.
+    Returns: seconds, or None when unset.
+    Raises: ValueError for anything else.
+    """
+    from .history import SINCE_UNITS  # sqlite3 is only needed by the history itself
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw]?)", str(value).strip())
+    if not match:
+        raise ValueError(f"invalid cache_ttl: {value!r}")
+    return float(match.group(1)) * SINCE_UNITS.get(match.group(2) or "s")
+
+
+def _tool(command):
+    return next((tool for tool in LOCKFILES if command.startswith(tool)), None)
+
+
+def lockfile_hash(command):
+    """
+    Returns: the SHA-256 of the lockfile the audit reads, or None (unknown tool, no lockfile).
+    """
+    for name in LOCKFILES.get(_tool(command), []):
+        try:
+            with open(name, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            continue
+    return None
+
+
+def advisory_revision(command):
+    """
+    Returns: the local advisory DB commit for `cargo audit`, or "" when there is none to read.
+    """
+    if _tool(command) != "cargo audit":
+        return ""
+    cargo_home = os.environ.get("CARGO_HOME") or os.path.join(os.path.expanduser("~"), ".cargo")
+    try:
+        result = subprocess.run(
+            ["git", "-C", os.path.join(cargo_home, CARGO_ADVISORY_DB), "rev-parse", "HEAD"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+    except Exception:
+        return ""
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def format_age(seconds):
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.0f}{unit}"
+    return f"{seconds:.0f}s"
+
+
+def run_audit(command, run_command, ttl, label="Security", store=None):
+    """
+    Runs a security audit through a cache keyed by lockfile hash + advisory DB revision.
+
+    A pass or a fail younger than `ttl` seconds is replayed instantly. If the audit can't
+    reach the network, the last result for the same lockfile is replayed whatever its age,
+    marked stale (`output.stale`).
+    Returns: (exit_code, output_text, duration_seconds, command_string)
+    """
+    lock = lockfile_hash(command)
+    if lock is None or not ttl:
+        return run_command(command, label)
+    store = store or ResultCache()
+    base = f"audit\0{lock}"
+    fresh_key = ResultCache.make_key(base, command, advisory_revision(command))
+    last_key = ResultCache.make_key(base, command, "last")
+
+    hit = store.get(fresh_key, max_age=ttl)
+    if hit is not None:
+        return hit
+
+    code, output, duration, cmd = run_command(command, label)
+    if getattr(output, "status", None):
+        return code, output, duration, cmd
+    if code != 0 and NETWORK_ERROR.search(output):
+        last = store.get(last_key)
+        if last is None:
+            return code, output, duration, cmd
+        last_code, last_output, _, last_cmd = last
+        age = format_age(time.time() - (last_output.cached_at or 0))
+        last_output = prepend_output(f"⚠️  Audit offline. Replaying the last result for this lockfile ({age} old).\n", last_output)
+        last_output.stale = f"offline, {age} old"
+        return last_code, last_output, duration, last_cmd
+
+    # `cargo audit` fetches the advisory DB itself: this result belongs to the revision it checked against.
+    fresh_key = ResultCache.make_key(base, command, advisory_revision(command))
+    store.put(fresh_key, code, output, duration, cmd)
+    store.put(last_key, code, output, duration, cmd)
+    return code, output, duration, cmd
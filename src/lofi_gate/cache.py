@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import subprocess
+import time
+
+from .capture import CapturedOutput
+from .engine import CommandCheck
+from .extract import Extraction
+from .logger import LOG_FILENAME
+
+# --- Constants ---
+
+# Results are stored per check, one small JSON file each.
+CACHE_DIR = os.path.join(".lofi-gate", "cache")
+
+# Default size cap for the cache directory (LRU eviction kicks in above it).
+DEFAULT_MAX_MB = 50
+
+# How much of each output we keep. The Agent only ever sees the first/last
+# 1000 chars, so this is enough to replay `print_result` exactly.
+STORED_HEAD = 4000
+STORED_TAIL = 4000
+
+# The gate's own artifacts change on every run; they must not bust the cache.
+EXCLUDED_PATHSPECS = [f":(exclude){LOG_FILENAME}", ":(exclude).lofi-gate"]
+
+
+def _hash_git(hasher, args):
+    """
+    Streams the stdout of a git command into `hasher`.
+    Returns: the exit code.
+    """
+    process = subprocess.Popen(["git"] + args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    for chunk in iter(lambda: process.stdout.read(65536), b""):
+        hasher.update(chunk)
+    process.stdout.close()
+    return process.wait()
+
+
+def tree_state_key(config=None):
+    """
+    Hashes everything a check result can depend on:
+    HEAD + staged diff + unstaged diff + untracked files (path AND content) + resolved lofi.toml.
+    Returns: hex digest, or None when we are not inside a git work tree.
+    """
+    try:
+        probe = subprocess.run(
+            ["git", "rev-parse", "--is-inside-work-tree"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        if probe.returncode != 0 or probe.stdout.strip() != "true":
+            return None
+
+        h = hashlib.sha256()
+        # A repo without commits has no HEAD; that's still a valid (empty) state.
+        _hash_git(h, ["rev-parse", "--verify", "--quiet", "HEAD"])
+        h.update(b"\0staged\0")
+        _hash_git(h, ["diff", "--cached", "--binary", "--no-color", "--", "."] + EXCLUDED_PATHSPECS)
+        h.update(b"\0unstaged\0")
+        _hash_git(h, ["diff", "--binary", "--no-color", "--", "."] + EXCLUDED_PATHSPECS)
+
+        h.update(b"\0untracked\0")
+        listing = subprocess.run(
+            ["git", "ls-files", "--others", "--exclude-standard", "-z", "--", "."] + EXCLUDED_PATHSPECS,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        for path in sorted(p for p in listing.stdout.split(b"\0") if p):
+            h.update(path + b"\0")
+            try:
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(65536), b""):
+                        h.update(chunk)
+            except OSError:
+                h.update(b"<unreadable>")
+
+        h.update(b"\0config\0")
+        h.update(json.dumps(config or {}, sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
+    except Exception:
+        return None
+
+
+class ResultCache:
+    """
+    Content-addressed store of check results under `.lofi-gate/cache/`.
+
+    Key = sha256(tree state + check label + resolved command).
+    Each entry keeps the exit code, a head/tail of the output and the token metrics,
+    which is everything `print_result` needs to replay the check.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def make_key(tree_key, label, command):
+        return hashlib.sha256(f"{tree_key}\0{label}\0{command}".encode("utf-8")).hexdigest()
+
+    def get(self, key, max_age=None):
+        """
+        `max_age`: seconds; an older entry is a miss (its `created` time is kept on `output.cached_at`).
+        Returns: (exit_code, output, duration, command) or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if max_age is not None and time.time() - entry.get("created", 0) > max_age:
+                return None
+            # Touch on hit: mtime is our LRU clock.
+            os.utime(path, None)
+        except (OSError, ValueError):
+            return None
+
+        output = CapturedOutput(
+            entry["output"],
+            total_chars=entry.get("total_chars"),
+            total_bytes=entry.get("total_bytes"),
+            omitted_chars=entry.get("omitted_chars", 0),
+            extraction=Extraction.from_dict(entry.get("extraction")),
+            tokens=entry.get("tokens"),
+            raw_chars=entry.get("raw_chars"),
+            filter_savings=entry.get("filter_savings"),
+        )
+        output.from_cache = True
+        output.cached_at = entry.get("created")
+        return entry["exit_code"], output, entry.get("duration", 0), entry.get("command", "")
+
+    def put(self, key, exit_code, output, duration, command):
+        total_chars = getattr(output, "total_chars", len(output))
+        total_bytes = getattr(output, "total_bytes", len(output.encode("utf-8")))
+        stored = output
+        if len(output) > STORED_HEAD + STORED_TAIL:
+            stored = f"{output[:STORED_HEAD]}\n... [Cache dropped {len(output) - STORED_HEAD - STORED_TAIL} chars] ...\n{output[-STORED_TAIL:]}"
+
+        extraction = getattr(output, "extraction", None)
+        entry = {
+            "exit_code": exit_code,
+            "output": str(stored),
+            "total_chars": total_chars,
+            "total_bytes": total_bytes,
+            "omitted_chars": max(total_chars - len(stored), 0),
+            "duration": duration,
+            "command": command,
+            "extraction": extraction.to_dict() if extraction else None,
+            "tokens": getattr(output, "tokens", None),
+            "raw_chars": getattr(output, "raw_chars", total_chars),
+            "filter_savings": getattr(output, "filter_savings", None),
+            "created": time.time(),
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        LRU eviction: drop the least-recently-used entries until we fit in `max_bytes`.
+        """
+        try:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        except OSError:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def wrap(self, label, fn, command, tree_key):
+        """
+        Wraps a check so it is served from the cache when the tree state is unchanged.
+        """
+        key = self.make_key(tree_key, label, command)
+
+        def lookup():
+            return self.get(key)
+
+        def store(result):
+            # A cancelled (or otherwise interrupted) run is not a result worth replaying.
+            if not getattr(result[1], "status", None):
+                self.put(key, *result)
+
+        if isinstance(fn, CommandCheck):
+            # Stays a CommandCheck, so the async engine can still run it on its loop.
+            return fn.replace(lookup=lookup, store=store)
+
+        def cached_fn():
+            hit = lookup()
+            if hit is not None:
+                return hit
+            result = fn()
+            store(result)
+            return result
+
+        return cached_fn
@@ -0,0 +1,304 @@
+import codecs
+import collections
+import datetime
+import gzip
+import io
+import os
+
+# --- Constants ---
+
+# How much of the stream we keep in memory.
+# The Agent only ever sees the first/last 1000 chars, but the Ledger keeps
+# up to 400 lines for humans, so we hold a generous (but FIXED) window.
+HEAD_LIMIT = 64 * 1024
+TAIL_LIMIT = 64 * 1024
+
+# Bytes read from the pipe per iteration.
+CHUNK_SIZE = 64 * 1024
+
+# Spilled logs live next to the rest of the gate's state.
+SPILL_DIR = os.path.join(".lofi-gate", "logs")
+
+# Max spilled logs to keep on disk (oldest are pruned first).
+MAX_SPILL_FILES = 20
+
+# Longest line handed to line consumers (a 100MB line without "\n" must not be buffered).
+MAX_LINE_CHARS = 64 * 1024
+
+
+class CapturedOutput(str):
+    """
+    The bounded view of a command's output.
+
+    It IS a string (head + marker + tail), so every existing caller keeps working,
+    but it also remembers how big the full stream was so the metrics stay honest.
+    """
+    def __new__(cls, text, total_chars=None, total_bytes=None, omitted_chars=0, spill_path=None, extraction=None, tokens=None, raw_chars=None, filter_savings=None):
+        obj = super().__new__(cls, text)
+        obj.total_chars = len(text) if total_chars is None else total_chars
+        # Size of the stream BEFORE output filters (see filters.py) and what each of them saved.
+        obj.raw_chars = obj.total_chars if raw_chars is None else raw_chars
+        obj.filter_savings = filter_savings or {}
+        obj.total_bytes = obj.total_chars if total_bytes is None else total_bytes
+        obj.omitted_chars = omitted_chars
+        obj.spill_path = spill_path
+        # Failures distilled by a framework parser (see extract.py), if any.
+        obj.extraction = extraction
+        # Exact count from a real tokenizer (see tokens.py), if one was running.
+        obj.tokens = tokens
+        # Set when the gate itself stopped the command ("CANCELLED", "TIMEOUT", "LIMIT"),
+        # with a human-readable reason in `status_detail`.
+        obj.status = None
+        obj.status_detail = None
+        return obj
+
+    @property
+    def raw_tokens(self):
+        if self.tokens is not None:
+            return self.tokens
+        # Same heuristic as logic.estimate_tokens, applied to the FULL (unfiltered) stream.
+        return self.raw_chars // 4
+
+
+class StreamCapture:
+    """
+    Incremental capture engine.
+
+    Feed it raw bytes as they come off the pipe. It keeps:
+    - A fixed-size HEAD buffer (the first HEAD_LIMIT chars).
+    - A ring-buffer TAIL (the last TAIL_LIMIT chars).
+    - Running byte/char counters (so tokens can be estimated without the text).
+    - Optionally, a gzip "spill" file with the complete stream for the Ledger.
+    - Optionally, an Extractor fed line by line (same single pass over the stream).
+    - Optionally, a Progress counter fed the same lines (live pass/fail counts, see extract.py).
+    - Optionally, a TokenCounter fed chunk by chunk (exact token totals).
+    - Optionally, a FilterChain (see filters.py) that strips noise before the head/tail
+      and the Extractor see it. The spill file and the token count keep the raw stream.
+
+    Memory stays flat no matter how much the tool prints.
+    """
+    def __init__(self, head_limit=HEAD_LIMIT, tail_limit=TAIL_LIMIT, spill_path=None, extractor=None, token_counter=None, filters=None, progress=None):
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self.total_bytes = 0
+        self.total_chars = 0
+        self.raw_chars = 0
+
+        self._head = []
+        self._head_len = 0
+        self._tail = collections.deque()
+        self._tail_len = 0
+
+        self.extractor = extractor
+        self.progress = progress
+        self._partial = ""
+        self.token_counter = token_counter
+        self.filters = filters
+
+        # Same decoding as `subprocess.run(text=True, errors='replace')`:
+        # UTF-8 with replacement chars, universal newlines.
+        # (A lone "\r" is a redraw, not a newline, when the chain collapses redraws.)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        if not (filters and filters.handles_carriage_returns):
+            self._decoder = io.IncrementalNewlineDecoder(self._decoder, translate=True)
+
+        self.spill_path = None
+        self._spill = None
+        if spill_path:
+            try:
+                os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+                self._spill = gzip.open(spill_path, "wt", encoding="utf-8")
+                self.spill_path = spill_path
+            except Exception:
+                self._spill = None
+
+    def feed(self, data):
+        """Accepts a chunk of raw bytes from the pipe."""
+        self.total_bytes += len(data)
+        self.feed_text(self._decoder.decode(data))
+
+    def feed_text(self, text):
+        """Accepts already-decoded text."""
+        if not text:
+            return
+        self.raw_chars += len(text)
+
+        if self._spill:
+            try:
+                self._spill.write(text)
+            except Exception:
+                pass
+
+        if self.token_counter:
+            self.token_counter.feed(text)
+
+        if self.filters:
+            text = self.filters.feed(text)
+        self._keep(text)
+
+    def _keep(self, text):
+        """Buffers (filtered) text into the head/tail window and the line consumers."""
+        if not text:
+            return
+        self.total_chars += len(text)
+
+        if self.extractor or self.progress:
+            self._feed_lines(text)
+
+        # 1. Fill the HEAD first.
+        if self._head_len < self.head_limit:
+            room = self.head_limit - self._head_len
+            piece = text[:room]
+            self._head.append(piece)
+            self._head_len += len(piece)
+            text = text[room:]
+            if not text:
+                return
+
+        # 2. Everything else rolls through the TAIL ring buffer.
+        self._tail.append(text)
+        self._tail_len += len(text)
+        while self._tail and self._tail_len - len(self._tail[0]) >= self.tail_limit:
+            self._tail_len -= len(self._tail.popleft())
+        excess = self._tail_len - self.tail_limit
+        if excess > 0:
+            self._tail[0] = self._tail[0][excess:]
+            self._tail_len -= excess
+
+    def _feed_lines(self, text):
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        if len(self._partial) > MAX_LINE_CHARS:
+            lines.append(self._partial[:MAX_LINE_CHARS])
+            self._partial = ""
+        for line in lines:
+            try:
+                if self.extractor:
+                    self.extractor.feed_line(line)
+            except Exception:
+                # A parser bug must never break the capture itself.
+                self.extractor = None
+            try:
+                if self.progress:
+                    self.progress.feed_line(line)
+            except Exception:
+                self.progress = None
+
+    def close(self):
+        """
+        Flushes the decoder and the spill file.
+        Returns: CapturedOutput
+        """
+        self.feed_text(self._decoder.decode(b"", final=True))
+        if self.filters:
+            self._keep(self.filters.flush())
+        extraction = None
+        if (self.extractor or self.progress) and self._partial:
+            self._feed_lines("\n")
+        if self.extractor:
+            extraction = self.extractor.result()
+        if self._spill:
+            try:
+                self._spill.close()
+            except Exception:
+                pass
+            self._spill = None
+
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        omitted = self.total_chars - len(head) - len(tail)
+        if omitted > 0:
+            text = f"{head}\n... [Capture dropped {omitted} chars] ...\n{tail}"
+        else:
+            text = head + tail
+
+        return CapturedOutput(
+            text,
+            total_chars=self.total_chars,
+            total_bytes=self.total_bytes,
+            omitted_chars=max(omitted, 0),
+            spill_path=self.spill_path,
+            extraction=extraction,
+            tokens=self.token_counter.tokens if self.token_counter else None,
+            raw_chars=self.raw_chars,
+            filter_savings=self.filters.savings() if self.filters else None,
+        )
+
+
+def prepend_output(prefix, output):
+    """
+    Prepends a banner to an output while keeping its capture metadata.
+    Plain strings (e.g. from internal checks) are simply concatenated.
+    """
+    if not isinstance(output, CapturedOutput):
+        return prefix + output
+    wrapped = CapturedOutput(
+        prefix + output,
+        total_chars=output.total_chars + len(prefix),
+        total_bytes=output.total_bytes + len(prefix.encode("utf-8")),
+        omitted_chars=output.omitted_chars,
+        spill_path=output.spill_path,
+        extraction=output.extraction,
+        tokens=None if output.tokens is None else output.tokens + len(prefix) // 4,
+        raw_chars=output.raw_chars + len(prefix),
+        filter_savings=output.filter_savings,
+    )
+    wrapped.status = output.status
+    wrapped.status_detail = output.status_detail
+    # Replay markers (see cache.py / audit.py) and shard timings (see shard.py).
+    for name in ("from_cache", "cached_at", "stale", "shard_timings"):
+        if hasattr(output, name):
+            setattr(wrapped, name, getattr(output, name))
+    return wrapped
+
+
+def capture_stream(stream, capture=None, chunk_size=CHUNK_SIZE, max_bytes=None, on_limit=None):
+    """
+    Drains a binary stream (e.g. `Popen.stdout`) into a StreamCapture.
+    `max_bytes`: stop capturing past this many bytes and call `on_limit()` (e.g. to kill the producer).
+    Returns: CapturedOutput
+    """
+    capture = capture or StreamCapture()
+    read = getattr(stream, "read1", stream.read)
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        if max_bytes is not None and capture.total_bytes + len(chunk) > max_bytes:
+            capture.feed(chunk[:max(max_bytes - capture.total_bytes, 0)])
+            if on_limit:
+                on_limit()
+            # Drop whatever the dying producer still writes, so it never blocks on a full pipe.
+            while read(chunk_size):
+                pass
+            break
+        capture.feed(chunk)
+    return capture.close()
+
+
+def spill_path_for(label, spill_dir=SPILL_DIR):
+    """
+    Builds a unique spill file name for a check and prunes old spills.
+    """
+    slug = "".join(c if c.isalnum() else "-" for c in label.lower()).strip("-") or "output"
+    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    prune_spills(spill_dir)
+    return os.path.join(spill_dir, f"{slug}-{timestamp}.log.gz")
+
+
+def prune_spills(spill_dir=SPILL_DIR, keep=MAX_SPILL_FILES):
+    """
+    Keeps only the newest `keep` spill files so the disk doesn't grow forever.
+    """
+    try:
+        files = [os.path.join(spill_dir, f) for f in os.listdir(spill_dir) if f.endswith(".log.gz")]
+    except OSError:
+        return
+    if len(files) < keep:
+        return
+    files.sort(key=lambda p: os.path.getmtime(p))
+    for path in files[:len(files) - keep + 1]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -2,7 +2,6 @@ import click
 import os
 import shutil
 import sys
-from .logic import run_checks
 from . import __version__
 
 @click.group()
@@ -50,10 +49,119 @@ def init(force):
 
 @cli.command()
 @click.option('--parallel', is_flag=True, help="Run checks in parallel.")
-def verify(parallel):
+@click.option('--cached/--no-cache', default=None, help="Replay results for an unchanged tree (default: lofi.toml `cache`).")
+@click.option('--impact/--full', default=None, help="Only run tests affected by the current change (default: lofi.toml `test_impact`).")
+@click.option('--fail-fast', is_flag=True, help="With --parallel: cancel the remaining checks on the first failure.")
+@click.option('--daemon/--no-daemon', default=True, help="Use a running `lofi-gate serve` daemon if there is one.")
+@click.option('--monorepo/--single', default=None, help="Gate every touched project in its own directory (default: lofi.toml `monorepo`).")
+@click.option('--profile', is_flag=True, help="Trace every phase and check; write .lofi-gate/profile.json (Chrome trace format) and print the slowest phases.")
+@click.option('--engine', type=click.Choice(["threads", "async"]), default=None, help="With --parallel: run checks on threads or on one event loop with live progress (default: lofi.toml `engine`).")
+@click.option('--failed-first/--in-order', default=None, help="Run the tests that failed last time before the rest (default: lofi.toml `failed_first`).")
+def verify(parallel, cached, impact, fail_fast, daemon, monorepo, profile, engine, failed_first):
     """Run the verification suite (Tests, Lint, Security)."""
+    if profile:
+        # Profiling measures THIS process, so it always runs locally.
+        from . import trace
+        tracer = trace.start()
+        with trace.span("import lofi_gate.logic"):
+            from .logic import run_checks
+        exit_code = run_checks(parallel=parallel, cache=cached, impact=impact, fail_fast=fail_fast, monorepo=monorepo, engine=engine, failed_first=failed_first)
+        trace.stop()
+        trace.print_summary(tracer)
+        click.echo(f"🔬 Trace written to {tracer.write()} (open in chrome://tracing or ui.perfetto.dev)")
+        sys.exit(exit_code)
+    if daemon and not monorepo:
+        # Thin client: a warm daemon answers (and coalesces identical concurrent runs).
+        from .client import verify_via_daemon
+        exit_code = verify_via_daemon(parallel=parallel, cache=cached, impact=impact, fail_fast=fail_fast, engine=engine, failed_first=failed_first)
+        if exit_code is not None:
+            sys.exit(exit_code)
     # Simply delegate to the logic engine
-    sys.exit(run_checks(parallel=parallel))
+    # (imported here so the daemon fast path never pays for loading it).
+    from .logic import run_checks
+    sys.exit(run_checks(parallel=parallel, cache=cached, impact=impact, fail_fast=fail_fast, monorepo=monorepo, engine=engine, failed_first=failed_first))
+
+@cli.command()
+def serve():
+    """Run a local gate daemon (Unix socket at .lofi-gate/gate.sock) for fast, shared verify runs."""
+    from .serve import serve as run_daemon
+    try:
+        run_daemon()
+    except RuntimeError as e:
+        click.echo(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        click.echo("\n👋 Gate daemon stopped.")
+
+@cli.command()
+@click.option('--parallel', is_flag=True, help="Run checks in parallel.")
+@click.option('--impact/--full', default=None, help="Only run tests affected by the current change (default: lofi.toml `test_impact`).")
+@click.option('--fail-fast', is_flag=True, help="With --parallel: cancel the remaining checks on the first failure.")
+@click.option('--debounce', default=0.3, show_default=True, help="Seconds of quiet before a burst of saves triggers a run.")
+@click.option('--poll', is_flag=True, help="Poll the tree instead of using inotify.")
+def watch(parallel, impact, fail_fast, debounce, poll):
+    """Re-verify on every change; the latest report is kept in .lofi-gate/latest_report.md."""
+    from .logic import run_checks, build_tasks, load_config, load_scripts
+    from .watch import Session, PollingWatcher, make_watcher, watch_loop
+
+    session = Session(
+        run_checks, load_config, load_scripts,
+        lambda config, scripts: [task[0] for task in build_tasks(config, scripts, impact=False)],
+        parallel=parallel, impact=impact, fail_fast=fail_fast,
+    )
+    watcher = PollingWatcher() if poll else make_watcher()
+    try:
+        watch_loop(session, watcher, quiet=debounce)
+    except KeyboardInterrupt:
+        click.echo("\n👋 Stopped watching.")
+    finally:
+        watcher.close()
+
+@cli.command()
+@click.option('--label', '-l', help="Only this check (e.g. \"Test Suite\").")
+@click.option('--status', '-s', help="Only runs with this status (PASS, FAIL, TIMEOUT, ...).")
+@click.option('--since', help="Only runs newer than this: 7d, 24h, 30m or an ISO date.")
+@click.option('--runs', 'show_runs', default=0, help="Also list the N most recent matching runs.")
+def history(label, status, since, show_runs):
+    """Query past checks: p50/p95 duration, failure rate and token savings per check."""
+    import datetime
+    from .history import connect, history_path, parse_since, recent, summarize
+
+    path = history_path()
+    if not os.path.exists(path):
+        click.echo("📭 No history yet. Run `lofi-gate verify` first.")
+        return
+    try:
+        since_ts = parse_since(since) if since else None
+    except ValueError:
+        click.echo(f"❌ Invalid --since value: {since} (use 7d, 24h, 30m or an ISO date)")
+        sys.exit(2)
+
+    conn = connect(path)
+    try:
+        summary = summarize(conn, label, status, since_ts)
+        if not summary:
+            click.echo("📭 No matching runs.")
+            return
+        click.echo(f"📈 Check history{f' since {since}' if since else ''}:")
+        click.echo(f"  {'check':<24} {'runs':>6} {'fail':>6} {'p50':>9} {'p95':>9} {'tokens saved':>13}")
+        for row in summary:
+            # Replays (cached results) have no duration of their own; a check may have nothing else.
+            p50, p95 = (f"{row[q]:>8.2f}s" if row[q] is not None else f"{'-':>9}" for q in ("p50", "p95"))
+            replays = f" (+{row['replays']} replayed)" if row["replays"] else ""
+            click.echo(
+                f"  {row['label'][:24]:<24} {row['runs']:>6} {row['fail_rate']:>6.0%} "
+                f"{p50} {p95} {row['tokens_saved']:>13}{replays}"
+            )
+        click.echo(f"💰 Total token savings: {sum(row['tokens_saved'] for row in summary)}")
+        if show_runs:
+            click.echo(f"\n🕒 Last {show_runs} run(s):")
+            for run in recent(conn, label, status, since_ts, show_runs):
+                when = datetime.datetime.fromtimestamp(run["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+                replay = f" ({run['replay']})" if run["replay"] else ""
+                click.echo(f"  {when}  {run['label']:<20} {run['status']:<9} {run['duration']:>8.2f}s  [{run['command']}]{replay}")
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
     cli()
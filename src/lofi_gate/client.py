@@ -0,0 +1,55 @@
+import json
+import os
+import socket
+import sys
+
+# --- Constants ---
+
+# Where `lofi-gate serve` listens (relative, so it's per-checkout and short enough for AF_UNIX).
+SOCKET_PATH = os.path.join(".lofi-gate", "gate.sock")
+
+# The only `verify` options a client may forward to the daemon.
+VERIFY_OPTIONS = ("parallel", "cache", "impact", "fail_fast", "engine", "failed_first")
+
+
+def request(payload, path=SOCKET_PATH, timeout=None):
+    """
+    Sends one JSON request and waits for the JSON reply.
+    Returns: the reply dict, or None when no daemon is listening.
+
+    This module deliberately imports nothing heavy: the whole point of the
+    thin client is to skip loading the gate itself.
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(path)
+    except OSError:
+        # Stale socket file (daemon crashed or was killed).
+        sock.close()
+        return None
+    try:
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reply:
+            line = reply.readline()
+        return json.loads(line.decode("utf-8")) if line else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def verify_via_daemon(path=SOCKET_PATH, **options):
+    """
+    Asks a running daemon to verify and prints its report.
+    Returns: the exit code, or None if there is no daemon (caller runs locally).
+    """
+    reply = request({"cmd": "verify", "options": {k: options.get(k) for k in VERIFY_OPTIONS}}, path)
+    if reply is None or "exit_code" not in reply:
+        return None
+    sys.stdout.write(reply.get("output", ""))
+    if reply.get("coalesced"):
+        print("🔗 Attached to a run already in progress on the gate daemon.")
+    return reply["exit_code"]
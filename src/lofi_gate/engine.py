@@ -0,0 +1,240 @@
+import contextlib
+import copy
+import subprocess
+import sys
+import threading
+import time
+
+from .capture import CHUNK_SIZE, StreamCapture, spill_path_for
+from .extract import extractor_for, progress_for
+from .filters import build_chain
+from .procs import RUNNING, Watchdog, format_size, group_kwargs, limited_command, renice_tree
+from .tokens import TokenCounter
+from . import trace
+
+# --- Constants ---
+
+# Engines for `--parallel` runs (`[gate] engine` / `verify --engine`).
+ENGINES = ("threads", "async")
+
+# A check's progress line is printed at most this often (seconds), and only when its counts moved.
+# Checks that finish sooner print nothing but their result.
+PROGRESS_INTERVAL = 5.0
+
+
+class CommandCheck:
+    """
+    A check that is a single shell command, run as `runner(command, run_label)`.
+
+    Calling it works everywhere a plain task function does. The async engine
+    recognises it and runs the command on its event loop instead, so the output
+    can be watched while it streams.
+    `finish(code, out, dur, cmd)`: post-processes the result (e.g. warn-only security).
+    `lookup()` / `store(result)`: the result cache in front of the command.
+    `span`: profile span name for the whole check (see trace.py).
+    """
+    def __init__(self, command, run_label, runner, finish=None, lookup=None, store=None, span=None):
+        self.command = command
+        self.run_label = run_label
+        self.runner = runner
+        self.finish = finish
+        self.lookup = lookup
+        self.store = store
+        self.span = span
+
+    def replace(self, **changes):
+        check = copy.copy(self)
+        check.__dict__.update(changes)
+        return check
+
+    def _span(self):
+        return trace.span(self.span, "check", command=self.command) if self.span else contextlib.nullcontext()
+
+    def _complete(self, result):
+        if self.finish:
+            result = self.finish(*result)
+        if self.store:
+            self.store(result)
+        return result
+
+    def __call__(self):
+        with self._span():
+            hit = self.lookup() if self.lookup else None
+            if hit is not None:
+                return hit
+            return self._complete(self.runner(self.command, self.run_label))
+
+    async def run_async(self, settings=None, limits=None, progress=None):
+        with self._span():
+            hit = self.lookup() if self.lookup else None
+            if hit is not None:
+                return hit
+            return self._complete(await run_command_async(self.command, self.run_label, settings, limits, progress))
+
+
+class ProcessHandle:
+    """
+    The Popen-like face of an asyncio Process, for the registry and the Watchdog
+    (which only need `pid`, `poll()`, `kill()` and `terminate()`).
+    """
+    def __init__(self, process):
+        self.process = process
+        self.pid = process.pid
+
+    def poll(self):
+        return self.process.returncode
+
+    def kill(self):
+        with contextlib.suppress(ProcessLookupError):
+            self.process.kill()
+
+    def terminate(self):
+        with contextlib.suppress(ProcessLookupError):
+            self.process.terminate()
+
+
+class LiveProgress:
+    """
+    Prints compact, prefixed progress lines for running checks
+    (`⏳ Tests: 340 passed, 1 failed so far`) and announces a check's FIRST
+    failure the moment the runner prints it, long before the check exits.
+    `on_failure(label, handle)`: called (off the event loop) on that first failure.
+    """
+    def __init__(self, interval=PROGRESS_INTERVAL, on_failure=None, stream=None):
+        self.interval = interval
+        self.on_failure = on_failure
+        self.stream = stream
+        self._shown = {}
+
+    def _print(self, line):
+        stream = self.stream or sys.stdout
+        stream.write(line + "\n")
+        stream.flush()
+
+    def update(self, label, progress, started):
+        """
+        Returns: True exactly once per check: when its first failure shows up.
+        """
+        now = time.time()
+        counts = (progress.passed, progress.failed)
+        shown = self._shown.setdefault(label, {"at": started, "counts": (0, 0), "failed": False})
+        first = bool(progress.failed) and not shown["failed"]
+        if first:
+            shown["failed"] = True
+            self._print(f"❌ {label}: first failure after {now - started:.1f}s: {progress.first_failure} (still running)")
+        if counts != shown["counts"] and now - shown["at"] >= self.interval:
+            shown["at"], shown["counts"] = now, counts
+            self._print(f"⏳ {label}: {counts[0]} passed, {counts[1]} failed so far")
+        return first
+
+
+async def run_command_async(command, label="Test", settings=None, limits=None, progress=None):
+    """
+    The event-loop twin of `logic.run_command`: same capture pipeline (filters, extractor,
+    token counter, spill), same limits, same process registry, but the pipe is drained by a
+    coroutine instead of a blocked thread, and live counts go to `progress` (a LiveProgress).
+    `settings` / `limits`: logic.CAPTURE_SETTINGS / logic.CHECK_LIMITS.
+    Returns: (exit_code, output_text, duration_seconds, command_string)
+    """
+    import asyncio
+    settings = settings or {}
+    limits = (limits or {}).get(label, {})
+    loop = asyncio.get_running_loop()
+    start_time = time.time()
+    try:
+        spill_path = spill_path_for(label) if settings.get("spill_output") else None
+        with trace.span("spawn", "process", label=label) as info:
+            # A shell, like every other path: check commands are shell strings (`cd x && make test`).
+            process = await asyncio.create_subprocess_shell(
+                limited_command(command, limits.get("max_memory")),
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, **group_kwargs({})
+            )
+            renice_tree(process, limits.get("cpu_niceness"))
+            if info is not None:
+                info["child_pid"] = process.pid
+        handle = ProcessHandle(process)
+        RUNNING.register(label, handle)
+        watchdog = Watchdog(handle, limits.get("timeout"), limits.get("max_memory")).start()
+        max_output = limits.get("max_output_bytes")
+        try:
+            counter = TokenCounter() if settings.get("count_tokens") else None
+            chain = build_chain(settings.get("filters", {}).get(label))
+            counts = progress_for(command) if progress else None
+            capture = StreamCapture(spill_path=spill_path, extractor=extractor_for(command), token_counter=counter, filters=chain, progress=counts)
+            with trace.span("capture", "process", label=label):
+                while True:
+                    chunk = await process.stdout.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if max_output is not None and capture.total_bytes + len(chunk) > max_output:
+                        capture.feed(chunk[:max(max_output - capture.total_bytes, 0)])
+                        # Killing the tree waits out a grace period: never on the loop.
+                        await loop.run_in_executor(None, watchdog.trip, "LIMIT", f"output over the {format_size(max_output)} limit")
+                        while await process.stdout.read(CHUNK_SIZE):
+                            pass
+                        break
+                    capture.feed(chunk)
+                    if capture.progress and progress.update(label, capture.progress, start_time) and progress.on_failure:
+                        loop.run_in_executor(None, progress.on_failure, label, handle)
+                output = capture.close()
+            with trace.span("wait", "process", label=label):
+                await process.wait()
+        finally:
+            watchdog.stop()
+            RUNNING.unregister(handle)
+        exit_code = process.returncode
+        if RUNNING.was_cancelled(handle):
+            output.status = "CANCELLED"
+        elif watchdog.tripped:
+            output.status, output.status_detail = watchdog.tripped
+            exit_code = exit_code or 1
+        return exit_code, output, time.time() - start_time, command
+    except Exception as e:
+        return 1, str(e), time.time() - start_time, command
+
+
+class AsyncExecutor:
+    """
+    An Executor for WeightedScheduler backed by ONE event loop thread.
+
+    CommandChecks run as coroutines on the loop: every check's output is read
+    at the same time without a thread each. Anything else (the TDD check, a
+    sharded suite) still gets a worker thread.
+    """
+    def __init__(self, max_workers=None, settings=None, limits=None, progress=None):
+        # asyncio is the single most expensive import of the gate: only the async engine loads it.
+        import asyncio
+        import concurrent.futures
+        self.settings = settings
+        self.limits = limits
+        self.progress = progress
+        self.loop = asyncio.new_event_loop()
+        self._threads = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        # Blocking helpers the loop hands off (tree kills) share the same workers.
+        self.loop.set_default_executor(self._threads)
+        self._thread = threading.Thread(target=self._run_loop, name="lofi-gate-engine", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        import asyncio
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, fn):
+        import asyncio
+        if isinstance(fn, CommandCheck):
+            return asyncio.run_coroutine_threadsafe(fn.run_async(self.settings, self.limits, self.progress), self.loop)
+        return self._threads.submit(fn)
+
+    def shutdown(self, wait=True):
+        self._threads.shutdown(wait)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
@@ -0,0 +1,453 @@
+import re
+
+# --- Constants ---
+
+# Hard caps so an extractor's memory is bounded no matter how many tests fail.
+MAX_FAILURES = 50
+MAX_MESSAGE_LINES = 20
+MAX_FRAMES = 3
+MAX_LINE_CHARS = 300
+
+
+class Failure:
+    """
+    One failing test: its name, the assertion message and the innermost frames.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.message = []
+        self.frames = []
+
+    def add_message(self, line):
+        line = line.rstrip()
+        if line.strip() and len(self.message) < MAX_MESSAGE_LINES:
+            self.message.append(line[:MAX_LINE_CHARS])
+
+    def add_frame(self, line):
+        # We want the INNERMOST frames, which frameworks print last (pytest, go)
+        # or first (jest); each parser decides which end to keep.
+        self.frames.append(line.strip()[:MAX_LINE_CHARS])
+        if len(self.frames) > MAX_FRAMES:
+            self.frames.pop(0)
+
+    def render(self):
+        lines = [f"● {self.name}"]
+        lines.extend(f"    {m.strip()}" for m in self.message)
+        lines.extend(f"    at {f}" for f in self.frames)
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {"name": self.name, "message": self.message, "frames": self.frames}
+
+    @classmethod
+    def from_dict(cls, data):
+        failure = cls(data.get("name", "?"))
+        failure.message = list(data.get("message", []))
+        failure.frames = list(data.get("frames", []))
+        return failure
+
+
+class Extraction:
+    """
+    The distilled signal of a test run (what the Agent actually needs to see).
+    """
+    def __init__(self, framework, failures=None, dropped=0):
+        self.framework = framework
+        self.failures = failures or []
+        self.dropped = dropped
+
+    def __bool__(self):
+        return bool(self.failures)
+
+    def render(self, max_chars, header=None):
+        """
+        Fits the failures into `max_chars`:
+        every failure's name first, then as many full details as the budget allows.
+        """
+        total = len(self.failures) + self.dropped
+        header = header or f"🎯 {total} failing test(s) ({self.framework}):"
+
+        out = [header]
+        used = len(header)
+        names_only = []
+        for failure in self.failures:
+            block = failure.render()
+            if not names_only and used + len(block) + 1 <= max_chars:
+                out.append(block)
+                used += len(block) + 1
+            else:
+                names_only.append(failure)
+
+        # Whatever didn't fit is still listed BY NAME so nothing silently disappears.
+        for i, failure in enumerate(names_only):
+            line = f"● {failure.name}"
+            if used + len(line) + 1 > max_chars - 20:
+                out.append(f"... and {len(names_only) - i + self.dropped} more")
+                return "\n".join(out)
+            out.append(line)
+            used += len(line) + 1
+        if self.dropped:
+            out.append(f"... and {self.dropped} more")
+        return "\n".join(out)
+
+    def to_dict(self):
+        return {"framework": self.framework, "dropped": self.dropped, "failures": [f.to_dict() for f in self.failures]}
+
+    @classmethod
+    def from_dict(cls, data):
+        if not data:
+            return None
+        return cls(data.get("framework", "?"), [Failure.from_dict(f) for f in data.get("failures", [])], data.get("dropped", 0))
+
+
+class Extractor:
+    """
+    Base class for single-pass, line-oriented failure parsers.
+    Subclasses implement `feed_line`; they never look back at earlier lines.
+    """
+    framework = "unknown"
+
+    def __init__(self):
+        self.failures = []
+        self.dropped = 0
+        self.current = None
+
+    def start(self, name):
+        if len(self.failures) >= MAX_FAILURES:
+            self.dropped += 1
+            self.current = None
+            return None
+        self.current = Failure(name)
+        self.failures.append(self.current)
+        return self.current
+
+    def end(self):
+        self.current = None
+
+    def feed_line(self, line):
+        raise NotImplementedError
+
+    def result(self):
+        return Extraction(self.framework, self.failures, self.dropped)
+
+
+class PytestExtractor(Extractor):
+    framework = "pytest"
+
+    SECTION = re.compile(r"^=+ (FAILURES|ERRORS) =+$")
+    BANNER = re.compile(r"^=+ .* =+$")
+    HEADER = re.compile(r"^_{3,} (.+?) _{3,}$")
+    LOCATION = re.compile(r"^\S+\.py:\d+: ")
+    SUMMARY = re.compile(r"^(FAILED|ERROR) (\S+)")
+
+    def __init__(self):
+        super().__init__()
+        self.in_section = False
+        self.node_ids = {}
+
+    def feed_line(self, line):
+        line = line.rstrip("\n")
+        if self.SECTION.match(line):
+            self.in_section = True
+            return
+        if self.BANNER.match(line):
+            self.in_section = False
+            self.end()
+            return
+
+        summary = self.SUMMARY.match(line)
+        if summary:
+            # `FAILED tests/test_x.py::TestA::test_b - AssertionError` gives us the real node ID.
+            node_id = summary.group(2)
+            self.node_ids[node_id.split("::", 1)[-1].replace("::", ".")] = node_id
+            return
+
+        if not self.in_section:
+            return
+        header = self.HEADER.match(line)
+        if header:
+            self.start(header.group(1))
+            return
+        if self.current is None:
+            return
+        if line.startswith("E "):
+            self.current.add_message(line[1:])
+        elif self.LOCATION.match(line):
+            self.current.add_frame(line)
+
+    def result(self):
+        for failure in self.failures:
+            failure.name = self.node_ids.get(failure.name, failure.name)
+        return super().result()
+
+
+class JestExtractor(Extractor):
+    """
+    Handles jest (`● Suite › test`) and vitest (`FAIL file > suite > test`) output.
+    """
+    framework = "jest"
+
+    HEADER = re.compile(r"^\s*● (.+)$")
+    VITEST_HEADER = re.compile(r"^\s*(?:FAIL|×|✗)\s+(\S+ > .+)$")
+    FRAME = re.compile(r"^\s*(?:at |❯ )(.+)$")
+    END = re.compile(r"^\s*(Test Suites:|Tests:|Test Files |⎯{3,})")
+
+    def __init__(self):
+        super().__init__()
+        self.frames_seen = 0
+
+    def feed_line(self, line):
+        line = line.rstrip("\n")
+        header = self.HEADER.match(line) or self.VITEST_HEADER.match(line)
+        if header:
+            self.start(header.group(1).strip())
+            self.frames_seen = 0
+            return
+        if self.END.match(line):
+            self.end()
+            return
+        if self.current is None:
+            return
+        frame = self.FRAME.match(line)
+        if frame:
+            # Jest prints the innermost frame FIRST; skip framework internals.
+            if "node_modules" not in line and self.frames_seen < MAX_FRAMES:
+                self.current.add_frame(frame.group(1))
+                self.frames_seen += 1
+        elif self.frames_seen == 0:
+            self.current.add_message(line)
+
+
+class CargoExtractor(Extractor):
+    framework = "cargo test"
+
+    HEADER = re.compile(r"^---- (\S+) stdout ----$")
+    PANIC = re.compile(r"^thread '.*' panicked at (.+?):?$")
+    END = re.compile(r"^(failures:|test result:)")
+
+    def feed_line(self, line):
+        line = line.rstrip("\n")
+        header = self.HEADER.match(line)
+        if header:
+            self.start(header.group(1))
+            return
+        if self.END.match(line):
+            self.end()
+            return
+        if self.current is None:
+            return
+        panic = self.PANIC.match(line)
+        if panic:
+            self.current.add_frame(panic.group(1))
+        elif not line.startswith("note: run with `RUST_BACKTRACE"):
+            self.current.add_message(line)
+
+
+class GoExtractor(Extractor):
+    """
+    Handles both plain and `-v` output. With `-v`, a test's log lines are printed
+    under `=== RUN` BEFORE its `--- FAIL` line, so we hold (a bounded number of) them.
+    """
+    framework = "go test"
+
+    RUN = re.compile(r"^=== RUN\s+(\S+)")
+    HEADER = re.compile(r"^\s*--- FAIL: (\S+)")
+    LOCATION = re.compile(r"^\s+(\S+\.go:\d+): ?(.*)$")
+    END = re.compile(r"^(=== (PAUSE|CONT)|\s*--- (PASS|SKIP)|ok\s|FAIL\s|PASS$|FAIL$)")
+
+    def __init__(self):
+        super().__init__()
+        self.running = None
+        self.pending = []
+
+    def _add(self, failure, line):
+        location = self.LOCATION.match(line)
+        if location:
+            failure.add_frame(location.group(1))
+            failure.add_message(location.group(2))
+        else:
+            failure.add_message(line)
+
+    def feed_line(self, line):
+        line = line.rstrip("\n")
+        run = self.RUN.match(line)
+        if run:
+            self.end()
+            self.running = run.group(1)
+            self.pending = []
+            return
+        header = self.HEADER.match(line)
+        if header:
+            name = header.group(1)
+            failure = self.start(name)
+            if failure and self.running == name:
+                for held in self.pending:
+                    self._add(failure, held)
+            self.running = None
+            self.pending = []
+            return
+        if self.END.match(line):
+            self.end()
+            self.running = None
+            self.pending = []
+            return
+        if self.current is not None:
+            self._add(self.current, line)
+        elif self.running and len(self.pending) < MAX_MESSAGE_LINES:
+            self.pending.append(line)
+
+
+def extractor_for(command):
+    """
+    Picks a parser from the command string.
+    Returns: an Extractor, or None for unknown tools (=> head/tail fallback).
+    """
+    if not command:
+        return None
+    if "pytest" in command:
+        return PytestExtractor()
+    if "cargo test" in command:
+        return CargoExtractor()
+    if "go test" in command:
+        return GoExtractor()
+    if any(tool in command for tool in ("jest", "vitest", "npm test", "npm run test")):
+        return JestExtractor()
+    return None
+
+
+class Progress:
+    """
+    Base class for live pass/fail counters, fed the same lines as the Extractors
+    while the command is still running. `first_failure` names the first failing
+    test (or file) as soon as the runner prints it.
+    """
+    framework = "unknown"
+
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.first_failure = None
+
+    def fail(self, name, count=1):
+        self.failed += count
+        if self.first_failure is None:
+            self.first_failure = name
+
+    def feed_line(self, line):
+        raise NotImplementedError
+
+
+class PytestProgress(Progress):
+    """
+    Counts the progress characters (`tests/test_x.py ..F.s  [ 40%]`, or just `..F [ 40%]` with -q)
+    and the `-v` result lines (`tests/test_x.py::test_a PASSED  [ 10%]`).
+    """
+    framework = "pytest"
+
+    FILE_DOTS = re.compile(r"^(\S+\.py) ([.FEsxX]+)(?:\s+\[\s*\d+%\])?$")
+    QUIET_DOTS = re.compile(r"^([.FEsxX]+)\s+\[\s*\d+%\]$")
+    VERBOSE = re.compile(r"^(\S+::\S+) (PASSED|FAILED|ERROR|XPASS)\b")
+
+    def feed_line(self, line):
+        line = line.rstrip()
+        verbose = self.VERBOSE.match(line)
+        if verbose:
+            if verbose.group(2) in ("FAILED", "ERROR"):
+                self.fail(verbose.group(1))
+            else:
+                self.passed += 1
+            return
+        dots = self.FILE_DOTS.match(line)
+        name, marks = (dots.group(1), dots.group(2)) if dots else (None, None)
+        if not dots:
+            quiet = self.QUIET_DOTS.match(line)
+            if not quiet:
+                return
+            marks = quiet.group(1)
+        failed = marks.count("F") + marks.count("E")
+        if failed:
+            self.fail(name or f"test #{self.passed + self.failed + 1}", failed)
+        self.passed += marks.count(".")
+
+
+class JestProgress(Progress):
+    """
+    Counts test FILES: jest's `PASS` / `FAIL` lines and vitest's `✓ file (3 tests)` / `❯ file (3 tests | 1 failed)`.
+    """
+    framework = "jest"
+
+    SUITE = re.compile(r"^\s*(PASS|FAIL)\s+(\S+)\s*(?:\(.*\))?$")
+    VITEST = re.compile(r"^\s*(✓|❯)\s+(\S+) \(\d+ tests?(?: \| (\d+) failed)?")
+
+    def feed_line(self, line):
+        suite = self.SUITE.match(line)
+        if suite:
+            if suite.group(1) == "FAIL":
+                self.fail(suite.group(2))
+            else:
+                self.passed += 1
+            return
+        vitest = self.VITEST.match(line)
+        if vitest:
+            if vitest.group(3):
+                self.fail(vitest.group(2))
+            elif vitest.group(1) == "✓":
+                self.passed += 1
+
+
+class CargoProgress(Progress):
+    framework = "cargo test"
+
+    RESULT = re.compile(r"^test (\S+) \.\.\. (ok|FAILED)$")
+
+    def feed_line(self, line):
+        result = self.RESULT.match(line.rstrip())
+        if result:
+            if result.group(2) == "FAILED":
+                self.fail(result.group(1))
+            else:
+                self.passed += 1
+
+
+class GoProgress(Progress):
+    """
+    Counts top-level `--- PASS` / `--- FAIL` tests (subtests are part of their parent).
+    Without `-v` passing tests are silent, so each `ok <package>` line counts once instead.
+    """
+    framework = "go test"
+
+    RESULT = re.compile(r"^--- (PASS|FAIL): (\S+)")
+    PACKAGE_OK = re.compile(r"^ok\s+\S+")
+
+    def __init__(self):
+        super().__init__()
+        self.verbose = False
+
+    def feed_line(self, line):
+        if line.startswith("=== RUN"):
+            self.verbose = True
+            return
+        result = self.RESULT.match(line)
+        if result:
+            if result.group(1) == "FAIL":
+                self.fail(result.group(2))
+            else:
+                self.passed += 1
+        elif not self.verbose and self.PACKAGE_OK.match(line):
+            self.passed += 1
+
+
+def progress_for(command):
+    """
+    Picks a live counter from the command string (same detection as `extractor_for`).
+    Returns: a Progress, or None for unknown tools.
+    """
+    extractor = extractor_for(command)
+    if extractor is None:
+        return None
+    return {
+        "pytest": PytestProgress,
+        "jest": JestProgress,
+        "cargo test": CargoProgress,
+        "go test": GoProgress,
+    }[extractor.framework]()
@@ -0,0 +1,250 @@
+import re
+
+from .capture import MAX_LINE_CHARS
+
+# --- Constants ---
+
+# None unless lofi.toml opts in: the Agent sees the tool's own output by default.
+DEFAULT_FILTERS = []
+
+# CSI sequences (colors, cursor moves) and OSC sequences (titles, hyperlinks).
+ANSI_PATTERN = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[@-Z\\-_]")
+
+# Stack frames that belong to a framework, a dependency or the language runtime, never to the project.
+FRAME_PATTERNS = [
+    # Python: `  File "/.../site-packages/pluggy/_hooks.py", line 493, in __call__`
+    re.compile(r'^\s*File ".*[\\/](?:site|dist)-packages[\\/]'),
+    # Node: `    at Object.<anonymous> (node_modules/jest-circus/build/utils.js:298:28)`
+    re.compile(r"^\s*at .*(?:node_modules[\\/]|node:internal|\(internal[\\/])"),
+    # Rust: `  12: std::rt::lang_start_internal` / `             at /rustc/<hash>/library/std/src/rt.rs:148:48`
+    re.compile(r"^\s*\d+: +(?:std|core|alloc|test|__rust|rust_begin_unwind)\b"),
+    re.compile(r"^\s*at /rustc/|[\\/]library[\\/](?:std|core|alloc)[\\/]src[\\/]"),
+]
+FRAME_PATTERN = re.compile("|".join(f"(?:{p.pattern})" for p in FRAME_PATTERNS))
+
+# Every frame above contains one of these; a chunk without any is skipped at substring-search speed.
+FRAME_HINTS = ("-packages", "node_modules", "internal", "rustc", "library", "std::", "core::", "alloc::", "test::", "rust_", "__rust")
+
+# A Python frame is two lines: `File ...` and the (deeper-indented) source line, plus 3.11+ carets.
+PYTHON_FRAME = re.compile(r'^\s*File "')
+
+# Runs shorter than this are left alone (the marker would cost as much as the frames).
+MIN_FOLD_LINES = 3
+
+
+class OutputFilter:
+    """
+    A streaming filter over complete lines (without their "\\n").
+
+    `process(lines)` is called once per chunk with the lines completed by it and
+    returns the lines to keep. `flush()` returns whatever is still held at the end.
+    Filters may keep state between chunks, but only a bounded amount.
+    """
+    name = None
+
+    def process(self, lines):
+        return lines
+
+    def flush(self):
+        return []
+
+
+class AnsiFilter(OutputFilter):
+    """Strips colors, cursor movement and terminal titles."""
+    name = "ansi"
+
+    def process(self, lines):
+        block = "\n".join(lines)
+        if "\x1b" not in block:
+            return lines
+        return ANSI_PATTERN.sub("", block).split("\n")
+
+
+class CarriageReturnFilter(OutputFilter):
+    """
+    Keeps only the final state of a line redrawn with "\\r" (progress bars, spinners).
+    The chain also compacts a partial line while it's being redrawn, so memory stays bounded.
+    """
+    name = "carriage_return"
+
+    def process(self, lines):
+        return [collapse_redraws(line) if "\r" in line else line for line in lines]
+
+
+def collapse_redraws(line):
+    line = line.rstrip("\r")
+    return line[line.rfind("\r") + 1:]
+
+
+class RepeatFilter(OutputFilter):
+    """Run-length encodes identical consecutive lines."""
+    name = "repeats"
+
+    def __init__(self):
+        self._last = None
+        self._count = 0
+
+    def _close_run(self):
+        line, count = self._last, self._count
+        self._count = 0
+        if not count:
+            return []
+        marker = f"... [previous line repeated {count} more times]"
+        # Short lines (blank ones, "."): the marker would be longer than the repeats.
+        if count * (len(line) + 1) <= len(marker) + 1:
+            return [line] * count
+        return [marker]
+
+    def process(self, lines):
+        kept = []
+        for line in lines:
+            if line == self._last:
+                self._count += 1
+                continue
+            kept.extend(self._close_run())
+            kept.append(line)
+            self._last = line
+        return kept
+
+    def flush(self):
+        return self._close_run()
+
+
+class FrameFilter(OutputFilter):
+    """Folds runs of framework / dependency / std-library stack frames into one line."""
+    name = "frames"
+
+    def __init__(self):
+        self._pending = []
+        self._folded = 0
+        self._in_python_frame = False
+
+    def _is_frame(self, line):
+        if self._in_python_frame and line[:1].isspace() and not PYTHON_FRAME.match(line):
+            # The source line (or the ^^^^ markers) of a folded Python frame.
+            return True
+        self._in_python_frame = False
+        if FRAME_PATTERN.match(line) or ("library" in line and FRAME_PATTERN.search(line)):
+            self._in_python_frame = bool(PYTHON_FRAME.match(line))
+            return True
+        return False
+
+    def _close_run(self):
+        pending, folded = self._pending, self._folded
+        self._pending, self._folded = [], 0
+        if folded < MIN_FOLD_LINES:
+            return pending
+        indent = pending[0][:len(pending[0]) - len(pending[0].lstrip())]
+        return [f"{indent}... [{folded} framework/library frame lines folded]"]
+
+    def process(self, lines):
+        block = "\n".join(lines)
+        if not self._folded and not self._in_python_frame and not any(hint in block for hint in FRAME_HINTS):
+            # No frame anywhere in this chunk (the common case).
+            return lines
+        kept = []
+        for line in lines:
+            if self._is_frame(line):
+                self._folded += 1
+                if len(self._pending) < MIN_FOLD_LINES:
+                    self._pending.append(line)
+                continue
+            if self._folded:
+                kept.extend(self._close_run())
+            kept.append(line)
+        return kept
+
+    def flush(self):
+        return self._close_run()
+
+
+# Filters available to `output_filters`. Register your own with `register_filter`.
+FILTERS = {cls.name: cls for cls in (AnsiFilter, CarriageReturnFilter, RepeatFilter, FrameFilter)}
+
+
+def register_filter(cls):
+    """
+    Makes an OutputFilter subclass available by its `name` in lofi.toml.
+    """
+    FILTERS[cls.name] = cls
+    return cls
+
+
+def _size(lines):
+    return sum(map(len, lines)) + len(lines)
+
+
+class FilterChain:
+    """
+    Runs a command's decoded text through a list of filters in a single pass.
+
+    Text is cut into lines (a partial line longer than MAX_LINE_CHARS is passed through as is),
+    each chunk's lines go through every filter in order, and the chars each filter removed are
+    tallied so the Ledger can show what every filter saved.
+    """
+    def __init__(self, filters):
+        self.filters = list(filters)
+        self.removed = {f.name: 0 for f in self.filters}
+        self._partial = ""
+        self._redraws = "carriage_return" in self.removed
+
+    @property
+    def handles_carriage_returns(self):
+        """True when "\\r" must reach the chain (instead of being decoded as a newline)."""
+        return self._redraws
+
+    def _run(self, lines, final=False):
+        for f in self.filters:
+            before = _size(lines)
+            lines = f.process(lines)
+            if final:
+                lines = lines + f.flush()
+            self.removed[f.name] += before - _size(lines)
+        return lines
+
+    def feed(self, text):
+        """
+        Returns: the filtered text for every line completed by `text`.
+        """
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        if self._redraws and "\r" in self._partial[:-1]:
+            # A progress bar that never prints "\n": only its latest frame matters.
+            cut = self._partial.rfind("\r", 0, len(self._partial) - 1) + 1
+            self.removed["carriage_return"] += cut
+            self._partial = self._partial[cut:]
+        overflow = ""
+        if len(self._partial) > MAX_LINE_CHARS:
+            # A huge line without "\n" (minified JS, a blob): pass it through untouched.
+            overflow, self._partial = self._partial, ""
+        lines = self._run(lines) if lines else lines
+        return ("\n".join(lines) + "\n" if lines else "") + overflow
+
+    def flush(self):
+        """
+        Returns: the filtered remainder (the last, unterminated line and anything filters held back).
+        """
+        partial, self._partial = self._partial, ""
+        lines = self._run([partial] if partial else [], final=True)
+        if not lines:
+            return ""
+        return "\n".join(lines) + ("" if partial else "\n")
+
+    def savings(self):
+        """
+        Returns: {filter name: estimated tokens saved} for filters that removed anything.
+        """
+        return {name: chars // 4 for name, chars in self.removed.items() if chars // 4 > 0}
+
+
+def build_chain(names):
+    """
+    Builds a chain from filter names (unknown names are skipped; see `unknown_filters`).
+    Returns: a FilterChain, or None when no filter is enabled.
+    """
+    filters = [FILTERS[name]() for name in names or [] if name in FILTERS]
+    return FilterChain(filters) if filters else None
+
+
+def unknown_filters(names):
+    return [name for name in names or [] if name not in FILTERS]
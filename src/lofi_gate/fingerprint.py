@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import re
+
+from .extract import Extraction
+
+# --- Constants ---
+
+# The failure fingerprints of the last run of each check (for `failure_diff`).
+FINGERPRINTS_PATH = os.path.join(".lofi-gate", "fingerprints.json")
+
+# Hex digits kept of each fingerprint: 64 bits, plenty for at most MAX_FAILURES per check.
+FINGERPRINT_CHARS = 16
+
+# Run-specific noise that would make the SAME failure look new on every run.
+VOLATILE = [
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "0x?"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<time>"),
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<time>"),
+    (re.compile(r"(?:/private)?/(?:tmp|var/tmp|var/folders)/\S*|[A-Za-z]:\\\S*\\Temp\\\S*"), "<tmp>"),
+    (re.compile(r"\btmp[a-z0-9_]{6,}\b"), "<tmp>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\s?(?:ms|s)\b"), "<dur>"),
+    # Line numbers move with every edit above the failing line.
+    (re.compile(r"(\.\w+):\d+(?::\d+)?"), r"\1:<n>"),
+    (re.compile(r"^(\s*>?\s*)\d+ \|"), r"\1<n> |"),
+]
+
+
+def normalize(text):
+    for pattern, replacement in VOLATILE:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def fingerprint(failure):
+    """
+    Identity of a failure across runs: its test ID and assertion message, minus addresses,
+    timestamps, temp paths, durations and line numbers. Frames are left out on purpose.
+    Returns: a short hex digest.
+    """
+    digest = hashlib.sha1(normalize(failure.name).encode("utf-8"))
+    for line in failure.message:
+        digest.update(b"\n" + normalize(line).encode("utf-8"))
+    return digest.hexdigest()[:FINGERPRINT_CHARS]
+
+
+class FailureDiff:
+    """
+    A check's failures compared with its previous run.
+    `new`: Failure objects not seen last time (or failing differently now).
+    `still`: names of failures identical to last time.
+    `fixed`: names that failed last time and no longer do (None when that can't be told).
+    """
+    def __init__(self, new=None, still=None, fixed=None, framework="?", dropped=0):
+        self.new = new or []
+        self.still = still or []
+        self.fixed = fixed
+        self.framework = framework
+        self.dropped = dropped
+
+    def summary(self):
+        parts = [f"{len(self.new)} new", f"{len(self.still)} still failing"]
+        if self.fixed:
+            parts.append(f"{len(self.fixed)} fixed")
+        return ", ".join(parts)
+
+    def fixed_line(self):
+        return f"🩹 Fixed since last run ({len(self.fixed)}): {', '.join(self.fixed)}" if self.fixed else ""
+
+    def render(self, max_chars):
+        """
+        New failures in full (as in `Extraction.render`), then the rest by name only.
+        """
+        tail = []
+        if self.still:
+            tail.append(f"🔁 Still failing ({len(self.still)}, details shown in an earlier run): {', '.join(self.still)}")
+        if self.fixed:
+            tail.append(self.fixed_line())
+        tail = "\n".join(line[:max_chars // 3] for line in tail)
+        if not self.new and not self.dropped:
+            return tail
+        extraction = Extraction(self.framework, self.new, self.dropped)
+        header = f"🆕 {len(self.new) + self.dropped} new failing test(s) ({self.framework}):"
+        return extraction.render(max(max_chars - len(tail) - 1, 200), header) + "\n" + tail
+
+
+class FailureFingerprints:
+    """
+    The fingerprints of each check's failures in its last run, kept in `.lofi-gate/`:
+    {label: {"command": cmd, "failures": {fingerprint: name}}}.
+    """
+    def __init__(self, path=FINGERPRINTS_PATH):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def diff(self, label, command, extraction=None):
+        """
+        Compares this run's failures (None: the check passed) with the last run's and
+        remembers this run's. Linear in the number of failures.
+        Returns: a FailureDiff
+        """
+        previous = self.data.get(label, {})
+        seen = previous.get("failures", {})
+        current = {}
+        new, still = [], []
+        for failure in (extraction.failures if extraction else []):
+            key = fingerprint(failure)
+            current[key] = failure.name
+            if key in seen:
+                still.append(failure.name)
+            else:
+                new.append(failure)
+
+        fixed = [] if not seen else None
+        # A different command (e.g. impact-narrowed) or a capped parse didn't run / see every test.
+        if seen and previous.get("command") == command and not (extraction and extraction.dropped):
+            names = {normalize(name) for name in current.values()}
+            fixed = sorted(name for name in seen.values() if normalize(name) not in names)
+
+        if current:
+            self.data[label] = {"command": command, "failures": current}
+            self.save()
+        elif self.data.pop(label, None) is not None:
+            self.save()
+        if extraction:
+            return FailureDiff(new, still, fixed, extraction.framework, extraction.dropped)
+        return FailureDiff(fixed=fixed)
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, separators=(",", ":"), sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,157 @@
+import datetime
+import math
+import os
+import re
+import sqlite3
+import time
+
+# --- Constants ---
+
+# The structured twin of verification_history.md: every check ever logged, never rotated.
+HISTORY_PATH = os.path.join(".lofi-gate", "history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    label TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    tokens_used INTEGER NOT NULL DEFAULT 0,
+    tokens_saved INTEGER NOT NULL DEFAULT 0,
+    command TEXT NOT NULL DEFAULT '',
+    replay TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS checks_ts ON checks(ts);
+CREATE INDEX IF NOT EXISTS checks_label_ts ON checks(label, ts);
+CREATE INDEX IF NOT EXISTS checks_status_ts ON checks(status, ts);
+CREATE INDEX IF NOT EXISTS checks_label_duration ON checks(label, duration);
+"""
+
+# `replay`: '' for a real run; "cached" / "stale: ..." when the gate replayed a stored result (see cache.py).
+COLUMNS = ("ts", "label", "status", "duration", "tokens_used", "tokens_saved", "command", "replay")
+
+# Statuses that are not a failure of the check itself
+# (FLAKY = passed on a retry, CANCELLED = stopped by fail-fast).
+NOT_FAILED = ("PASS", "APPROVED", "SUCCESS", "FLAKY", "CANCELLED")
+
+# `--since 7d` / `24h` / `30m` / `90s` / `2w`.
+SINCE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+# Wait this long (seconds) for another writer's transaction instead of failing.
+BUSY_TIMEOUT = 10
+
+
+def history_path(project_root=None):
+    return os.path.join(project_root or os.getcwd(), HISTORY_PATH)
+
+
+def connect(path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    # WAL: readers (`lofi-gate history`) never block the gate's writes, and vice versa.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    if "replay" not in {row[1] for row in conn.execute("PRAGMA table_info(checks)")}:
+        # A history.db from before replays were told apart.
+        conn.execute("ALTER TABLE checks ADD COLUMN replay TEXT NOT NULL DEFAULT ''")
+    return conn
+
+
+def record(rows, path=HISTORY_PATH):
+    """
+    Appends rows (tuples in COLUMNS order) in ONE transaction.
+    """
+    if not rows:
+        return
+    conn = connect(path)
+    try:
+        with conn:
+            conn.executemany(f"INSERT INTO checks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})", rows)
+    finally:
+        conn.close()
+
+
+def parse_since(text, now=None):
+    """
+    `7d`, `24h`, `30m`, ... or an ISO date (`2024-05-01`, `2024-05-01T12:00`).
+    Returns: a Unix timestamp.
+    Raises: ValueError for anything else.
+    """
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", text.strip())
+    if match:
+        return (time.time() if now is None else now) - float(match.group(1)) * SINCE_UNITS[match.group(2)]
+    return datetime.datetime.fromisoformat(text.strip()).timestamp()
+
+
+def _where(label=None, status=None, since=None, runs_only=False):
+    clauses, params = [], []
+    if runs_only:
+        clauses.append("replay = ''")
+    if label:
+        clauses.append("label = ?")
+        params.append(label)
+    if status:
+        clauses.append("status = ?")
+        params.append(status.upper())
+    if since is not None:
+        clauses.append("ts >= ?")
+        params.append(since)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def recent(conn, label=None, status=None, since=None, limit=20):
+    """
+    Yields the newest matching rows as dicts (streamed from the cursor).
+    """
+    where, params = _where(label, status, since)
+    cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM checks{where} ORDER BY ts DESC LIMIT ?", params + [limit])
+    for row in cursor:
+        yield dict(zip(COLUMNS, row))
+
+
+def percentile(conn, label, q, count, status=None, since=None):
+    """
+    Nearest-rank percentile of one label's durations, read straight off the (label, duration) index.
+    Replays are left out: their duration is the original run's, not time the gate spent.
+    """
+    if not count:
+        return None
+    where, params = _where(label, status, since, runs_only=True)
+    offset = max(math.ceil(q * count) - 1, 0)
+    row = conn.execute(f"SELECT duration FROM checks{where} ORDER BY duration LIMIT 1 OFFSET ?", params + [offset]).fetchone()
+    return row[0] if row else None
+
+
+def summarize(conn, label=None, status=None, since=None):
+    """
+    Aggregates per label, computed by SQLite (nothing is loaded into memory but the results).
+    `runs`, the failure rate and the durations count real runs only; tokens count replays too.
+    Returns: [{label, runs, replays, failures, fail_rate, p50, p95, avg, tokens_used, tokens_saved, last}]
+    """
+    where, params = _where(label, status, since)
+    placeholders = ", ".join("?" for _ in NOT_FAILED)
+    rows = conn.execute(
+        f"SELECT label, SUM(replay = ''), SUM(replay != ''), "
+        f"SUM(CASE WHEN replay = '' AND status NOT IN ({placeholders}) THEN 1 ELSE 0 END), "
+        f"AVG(CASE WHEN replay = '' THEN duration END), SUM(tokens_used), SUM(tokens_saved), MAX(ts) "
+        f"FROM checks{where} GROUP BY label ORDER BY label",
+        list(NOT_FAILED) + params,
+    ).fetchall()
+    summary = []
+    for name, runs, replays, failures, avg, used, saved, last in rows:
+        summary.append({
+            "label": name,
+            "runs": runs,
+            "replays": replays,
+            "failures": failures,
+            "fail_rate": failures / runs if runs else 0.0,
+            "p50": percentile(conn, name, 0.50, runs, status, since),
+            "p95": percentile(conn, name, 0.95, runs, status, since),
+            "avg": avg,
+            "tokens_used": used,
+            "tokens_saved": saved,
+            "last": last,
+        })
+    return summary
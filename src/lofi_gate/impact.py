@@ -0,0 +1,314 @@
+import ast
+import collections
+import glob
+import json
+import os
+import re
+import shlex
+import subprocess
+
+from .logger import LOG_FILENAME
+
+# --- Constants ---
+
+# Directories that never contain first-party code.
+SKIP_DIRS = {".git", ".lofi-gate", "node_modules", "target", "vendor", "venv", ".venv",
+             "__pycache__", ".tox", ".nox", "build", "dist", ".mypy_cache", ".pytest_cache",
+             "coverage", "htmlcov"}
+
+# Changes to these never affect test outcomes.
+DOC_EXTENSIONS = (".md", ".rst", ".txt")
+
+# Touching any of these can change the behaviour of EVERY test => full suite.
+GLOBAL_FILES = {
+    "python": {"conftest.py", "pyproject.toml", "setup.py", "setup.cfg", "pytest.ini", "tox.ini", "requirements.txt"},
+    "go": {"go.mod", "go.sum"},
+    "cargo": {"Cargo.toml", "Cargo.lock"},
+    "jest": {"package.json", "package-lock.json", "yarn.lock", "pnpm-lock.yaml"},
+}
+
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+
+
+def changed_paths():
+    """
+    Lists files touched by the current change, relative to CWD:
+    staged + unstaged (vs HEAD) + untracked.
+    Returns: list of paths, or None when git can't tell us.
+    """
+    try:
+        diff = subprocess.run(
+            ["git", "diff", "--name-only", "--relative", "HEAD"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        if diff.returncode != 0:
+            return None
+        untracked = subprocess.run(
+            ["git", "ls-files", "--others", "--exclude-standard"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        paths = diff.stdout.splitlines() + untracked.stdout.splitlines()
+    except Exception:
+        return None
+
+    # The gate's own artifacts are not part of the change.
+    return sorted({p for p in paths if p and p != LOG_FILENAME and not p.startswith(".lofi-gate/")})
+
+
+def _walk(extensions):
+    for root, dirs, files in os.walk("."):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+        for name in files:
+            if name.endswith(extensions):
+                yield os.path.normpath(os.path.join(root, name))
+
+
+def _reverse_closure(graph, seeds):
+    """
+    BFS over a reverse-dependency graph ({node: set(dependents)}).
+    Returns: every node reachable from `seeds` (seeds included).
+    """
+    seen = set(seeds)
+    queue = collections.deque(seeds)
+    while queue:
+        node = queue.popleft()
+        for dependent in graph.get(node, ()):
+            if dependent not in seen:
+                seen.add(dependent)
+                queue.append(dependent)
+    return seen
+
+
+def _split_changes(changed, ecosystem, extensions):
+    """
+    Separates the changes we can map from the ones we can't.
+    Returns: (mappable source paths, has_unknown_changes)
+    """
+    sources = []
+    unknown = False
+    for path in changed:
+        name = os.path.basename(path)
+        if name in GLOBAL_FILES[ecosystem]:
+            unknown = True
+        elif path.endswith(extensions):
+            sources.append(os.path.normpath(path))
+        elif not path.endswith(DOC_EXTENSIONS):
+            unknown = True
+    return sources, unknown
+
+
+# --- Python (pytest) ---
+
+def _python_module_names(path):
+    """
+    All dotted names a file can be imported as: `src/pkg/mod.py` => `src.pkg.mod`, `pkg.mod`.
+    """
+    parts = path[:-3].split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    names = set()
+    for start in range(len(parts)):
+        if parts[start:]:
+            names.add(".".join(parts[start:]))
+    return names
+
+
+def _python_imports(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return set()
+
+    package = path[:-3].split(os.sep)[:-1]
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                anchor = package[:len(package) - node.level + 1] if node.level > 1 else package
+                base = ".".join(anchor + ([base] if base else []))
+            if base:
+                imports.add(base)
+                for alias in node.names:
+                    imports.add(f"{base}.{alias.name}")
+    return imports
+
+
+def _is_python_test(path):
+    name = os.path.basename(path)
+    return name.startswith("test_") or name.endswith("_test.py")
+
+
+def select_pytest(changed):
+    sources, unknown = _split_changes(changed, "python", (".py",))
+    if unknown or not sources:
+        return None
+
+    files = list(_walk((".py",)))
+    # A deleted (or renamed-away) module still has importers, which now fail: they must run.
+    deleted = [path for path in sources if not os.path.exists(path)]
+    by_name = {}
+    for path in files + deleted:
+        for name in _python_module_names(path):
+            by_name.setdefault(name, set()).add(path)
+
+    dependents = {}
+    for path in files:
+        for imported in _python_imports(path):
+            for target in by_name.get(imported, ()):
+                dependents.setdefault(target, set()).add(path)
+
+    affected = _reverse_closure(dependents, sources)
+    return sorted(p for p in affected if _is_python_test(p) and os.path.exists(p))
+
+
+# --- Go ---
+
+GO_IMPORT_BLOCK = re.compile(r'^import\s*\((.*?)\)', re.S | re.M)
+GO_IMPORT_LINE = re.compile(r'^import\s+(?:[\w.]+\s+)?"([^"]+)"', re.M)
+GO_QUOTED = re.compile(r'"([^"]+)"')
+
+
+def _go_module_path():
+    try:
+        with open("go.mod", "r") as f:
+            for line in f:
+                if line.startswith("module "):
+                    return line.split()[1].strip()
+    except OSError:
+        pass
+    return None
+
+
+def select_go(changed):
+    module = _go_module_path()
+    sources, unknown = _split_changes(changed, "go", (".go",))
+    if not module or unknown or not sources:
+        return None
+
+    dependents = {}
+    packages = set()
+    for path in _walk((".go",)):
+        pkg = os.path.dirname(path) or "."
+        packages.add(pkg)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            continue
+        imports = set(GO_IMPORT_LINE.findall(text))
+        for block in GO_IMPORT_BLOCK.findall(text):
+            imports.update(GO_QUOTED.findall(block))
+        for imported in imports:
+            if imported == module or imported.startswith(module + "/"):
+                target = os.path.normpath(imported[len(module):].lstrip("/") or ".")
+                dependents.setdefault(target, set()).add(pkg)
+
+    seeds = {os.path.dirname(p) or "." for p in sources}
+    affected = _reverse_closure(dependents, seeds) & packages
+    return sorted(affected)
+
+
+# --- Cargo ---
+
+def _cargo_members():
+    """
+    Reads the workspace members and their path dependencies.
+    Returns: {member_dir: (crate_name, set(dependency_dirs))} or None for a single crate.
+    """
+    import toml
+    try:
+        root = toml.load("Cargo.toml")
+    except Exception:
+        return None
+    patterns = root.get("workspace", {}).get("members", [])
+    if not patterns:
+        return None
+
+    members = {}
+    for pattern in patterns:
+        for member_dir in glob.glob(pattern):
+            manifest = os.path.join(member_dir, "Cargo.toml")
+            try:
+                crate = toml.load(manifest)
+            except Exception:
+                continue
+            deps = set()
+            for section in ("dependencies", "dev-dependencies", "build-dependencies"):
+                for spec in crate.get(section, {}).values():
+                    if isinstance(spec, dict) and "path" in spec:
+                        deps.add(os.path.normpath(os.path.join(member_dir, spec["path"])))
+            name = crate.get("package", {}).get("name", os.path.basename(member_dir))
+            members[os.path.normpath(member_dir)] = (name, deps)
+    return members
+
+
+def select_cargo(changed):
+    members = _cargo_members()
+    sources, unknown = _split_changes(changed, "cargo", (".rs",))
+    if not members or unknown or not sources:
+        return None
+
+    seeds = set()
+    for path in sources:
+        # The deepest member directory that contains the file owns it.
+        owners = [m for m in members if path == m or path.startswith(m + os.sep)]
+        if not owners:
+            return None
+        seeds.add(max(owners, key=len))
+
+    dependents = {}
+    for member_dir, (_, deps) in members.items():
+        for dep in deps:
+            dependents.setdefault(dep, set()).add(member_dir)
+
+    affected = _reverse_closure(dependents, seeds)
+    return sorted(members[m][0] for m in affected if m in members)
+
+
+# --- Jest ---
+
+def select_jest(changed):
+    sources, unknown = _split_changes(changed, "jest", JS_EXTENSIONS)
+    if unknown or not sources:
+        return None
+    if any(os.path.basename(p).startswith(("jest.config", "babel.config", "tsconfig")) for p in sources):
+        return None
+    return sources
+
+
+def select_test_command(test_cmd, scripts=None, changed=None):
+    """
+    Narrows the detected test command to the tests affected by the current change.
+    Returns: the narrowed command, or None to run the full suite
+    (unknown runner, unmappable change, or nothing to map).
+    """
+    if changed is None:
+        changed = changed_paths()
+    if not changed:
+        return None
+    scripts = scripts or {}
+
+    if test_cmd in ("python -m pytest", "pytest"):
+        tests = select_pytest(changed)
+        if tests:
+            return f"{test_cmd} " + " ".join(shlex.quote(t) for t in tests)
+    elif test_cmd == "go test ./...":
+        packages = select_go(changed)
+        if packages:
+            return "go test " + " ".join(shlex.quote("./" + p if p != "." else ".") for p in packages)
+    elif test_cmd == "cargo test":
+        crates = select_cargo(changed)
+        if crates:
+            return "cargo test " + " ".join(f"-p {shlex.quote(c)}" for c in crates)
+    elif test_cmd in ("npm test", "npm run test:agent"):
+        script = scripts.get("test:agent" if test_cmd.endswith("test:agent") else "test", "")
+        if "jest" in script:
+            files = select_jest(changed)
+            if files:
+                return f"{test_cmd} -- --findRelatedTests " + " ".join(shlex.quote(f) for f in files)
+    return None
@@ -0,0 +1,345 @@
+import atexit
+import contextlib
+import os
+import re
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+from . import trace
+
+# --- Constants ---
+
+# Max lines to keep in the log file to prevent infinite growth.
+MAX_LOG_LINES = 200
+
+# We only rotate once the log has grown PAST this many lines.
+# Rotating in bulk (instead of trimming on every write) keeps most commits a plain append.
+ROTATE_AT_LINES = MAX_LOG_LINES * 2
+
+# Rotated entries are moved (not deleted) into numbered archive segments.
+ARCHIVE_DIR = os.path.join(".lofi-gate", "ledger")
+MAX_ARCHIVE_SEGMENTS = 20
+
+# Every writer (any thread, any process: the gate, the checkpoint skill) takes this
+# advisory lock, next to the log, from reading the footer to writing the new one.
+LOCK_FILE = os.path.join(".lofi-gate", "ledger.lock")
+
+# The "Sticky Footer" is a FIXED-SIZE trailer: numbers are padded to a constant width,
+# so a commit reads the totals from the last FOOTER_BYTES, writes its entries over the
+# old footer and re-emits it, without reading the body.
+# The hidden comment records the body's line count (for the rotation threshold).
+FOOTER_TEMPLATE = (
+    "\n> 📊 **Total Token Size:** {size:>12} | 💰 **Total Token Savings:** {savings:>12}\n"
+    "<!-- ledger-lines: {lines:>10} -->\n"
+)
+FOOTER_BYTES = len(FOOTER_TEMPLATE.format(size=0, savings=0, lines=0).encode("utf-8"))
+FOOTER_PATTERN = re.compile(
+    r"\n> 📊 \*\*Total Token Size:\*\* +(\d+) \| 💰 \*\*Total Token Savings:\*\* +(\d+)\n"
+    r"<!-- ledger-lines: +(\d+) -->\n$"
+)
+LINES_MARKER = "<!-- ledger-lines:"
+
+# Entries queued while a commit is running are committed together, up to this many at once.
+MAX_GROUP_COMMIT = 512
+
+# An idle writer thread lingers this long (seconds) before exiting, so a burst of
+# writes doesn't pay for a new thread each time.
+WRITER_IDLE_SECONDS = 1.0
+
+
+def parse_footer(lines):
+    """
+    Parses the "Sticky Footer" from the log file to preserve stats.
+    Used to migrate logs written before the fixed-size trailer existed.
+    """
+    size = 0
+    savings = 0
+    clean_lines = []
+    footer_marker_size = "**Total Token Size:**"
+
+    for line in lines:
+        if footer_marker_size in line:
+            try:
+                content = line.strip().replace("> ", "")
+                parts = content.split("|")
+                p0 = parts[0].split(":")[-1].strip().replace("*", "")
+                size = int(p0)
+                if len(parts) > 1:
+                    p1 = parts[1].split(":")[-1].strip().replace("*", "")
+                    savings = int(p1)
+            except:
+                pass
+        elif line.startswith(LINES_MARKER):
+            continue
+        else:
+            clean_lines.append(line)
+
+    return clean_lines, size, savings
+
+
+def format_footer(size, savings, line_count):
+    return FOOTER_TEMPLATE.format(size=size, savings=savings, lines=line_count)
+
+
+def read_log(log_path):
+    """
+    Reads the log as (body_lines, size, savings). A missing file is an empty log;
+    a log written by older versions (free-form footer) is migrated on the fly.
+    """
+    try:
+        with open(log_path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0, 0
+    match = FOOTER_PATTERN.search(data[-FOOTER_BYTES:].decode("utf-8", errors="replace")) if len(data) >= FOOTER_BYTES else None
+    if match:
+        body = data[:len(data) - FOOTER_BYTES].decode("utf-8", errors="replace")
+        return body.splitlines(keepends=True), int(match.group(1)), int(match.group(2))
+    lines, size, savings = parse_footer(data.decode("utf-8", errors="replace").splitlines(keepends=True))
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return lines, size, savings
+
+
+def _read_trailer(f):
+    """
+    Reads the fixed-size trailer from the end of an open (binary) log file.
+    Returns: (body_end_offset, size, savings, line_count) or None if there is no valid trailer.
+    """
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    if end < FOOTER_BYTES:
+        return None
+    f.seek(end - FOOTER_BYTES)
+    match = FOOTER_PATTERN.search(f.read().decode("utf-8", errors="replace"))
+    if not match:
+        return None
+    return end - FOOTER_BYTES, int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+
+def _archive_path(log_path, project_root=None):
+    """
+    Picks the next archive segment for rotated entries and prunes the oldest ones.
+    """
+    root = project_root or os.path.dirname(log_path)
+    archive_dir = os.path.join(root, ARCHIVE_DIR)
+    os.makedirs(archive_dir, exist_ok=True)
+    segments = sorted(f for f in os.listdir(archive_dir) if f.startswith("verification_history.") and f.endswith(".md"))
+    for stale in segments[:max(0, len(segments) - MAX_ARCHIVE_SEGMENTS + 1)]:
+        try:
+            os.remove(os.path.join(archive_dir, stale))
+        except OSError:
+            pass
+    next_id = 1
+    if segments:
+        try:
+            next_id = int(segments[-1].split(".")[1]) + 1
+        except (IndexError, ValueError):
+            next_id = len(segments) + 1
+    return os.path.join(archive_dir, f"verification_history.{next_id:04d}.md")
+
+
+def rotate(lines, log_path, project_root=None):
+    """
+    Moves everything but the last MAX_LOG_LINES lines into a new archive segment.
+    Returns: the lines to keep (headed by a truncation notice).
+    """
+    # Cut on an entry boundary so no entry is split between the archive and the live log.
+    cut = len(lines) - MAX_LOG_LINES
+    while cut < len(lines) and not lines[cut].startswith("- **["):
+        cut += 1
+    archived, kept = lines[:cut], lines[cut:]
+
+    with trace.span("ledger.rotate", "ledger"):
+        with open(_archive_path(log_path, project_root), "w", encoding="utf-8") as f:
+            f.writelines(line for line in archived if not line.startswith("... (History truncated"))
+
+    notice = f"\n... (History truncated to last {MAX_LOG_LINES} lines; older entries in {ARCHIVE_DIR}) ...\n"
+    return [notice] + kept
+
+
+def _write_atomic(path, text, tmp_dir):
+    # Staged in the gate's state dir (ignored by `watch`, git and the cache key),
+    # unique per writer so a crashed writer's leftover never collides with a live one.
+    tmp_path = os.path.join(tmp_dir, f"ledger.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        # newline="": byte offsets must match what `_read_trailer` expects on every OS.
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Exclusive advisory lock on `path` (flock on POSIX, msvcrt elsewhere).
+    Held across processes; released when the block exits (or the holder dies).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def lock_path_for(log_path, project_root=None):
+    return os.path.join(project_root or os.path.dirname(os.path.abspath(log_path)), LOCK_FILE)
+
+
+def commit(log_path, entries, tokens_used=0, tokens_saved=0, project_root=None):
+    """
+    Appends pre-rendered entries and bumps the running totals as ONE transaction
+    under the cross-process lock, so concurrent writers never lose each other's entries.
+    Cost is O(entries): seek over the fixed-size trailer, write, re-emit it.
+    Only rotation (and the one-time migration of an old log) reads the whole log,
+    and swaps the new version in with an atomic rename.
+    """
+    text = "".join(entries)
+    if not text:
+        return
+    added_lines = text.count("\n")
+    lock_path = lock_path_for(log_path, project_root)
+    with trace.span("ledger.write", "ledger", entries=len(entries)), file_lock(lock_path):
+        with open(log_path, "r+b" if os.path.exists(log_path) else "w+b") as f:
+            trailer = _read_trailer(f)
+            if trailer is None and f.tell() == 0:
+                trailer = (0, 0, 0, 0)
+            if trailer is not None and trailer[3] + added_lines <= ROTATE_AT_LINES:
+                body_end, size, savings, line_count = trailer
+                f.seek(body_end)
+                f.write(text.encode("utf-8"))
+                f.write(format_footer(size + tokens_used, savings + tokens_saved, line_count + added_lines).encode("utf-8"))
+                f.truncate()
+                return
+
+        lines, size, savings = read_log(log_path)
+        lines.extend(text.splitlines(keepends=True))
+        if len(lines) > ROTATE_AT_LINES:
+            lines = rotate(lines, log_path, project_root)
+        size += tokens_used
+        savings += tokens_saved
+        line_count = sum(line.count("\n") for line in lines)
+        _write_atomic(log_path, "".join(lines) + format_footer(size, savings, line_count), os.path.dirname(lock_path))
+
+
+class WriteBehindQueue:
+    """
+    Queues entries and commits them from ONE background thread per log file.
+
+    Whatever piles up while a commit is running goes out in the next commit,
+    so dozens of concurrent writers cost a handful of lock + append cycles
+    instead of one each. `submit()` returns an Event that is set once the
+    entry is on disk; `flush()` waits for everything queued so far.
+
+    Structured rows (see history.py) ride along and are inserted in the same batch.
+    """
+    def __init__(self, log_path, project_root=None):
+        self.log_path = log_path
+        self.project_root = project_root
+        self._cond = threading.Condition()
+        self._pending = []
+        self._busy = False
+        self._thread = None
+
+    def submit(self, entry, tokens_used=0, tokens_saved=0, rows=()):
+        done = threading.Event()
+        with self._cond:
+            self._pending.append((entry, tokens_used, tokens_saved, rows, done))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._drain, name="ledger-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return done
+
+    def _drain(self):
+        while True:
+            with self._cond:
+                if not self._pending:
+                    self._cond.wait_for(lambda: self._pending, WRITER_IDLE_SECONDS)
+                if not self._pending:
+                    self._thread = None
+                    return
+                batch, self._pending = self._pending[:MAX_GROUP_COMMIT], self._pending[MAX_GROUP_COMMIT:]
+                self._busy = True
+            try:
+                commit(
+                    self.log_path,
+                    [item[0] for item in batch],
+                    sum(item[1] for item in batch),
+                    sum(item[2] for item in batch),
+                    self.project_root,
+                )
+            except Exception:
+                # The Ledger is best effort: a failed write must never fail a check.
+                pass
+            try:
+                rows = [row for item in batch for row in item[3]]
+                if rows:
+                    from .history import history_path, record
+                    record(rows, history_path(self.project_root or os.path.dirname(os.path.abspath(self.log_path))))
+            except Exception:
+                pass
+            finally:
+                for item in batch:
+                    item[4].set()
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def queue_for(log_path, project_root=None):
+    """
+    Returns: the process-wide write-behind queue for a log file.
+    """
+    key = os.path.abspath(log_path)
+    with _queues_lock:
+        queue = _queues.get(key)
+        if queue is None:
+            queue = _queues[key] = WriteBehindQueue(log_path, project_root)
+        return queue
+
+
+def flush_all(timeout=None):
+    with _queues_lock:
+        queues = list(_queues.values())
+    for queue in queues:
+        queue.flush(timeout)
+
+
+# Entries submitted without waiting still reach the disk before the interpreter exits.
+atexit.register(flush_all)
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+
+from .impact import DOC_EXTENSIONS, JS_EXTENSIONS, changed_paths, select_cargo, select_go
+from .logger import LOG_FILENAME
+
+# --- Constants ---
+
+# Files already linted clean, by content hash, under one linter config (see LintState).
+STATE_PATH = os.path.join(".lofi-gate", "lint_cache.json")
+
+# Changing any of these can change the result for EVERY file => full lint.
+CONFIG_FILES = {
+    "npm run lint": [
+        "package.json", ".eslintrc", ".eslintrc.js", ".eslintrc.cjs", ".eslintrc.json", ".eslintrc.yml",
+        ".eslintrc.yaml", "eslint.config.js", "eslint.config.mjs", "eslint.config.cjs", "eslint.config.ts",
+        ".eslintignore", "tsconfig.json",
+    ],
+    "cargo check": ["Cargo.toml", "Cargo.lock", "clippy.toml", ".clippy.toml", "rust-toolchain", "rust-toolchain.toml"],
+    "go vet ./...": ["go.mod", "go.sum"],
+}
+
+# eslint options that take a separate value (`-c .eslintrc.json`), so the value isn't mistaken for a lint target.
+ESLINT_VALUE_OPTIONS = {
+    "-c", "--config", "--ext", "-f", "--format", "-o", "--output-file", "--max-warnings", "--ignore-path",
+    "--ignore-pattern", "--rulesdir", "--parser", "--parser-options", "--plugin", "--rule", "--env", "--global",
+    "--cache-location", "--cache-strategy", "--resolve-plugins-relative-to",
+}
+
+
+def file_hash(path):
+    """
+    Returns: the SHA-256 of a file's content, or None if it doesn't exist (deleted).
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def config_hash(lint_cmd, scripts=None):
+    """
+    Fingerprint of everything that configures the linter: the command, the lint script and the config files.
+    """
+    digest = hashlib.sha256(lint_cmd.encode("utf-8"))
+    digest.update((scripts or {}).get("lint", "").encode("utf-8"))
+    for name in CONFIG_FILES.get(lint_cmd, []):
+        digest.update(f"\0{name}\0{file_hash(name)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def git_head():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except Exception:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def committed_since(base, head):
+    """
+    Files changed by commits made since the last clean lint (e.g. a pull or the agent's own commits).
+    Returns: a list of paths, or None when git can't tell (base gone, not a repo).
+    """
+    if base == head:
+        return []
+    try:
+        result = subprocess.run(
+            ["git", "diff", "--name-only", "--relative", base, head],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    # Same filtering as `changed_paths`: the gate's own artifacts are not part of the change.
+    return [p for p in result.stdout.splitlines() if p and p != LOG_FILENAME and not p.startswith(".lofi-gate/")]
+
+
+class LintState:
+    """
+    What the last clean lint established: the linter config it ran under, the commit it
+    started from, and the content hash of every file it found clean.
+    A file whose content hash is unchanged is never linted again under the same config.
+    """
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.config = data.get("config")
+        self.base = data.get("base")
+        self.files = data.get("files", {})
+
+    def is_clean(self, path):
+        return path in self.files and self.files[path] == file_hash(path)
+
+    def mark_clean(self, config, base, paths=None, reset=False):
+        if reset:
+            self.files = {}
+        self.config = config
+        self.base = base
+        for path in paths or []:
+            self.files[path] = file_hash(path)
+        # Forget files that no longer exist (their entry would never be hit again).
+        self.files = {p: h for p, h in self.files.items() if h is None or os.path.exists(p)}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"config": self.config, "base": self.base, "files": self.files}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def eslint_command(script, files):
+    """
+    Rewrites a plain `eslint ...` lint script to lint only `files`, keeping its options.
+    Returns: the command, or None for any other script (`next lint`, `tsc && eslint .`, ...).
+    """
+    try:
+        tokens = shlex.split(script)
+    except ValueError:
+        return None
+    if tokens[:1] == ["npx"]:
+        tokens = tokens[1:]
+    if tokens[:1] != ["eslint"] or any(t in ("&&", "||", ";", "|") for t in tokens):
+        return None
+    options = []
+    expects_value = False
+    for token in tokens[1:]:
+        if expects_value:
+            options.append(token)
+            expects_value = False
+        elif token.startswith("-"):
+            options.append(token)
+            expects_value = token in ESLINT_VALUE_OPTIONS
+        # Anything else is a lint target (`.`, `src/`): replaced by the changed files.
+    return "npx eslint " + " ".join([shlex.quote(o) for o in options] + [shlex.quote(f) for f in files])
+
+
+def plan_lint(lint_cmd, scripts=None, state=None, changed=None, head=None):
+    """
+    Decides how much linting the current change needs.
+    Returns: (mode, command, paths) where mode is
+      "full":        run `lint_cmd` (no clean baseline, config changed, or change not mappable),
+      "skip":        every changed file was already linted clean under this config,
+      "incremental": run `command`, which covers only `paths` (and, for go/cargo, their dependents).
+    """
+    state = state or LintState()
+    current = config_hash(lint_cmd, scripts)
+    if state.config != current or not state.base:
+        return "full", lint_cmd, None
+
+    if changed is None:
+        changed = changed_paths()
+    committed = committed_since(state.base, head or git_head())
+    if changed is None or committed is None:
+        return "full", lint_cmd, None
+
+    paths = sorted({os.path.normpath(p) for p in changed + committed if not p.endswith(DOC_EXTENSIONS)})
+    dirty = [p for p in paths if not state.is_clean(p)]
+    if lint_cmd == "npm run lint":
+        dirty = [p for p in dirty if p.endswith(JS_EXTENSIONS)]
+    if not dirty:
+        return "skip", None, paths
+
+    command = None
+    if lint_cmd == "npm run lint":
+        existing = [p for p in dirty if os.path.exists(p)]
+        command = eslint_command((scripts or {}).get("lint", ""), existing) if existing else None
+        if existing and command is None:
+            return "full", lint_cmd, None
+        if command is None:
+            # Only deletions: nothing left to lint.
+            return "skip", None, dirty
+    elif lint_cmd == "go vet ./...":
+        packages = select_go(dirty)
+        if packages:
+            command = "go vet " + " ".join(shlex.quote("./" + p if p != "." else ".") for p in packages)
+    elif lint_cmd == "cargo check":
+        crates = select_cargo(dirty)
+        if crates:
+            command = "cargo check " + " ".join(f"-p {shlex.quote(c)}" for c in crates)
+    if command is None:
+        return "full", lint_cmd, None
+    return "incremental", command, dirty
+
+
+def run_lint(lint_cmd, run_command, scripts=None, label="Lint", state=None):
+    """
+    Incremental lint: only the files (go/cargo: packages) changed since the last clean lint,
+    minus those already linted clean at their current content. Falls back to `lint_cmd`.
+    A passing run records its files as clean; a failing one records nothing.
+    Returns: (exit_code, output_text, duration_seconds, command_string)
+    """
+    state = state or LintState()
+    head = git_head()
+    mode, command, paths = plan_lint(lint_cmd, scripts, state, head=head)
+    current = config_hash(lint_cmd, scripts)
+
+    if mode == "skip":
+        state.mark_clean(current, head)
+        print(f"🧹 Incremental lint: {len(paths)} changed file(s) already linted clean. Skipping.")
+        return 0, f"All {len(paths)} changed file(s) already linted clean (cached).", 0.0, lint_cmd
+    if mode == "incremental":
+        print(f"🧹 Incremental lint: {len(paths)} changed file(s): {command}")
+    else:
+        print("🧹 Incremental lint: new linter config or change not mappable. Running a full lint.")
+        # A clean full lint vouches for every file as it is now.
+        paths = [p for p in changed_paths() or [] if not p.endswith(DOC_EXTENSIONS)]
+
+    code, output, duration, cmd = run_command(command, label)
+    if code == 0 and not getattr(output, "status", None):
+        state.mark_clean(current, head, paths, reset=(mode == "full"))
+    return code, output, duration, cmd
@@ -1,118 +1,141 @@
 import os
 import datetime
 import threading
+import time
+import contextlib
+
+# The Ledger file format and its cross-process storage live in ledger.py
+# (shared with the checkpoint skill); re-exported here for existing callers.
+from .ledger import ARCHIVE_DIR, MAX_LOG_LINES, ROTATE_AT_LINES, format_footer, parse_footer, queue_for
 
 # --- Constants ---
 
 # The log file is stored in the Project Root to be easily found by Agents.
 LOG_FILENAME = "verification_history.md"
 
-# Max lines to keep in the log file to prevent infinite growth.
-MAX_LOG_LINES = 200
+# Set in the environment of monorepo child gates: the parent writes their Ledger entry.
+NO_LEDGER_ENV = "LOFI_GATE_NO_LEDGER"
+
+# Ledger icons per status (anything else is a failure).
+# APPROVED / SUCCESS come from the checkpoint skill.
+STATUS_ICONS = {"PASS": "✅", "APPROVED": "✅", "SUCCESS": "✅", "FLAKY": "🎲", "CANCELLED": "🚫", "TIMEOUT": "⏱️", "LIMIT": "🧱"}
 
-# Global Lock for thread-safety
+# Guards the in-process batch below (ledger.py handles other threads and processes).
 log_lock = threading.Lock()
 
+# Entries buffered by an active `ledger_batch()` (flushed in ONE write on exit).
+_batch = None
+_batch_depth = 0
+
 def get_log_path(project_root=None):
     """
     Determines the absolute path to the log file.
     If project_root is provided, uses that. Otherwise tries to find CWD.
+    Returns None (no logging) inside a monorepo child gate; its parent logs for it.
     """
+    if os.environ.get(NO_LEDGER_ENV):
+        return None
     if project_root:
         return os.path.join(project_root, LOG_FILENAME)
     return os.path.join(os.getcwd(), LOG_FILENAME)
 
-def parse_footer(lines):
+def format_entry(label, status, tokens_used=0, tokens_saved=0, duration=0, command_context="", error_content=None, log_file=None, filter_savings=None, note=None):
     """
-    Parses the "Sticky Footer" from the log file to preserve stats.
+    Renders a single Ledger entry (plus its optional error dropdown).
+    `filter_savings`: {output filter: tokens saved} (see filters.py).
+    `note`: a short remark appended to the entry line (e.g. which tests were flaky).
+    Returns: the Markdown text of the entry.
     """
-    size = 0
-    savings = 0
-    clean_lines = []
-    footer_marker_size = "**Total Token Size:**"
-    
-    for line in lines:
-        if footer_marker_size in line:
-            try:
-                content = line.strip().replace("> ", "")
-                parts = content.split("|")
-                p0 = parts[0].split(":")[-1].strip().replace("*", "")
-                size = int(p0)
-                if len(parts) > 1:
-                    p1 = parts[1].split(":")[-1].strip().replace("*", "")
-                    savings = int(p1)
-            except: 
-                pass
+    lines = []
+    metrics_msg = f"(total token size: {tokens_used}) (tokens truncated: {tokens_saved})"
+    if filter_savings:
+        metrics_msg += " (filtered: " + ", ".join(f"{name} {saved}" for name, saved in filter_savings.items()) + ")"
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    icon = STATUS_ICONS.get(status, "❌")
+    duration_str = f"({duration:.2f}s)" if duration > 0 else ""
+    context_str = f"[{command_context}]" if command_context else "[Internal]"
+
+    note_str = f" — {note}" if note else ""
+    entry = f"- **[{timestamp}]** {context_str} {icon} **{label}**: {status} {duration_str} {metrics_msg}{note_str}\n"
+    lines.append(entry)
+
+    if error_content:
+        lines.append("  <details>\n")
+        lines.append("  <summary>🔍 View Truncated Error</summary>\n\n")
+        lines.append("  ```text\n")
+
+        # CAPPING ERROR CONTENT:
+        # We preserve a significant portion of the error (up to 400 lines)
+        # to allow humans to see what was truncated from the Agent's view.
+        # However, we still cap it to prevent a single massive failure from creating a 10MB log file.
+        ERROR_LIMIT = 400
+        error_lines = error_content.splitlines()
+        if len(error_lines) > ERROR_LIMIT:
+            head = error_lines[:200]
+            tail = error_lines[-200:]
+            for line in head:
+                lines.append(f"  {line}\n")
+            lines.append(f"  ... [Truncated {len(error_lines) - ERROR_LIMIT} lines in log] ...\n")
+            for line in tail:
+                lines.append(f"  {line}\n")
         else:
-            clean_lines.append(line)
-            
-    return clean_lines, size, savings
+            for line in error_lines:
+                lines.append(f"  {line}\n")
+        lines.append("  ```\n")
+        if log_file:
+            # The gate spilled the complete output to disk (see capture.py).
+            lines.append(f"  📦 Full output: `{log_file}`\n")
+        lines.append("  </details>\n")
 
-def log_to_history(label, status, message, tokens_used=0, tokens_saved=0, duration=0, command_context="", error_content=None, project_root=None):
+    return "".join(lines)
+
+@contextlib.contextmanager
+def ledger_batch(project_root=None):
+    """
+    Buffers every `log_to_history` call made inside the block and flushes
+    them in a SINGLE write on exit (one write per `run_checks` invocation).
+    """
+    global _batch, _batch_depth
+    with log_lock:
+        if _batch_depth == 0:
+            _batch = {"entries": [], "rows": [], "tokens_used": 0, "tokens_saved": 0, "project_root": project_root}
+        _batch_depth += 1
+    try:
+        yield
+    finally:
+        with log_lock:
+            _batch_depth -= 1
+            if _batch_depth == 0:
+                pending, _batch = _batch, None
+                log_path = get_log_path(pending["project_root"])
+                if log_path and pending["entries"]:
+                    queue_for(log_path, pending["project_root"]).submit(
+                        "".join(pending["entries"]), pending["tokens_used"], pending["tokens_saved"], pending["rows"]
+                    ).wait()
+
+def log_to_history(label, status, message, tokens_used=0, tokens_saved=0, duration=0, command_context="", error_content=None, project_root=None, log_file=None, filter_savings=None, wait=True, note=None, replay=None):
     """
     Writes a structured entry to the verification_history.md log.
+    `replay`: "cached" / "stale: ..." for a replayed result; history.db keeps it apart from the check name.
+    Inside a `ledger_batch()` the entry is queued and written with the rest of the batch.
+    Otherwise it goes through the write-behind queue (see ledger.py), which commits
+    concurrent entries together; `wait=False` returns without waiting for the disk.
     """
     log_path = get_log_path(project_root)
     if not log_path: return
 
+    entry = format_entry(f"{label} ♻️ ({replay})" if replay else label, status, tokens_used, tokens_saved, duration, command_context, error_content, log_file, filter_savings, note)
+    # The same facts, structured, for `lofi-gate history` (history.COLUMNS order).
+    row = (time.time(), label, status, float(duration or 0), int(tokens_used or 0), int(tokens_saved or 0), command_context or "", replay or "")
+
     with log_lock:
-        lines = []
-        if os.path.exists(log_path):
-            try:
-                with open(log_path, 'r', encoding='utf-8') as f: lines = f.readlines()
-            except: pass
-
-        lines, current_size, current_savings = parse_footer(lines)
-        
-        # 1. TRUNCATION: Ensure the OLD history doesn't bloat.
-        # We truncate the history BEFORE adding the new entry.
-        # This ensures we always have room for the latest result without losing it immediately.
-        if len(lines) > MAX_LOG_LINES:
-            lines = lines[-MAX_LOG_LINES:]
-            if not lines[0].startswith("\n..."):
-                 lines.insert(0, f"\n... (History truncated to last {MAX_LOG_LINES} lines to preserve performance) ...\n")
-
-        current_size += tokens_used
-        current_savings += tokens_saved
-
-        metrics_msg = f"(total token size: {tokens_used}) (tokens truncated: {tokens_saved})"
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        icon = "✅" if status == "PASS" else "❌"
-        duration_str = f"({duration:.2f}s)" if duration > 0 else ""
-        context_str = f"[{command_context}]" if command_context else "[Internal]"
-        
-        entry = f"- **[{timestamp}]** {context_str} {icon} **{label}**: {status} {duration_str} {metrics_msg}\n"
-        lines.append(entry)
-        
-        if error_content:
-            lines.append("  <details>\n")
-            lines.append("  <summary>🔍 View Truncated Error</summary>\n\n")
-            lines.append("  ```text\n")
-            
-            # CAPPING ERROR CONTENT:
-            # We preserve a significant portion of the error (up to 400 lines) 
-            # to allow humans to see what was truncated from the Agent's view.
-            # However, we still cap it to prevent a single massive failure from creating a 10MB log file.
-            ERROR_LIMIT = 400
-            error_lines = error_content.splitlines()
-            if len(error_lines) > ERROR_LIMIT:
-                head = error_lines[:200]
-                tail = error_lines[-200:]
-                for line in head:
-                    lines.append(f"  {line}\n")
-                lines.append(f"  ... [Truncated {len(error_lines) - ERROR_LIMIT} lines in log] ...\n")
-                for line in tail:
-                    lines.append(f"  {line}\n")
-            else:
-                for line in error_lines:
-                    lines.append(f"  {line}\n")
-            lines.append("  ```\n")
-            lines.append("  </details>\n")
-
-        footer = f"\n> 📊 **Total Token Size:** {current_size} | 💰 **Total Token Savings:** {current_savings}\n"
-        lines.append(footer)
-        
-        try:
-            with open(log_path, 'w', encoding='utf-8') as f: f.writelines(lines)
-        except: pass
+        if _batch is not None and _batch["project_root"] == project_root:
+            _batch["entries"].append(entry)
+            _batch["rows"].append(row)
+            _batch["tokens_used"] += tokens_used
+            _batch["tokens_saved"] += tokens_saved
+            return
+    done = queue_for(log_path, project_root).submit(entry, tokens_used, tokens_saved, [row])
+    if wait:
+        done.wait()
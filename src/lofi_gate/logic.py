@@ -2,10 +2,43 @@ import subprocess
 import sys
 import os
 import json
-import concurrent.futures
 import time
-import toml
-from .logger import log_to_history
+from .logger import log_to_history, ledger_batch
+from .capture import StreamCapture, capture_stream, prepend_output, spill_path_for
+from .cache import ResultCache, tree_state_key, DEFAULT_MAX_MB
+from .impact import select_test_command
+from .extract import extractor_for
+from .filters import DEFAULT_FILTERS, build_chain, unknown_filters
+from .tokens import TokenCounter, allocate_budget, count_tokens, truncate_to_tokens
+from .procs import RUNNING, Watchdog, format_size, limited_command, parse_size, renice_tree, spawn
+from .stats import CheckStats
+from .shard import plan_shards, run_sharded
+from .rerun import FLAKY, run_tests as run_tests_with_retries
+from .lint import run_lint
+from .audit import parse_ttl, run_audit
+from .tdd import find_violations
+from .monorepo import CONFIG_ENV, DEFAULT_WORKERS, plan_projects, run_projects
+from .scheduler import WeightedScheduler, order_parallel, order_sequential
+from .plan import PlanCache, plan_key
+from .fingerprint import FailureFingerprints
+from .engine import ENGINES, PROGRESS_INTERVAL, AsyncExecutor, CommandCheck, LiveProgress
+from . import trace
+
+# --- Capture Settings ---
+
+# Set once per run by `run_checks` (from lofi.toml) and read by `run_command`.
+# `spill_output`: also stream the FULL output to a gzip file for the Ledger.
+# `count_tokens`: count the stream with the real tokenizer (only when a token budget is set).
+# `filters`: output filter names per `run_command` label (see filters.py).
+CAPTURE_SETTINGS = {"spill_output": False, "count_tokens": False, "filters": {}}
+
+# Per-check resource limits from `[checks.<key>]`, keyed by the `run_command` label.
+# Also set once per run by `run_checks`.
+CHECK_LIMITS = {}
+RUN_LABEL_KEYS = {"Security": "security", "Lint": "lint", "Tests": "tests", "Coverage": "coverage"}
+
+# Statuses set by the gate itself when it stops a command (see procs.Watchdog).
+STOPPED_ICONS = {"TIMEOUT": "⏱️", "LIMIT": "🧱"}
 
 # --- Helper Functions ---
 
@@ -16,86 +49,244 @@ def estimate_tokens(text):
     """
     return len(text) // 4
 
+def output_tokens(output):
+    """
+    Token size of a check's FULL output.
+    A CapturedOutput knows it (even if it only kept head/tail); plain strings are estimated.
+    """
+    raw_tokens = getattr(output, "raw_tokens", None)
+    if raw_tokens is None:
+        raw_tokens = estimate_tokens(output)
+    return raw_tokens
+
 def run_command(command, label="Test"):
     """
     Executes a shell command and captures output.
+    The pipe is drained incrementally into a bounded head/tail buffer,
+    so memory stays flat even if the tool prints hundreds of MB.
+    Limits from CHECK_LIMITS (timeout, output size, memory, niceness) apply to the whole tree;
+    a tripped limit kills it and marks the (partial) output TIMEOUT or LIMIT.
     Returns: (exit_code, output_text, duration_seconds, command_string)
     """
     start_time = time.time()
     try:
-        process = subprocess.run(
-            command, 
-            shell=True,
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            text=True,
-            errors='replace' 
-        )
+        limits = CHECK_LIMITS.get(label, {})
+        spill_path = spill_path_for(label) if CAPTURE_SETTINGS.get("spill_output") else None
+        # Each command gets its own process group so fail-fast (and the watchdog) can kill the whole tree.
+        with trace.span("spawn", "process", label=label) as info:
+            process = spawn(limited_command(command, limits.get("max_memory")), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            renice_tree(process, limits.get("cpu_niceness"))
+            if info is not None:
+                info["child_pid"] = process.pid
+        RUNNING.register(label, process)
+        watchdog = Watchdog(process, limits.get("timeout"), limits.get("max_memory")).start()
+        max_output = limits.get("max_output_bytes")
+        try:
+            # Framework parsers (pytest, jest, cargo, go) ride along on the same single pass.
+            counter = TokenCounter() if CAPTURE_SETTINGS.get("count_tokens") else None
+            chain = build_chain(CAPTURE_SETTINGS.get("filters", {}).get(label))
+            capture = StreamCapture(spill_path=spill_path, extractor=extractor_for(command), token_counter=counter, filters=chain)
+            with trace.span("capture", "process", label=label):
+                output = capture_stream(
+                    process.stdout, capture, max_bytes=max_output,
+                    on_limit=lambda: watchdog.trip("LIMIT", f"output over the {format_size(max_output)} limit"),
+                )
+            process.stdout.close()
+            with trace.span("wait", "process", label=label):
+                process.wait()
+        finally:
+            watchdog.stop()
+            RUNNING.unregister(process)
+        exit_code = process.returncode
+        if RUNNING.was_cancelled(process):
+            output.status = "CANCELLED"
+        elif watchdog.tripped:
+            output.status, output.status_detail = watchdog.tripped
+            # A killed tree may report 0 (e.g. a shell that traps SIGTERM); it still failed.
+            exit_code = exit_code or 1
         duration = time.time() - start_time
-        return process.returncode, process.stdout, duration, command
+        return exit_code, output, duration, command
     except Exception as e:
         return 1, str(e), time.time() - start_time, command
 
-def print_result(label, exit_code, output, duration, command_context=""):
+def resolve_limits(config):
+    """
+    Reads `timeout`, `max_output_bytes`, `max_memory` and `cpu_niceness` for every check.
+    Returns: {run_command label: {limit: value}}
+    """
+    limits = {}
+    for run_label, key in RUN_LABEL_KEYS.items():
+        settings = check_settings(config, key)
+        check = {}
+        if settings.get("timeout"):
+            check["timeout"] = float(settings["timeout"])
+        for name in ("max_output_bytes", "max_memory"):
+            size = parse_size(settings.get(name))
+            if size:
+                check[name] = size
+        if settings.get("cpu_niceness"):
+            check["cpu_niceness"] = int(settings["cpu_niceness"])
+        if check:
+            limits[run_label] = check
+    return limits
+
+def resolve_filters(config):
+    """
+    Reads `output_filters` from `[gate]`, overridable per check in `[checks.<key>]`.
+    Returns: {run_command label: [filter names]}
+    """
+    default = config.get("gate", {}).get("output_filters", DEFAULT_FILTERS)
+    filters = {}
+    for run_label, key in RUN_LABEL_KEYS.items():
+        filters[run_label] = check_settings(config, key).get("output_filters", default)
+    unknown = sorted({name for names in filters.values() for name in unknown_filters(names)})
+    if unknown:
+        print(f"⚠️  Unknown output filter(s) {', '.join(unknown)} in lofi.toml. Skipping them.")
+    return filters
+
+def print_result(label, exit_code, output, duration, command_context="", token_budget=None, fingerprints=None):
     """
     Handles the "Smart Truncation" presentation logic.
     Prints to Console AND delegates to the Logger.
+    `token_budget`: cut the output to this many (real) tokens instead of 2000 chars.
+    `fingerprints`: a FailureFingerprints; failures already shown in the last run are listed by name only.
     Returns: (exit_code, tokens_truncated)
     """
     print("-" * 40)
+    check, command = label, command_context
     
-    raw_tokens = estimate_tokens(output)
+    raw_tokens = output_tokens(output)
+    total_chars = getattr(output, "total_chars", len(output))
+    # Replayed results (see cache.py) are flagged so nobody mistakes them for a fresh run.
+    # The logs get the plain check name plus `replay`, so history.db stats stay per check.
+    replay = []
+    if getattr(output, "from_cache", False):
+        label = f"{label} ♻️ (cached)"
+        replay.append("cached")
+    if getattr(output, "stale", None):
+        # A replay past its TTL (e.g. an offline audit): say so, even when it passed.
+        label = f"{label} ⚠️ (stale: {output.stale})"
+        replay.append(f"stale: {output.stale}")
+    replay = ", ".join(replay) or None
     TRUNCATE_LIMIT = 2000
+    # When a framework parser found the failures, we show THEM (plus the run summary at the end)
+    # instead of blind head/tail slicing, which often cuts the real assertion.
+    SUMMARY_TAIL = 300
     truncated_output = output
     tokens_truncated = 0
+    extraction = getattr(output, "extraction", None)
+
+    # Opt-in: compare the failures with the last run's (see fingerprint.py).
+    failure_diff = None
+    if fingerprints is not None and not getattr(output, "status", None):
+        if exit_code == 0:
+            failure_diff = fingerprints.diff(check, command)
+        elif extraction:
+            failure_diff = fingerprints.diff(check, command, extraction)
     
-    if len(output) > TRUNCATE_LIMIT:
-        head = output[:1000]
-        tail = output[-1000:]
-        truncated_output = f"{head}\n... [Truncated {len(output) - TRUNCATE_LIMIT} chars] ...\n{tail}"
-        compressed_tokens = estimate_tokens(truncated_output)
-        tokens_truncated = raw_tokens - compressed_tokens
+    with trace.span("truncate", "report", label=label):
+        if failure_diff is not None and failure_diff.still:
+            # The Agent already has these in full: only NEW failures get the budget.
+            limit = token_budget * 4 if token_budget else TRUNCATE_LIMIT
+            signal = failure_diff.render(limit - SUMMARY_TAIL)
+            # Just the runner's closing line: the tail of a short output would repeat the details.
+            closing = next((line for line in reversed(output[-SUMMARY_TAIL:].splitlines()) if line.strip()), "")
+            truncated_output = f"{signal}\n... [Failures from the last run listed by name] ...\n{closing}"
+            if token_budget:
+                truncated_output, _ = truncate_to_tokens(truncated_output, token_budget)
+                tokens_truncated = max(raw_tokens - count_tokens(truncated_output), 0)
+            else:
+                tokens_truncated = max(raw_tokens - estimate_tokens(truncated_output), 0)
+        elif token_budget:
+            # Outputs we hold in full (internal checks, small outputs) can be counted exactly here.
+            if getattr(output, "tokens", None) is None and not getattr(output, "omitted_chars", 0):
+                raw_tokens = count_tokens(output)
+            if raw_tokens > token_budget:
+                source = output
+                if exit_code != 0 and extraction:
+                    signal = extraction.render(token_budget * 4 - SUMMARY_TAIL)
+                    source = f"{signal}\n... [Extracted failures] ...\n{output[-SUMMARY_TAIL:]}"
+                truncated_output, _ = truncate_to_tokens(source, token_budget)
+                tokens_truncated = max(raw_tokens - count_tokens(truncated_output), 0)
+        elif total_chars > TRUNCATE_LIMIT:
+            if exit_code != 0 and extraction:
+                signal = extraction.render(TRUNCATE_LIMIT - SUMMARY_TAIL)
+                tail = output[-SUMMARY_TAIL:]
+                truncated_output = f"{signal}\n... [Extracted failures; {total_chars - len(signal) - len(tail)} chars omitted] ...\n{tail}"
+            else:
+                head = output[:1000]
+                tail = output[-1000:]
+                truncated_output = f"{head}\n... [Truncated {total_chars - TRUNCATE_LIMIT} chars] ...\n{tail}"
+            compressed_tokens = estimate_tokens(truncated_output)
+            tokens_truncated = raw_tokens - compressed_tokens
+        filter_savings = getattr(output, "filter_savings", None)
+        if filter_savings and not tokens_truncated:
+            # Nothing left to cut, but the output filters already saved these.
+            tokens_truncated = sum(filter_savings.values())
     
     metrics_display = f"(total token size: {raw_tokens})"
     if tokens_truncated > 0:
         metrics_display += f" (tokens truncated: {tokens_truncated})"
     else:
         metrics_display += " (tokens truncated: 0)"
+    if filter_savings:
+        metrics_display += " (filtered: " + ", ".join(f"{name} {saved}" for name, saved in filter_savings.items()) + ")"
+
+    time_saved = getattr(output, "time_saved", 0)
+    notes = [getattr(output, "shard_timings", None), f"~{time_saved:.1f}s saved vs full reruns" if time_saved else None]
+    note = "; ".join(n for n in notes if n) or None
+    if time_saved:
+        print(f"⏱️  Targeted reruns saved ~{time_saved:.1f}s compared with full reruns")
+    if failure_diff is not None and exit_code != 0:
+        note = "; ".join(n for n in (failure_diff.summary(), note) if n)
+        if failure_diff.fixed and not failure_diff.still:
+            truncated_output = f"{truncated_output}\n{failure_diff.fixed_line()}"
 
-    if exit_code == 0:
+    stopped = getattr(output, "status", None)
+    if stopped in STOPPED_ICONS:
+        # The gate killed the tree (timeout / resource limit); show what it printed before that.
+        print(f"{STOPPED_ICONS[stopped]} {label} {stopped}: {output.status_detail} ({duration:.2f}s). Partial output:")
+        print("-" * 40)
+        print(truncated_output)
+        log_to_history(check, stopped, output.status_detail, raw_tokens, tokens_truncated, duration, command, replay=replay, error_content=output, log_file=getattr(output, "spill_path", None), filter_savings=filter_savings, note=note)
+        return exit_code or 1, tokens_truncated
+    flaky = getattr(output, "flaky", None)
+    if exit_code == 0 and flaky:
+        # Every failure passed on a retry: not a broken build, but worth knowing about.
+        names = ", ".join(flaky)
+        print(f"🎲 {label} Flaky ({duration:.2f}s): {len(flaky)} test(s) failed, then passed on retry: {names} {metrics_display}")
+        print("-" * 40)
+        log_to_history(check, FLAKY, "Flaky", raw_tokens, tokens_truncated, duration, command, replay=replay, filter_savings=filter_savings,
+                       note="; ".join(n for n in (f"passed on retry: {names}", note) if n))
+    elif exit_code == 0:
         print(f"✅ {label} Passed! ({duration:.2f}s) {metrics_display}")
+        if failure_diff is not None and failure_diff.fixed:
+            print(failure_diff.fixed_line())
         print("-" * 40)
-        log_to_history(label, "PASS", "Passed", raw_tokens, tokens_truncated, duration, command_context)
+        log_to_history(check, "PASS", "Passed", raw_tokens, tokens_truncated, duration, command, replay=replay, filter_savings=filter_savings, note=note)
     else:
         print(f"❌ {label} Failed ({duration:.2f}s). Showing relevant error output:")
         print("-" * 40)
         print(truncated_output)
         # We pass the FULL output to the logger to preserve history for humans, 
         # while the Agent only saw the truncated version in its context.
-        log_to_history(label, "FAIL", "Failed", raw_tokens, tokens_truncated, duration, command_context, error_content=output)
+        log_to_history(check, "FAIL", "Failed", raw_tokens, tokens_truncated, duration, command, replay=replay, error_content=output, log_file=getattr(output, "spill_path", None), filter_savings=filter_savings, note=note)
             
     return exit_code, tokens_truncated
 
-def check_strict_tdd():
+def check_strict_tdd(config=None):
     """
     Gate: Enforces Test Driven Development.
     Checks if any new code files have been added without a corresponding test file.
+    Tests are looked up in an index of the whole repo (see tdd.py), not just the new files.
     """
+    start_time = time.time()
     try:
-        result = subprocess.run(["git", "status", "--porcelain"], stdout=subprocess.PIPE, text=True)
-        lines = result.stdout.splitlines()
-        new_files = [line[3:] for line in lines if line.startswith("??") or line.startswith("A ")]
-        
-        violations = []
-        for f in new_files:
-            if f.endswith((".js", ".ts", ".py", ".go", ".rs")) and "test" not in f and "spec" not in f:
-                base = os.path.basename(f).split('.')[0]
-                if not any(base in other and ("test" in other or "spec" in other) for other in new_files + os.listdir(".")):
-                    violations.append(f)
-        
+        violations = find_violations(check_settings(config or {}, "TDD Check"))
+        duration = time.time() - start_time
         if violations:
-            return 1, "❌ STRICT TDD VIOLATION: Missing tests for:\n" + "\n".join(violations), 0.1, "git status"
-        return 0, "All new files have tests.", 0.1, "git status"
+            return 1, "❌ STRICT TDD VIOLATION: Missing tests for:\n" + "\n".join(violations), duration, "git status"
+        return 0, "All new files have tests.", duration, "git status"
     except:
         return 0, "Git check skipped.", 0, "git status"
 
@@ -108,19 +299,61 @@ def load_scripts():
             return {}
     return {}
 
+def read_config():
+    """
+    Like `load_config`, but a broken lofi.toml raises.
+    """
+    # Monorepo child gates get their parent's resolved config (see monorepo.py).
+    if os.environ.get(CONFIG_ENV):
+        with open(os.environ[CONFIG_ENV], "r") as f:
+            return json.load(f)
+    if os.path.exists("lofi.toml"):
+        import toml
+        with open("lofi.toml", "r") as f:
+            return toml.load(f)
+    return {}
+
 def load_config():
     """
     Loads configuration from lofi.toml if it exists.
     Returns a dictionary.
     """
     try:
-        if os.path.exists("lofi.toml"):
-            with open("lofi.toml", "r") as f:
-                return toml.load(f)
+        return read_config()
     except Exception as e:
         print(f"⚠️  Failed to load lofi.toml: {e}")
     return {}
 
+def load_plan():
+    """
+    lofi.toml, the package.json scripts and the detected check commands.
+    Served from `.lofi-gate/plan.json` while no plan input changed (see plan.py),
+    so a repeat run neither parses lofi.toml nor probes the tree.
+    Returns: (config, scripts, commands)
+    """
+    if os.environ.get(CONFIG_ENV):
+        # Monorepo child: the config comes from the parent, not from the files in the key.
+        config = load_config()
+        scripts = load_scripts()
+        return config, scripts, detect_commands(config, scripts)
+    key, newest = plan_key()
+    store = PlanCache()
+    plan = store.get(key)
+    if plan is not None:
+        return plan["config"], plan["scripts"], plan["commands"]
+    with trace.span("scripts.load"):
+        scripts = load_scripts()
+    try:
+        with trace.span("config.load"):
+            config = read_config()
+    except Exception as e:
+        # Not cached: the warning shows on every run until lofi.toml is fixed.
+        print(f"⚠️  Failed to load lofi.toml: {e}")
+        return {}, scripts, detect_commands({}, scripts)
+    commands = detect_commands(config, scripts)
+    store.put(key, {"config": config, "scripts": scripts, "commands": commands}, newest)
+    return config, scripts, commands
+
 def determine_test_command(scripts, config_test_cmd=None):
     if config_test_cmd: return config_test_cmd
     if "test:agent" in scripts: return "npm run test:agent"
@@ -133,98 +366,358 @@ def determine_test_command(scripts, config_test_cmd=None):
         return "go test ./..."
     return None
 
-def run_checks(parallel=False):
+# Key of each check under `[checks.<key>]` in lofi.toml.
+CHECK_KEYS = {
+    "TDD Check": "tdd",
+    "Security Scan": "security",
+    "Lint": "lint",
+    "Test Suite": "tests",
+    "Coverage": "coverage",
+}
+
+def detect_commands(config, scripts):
     """
-    Runs the verification suite.
+    Probes the project for the command of each tool-backed check.
+    Returns: {"security": cmd, "lint": cmd, "tests": cmd}, None for a check that is off or doesn't apply.
     """
-    start_total = time.time()
-    scripts = load_scripts()
-    tasks = []
+    gate_config = config.get("gate", {})
+    commands = {"security": None, "lint": None, "tests": None}
+
+    # We default `security_check` to True because we want to be secure by default.
+    if gate_config.get("security_check", True):
+        if os.path.exists("package.json"):
+            commands["security"] = "npm audit --audit-level=high"
+        elif os.path.exists("Cargo.toml"):
+            commands["security"] = "cargo audit"
+
+    if gate_config.get("lint_check", True):
+        if "lint" in scripts:
+            commands["lint"] = "npm run lint"
+        elif os.path.exists("Cargo.toml"):
+            commands["lint"] = "cargo check"
+        elif os.path.exists("go.mod"):
+            commands["lint"] = "go vet ./..."
+
+    commands["tests"] = determine_test_command(scripts, config.get("project", {}).get("test_command"))
+    return commands
+
+def check_settings(config, label):
+    """
+    Returns: the `[checks.<key>]` table for a check label (empty dict if unset).
+    """
+    checks = config.get("checks", {})
+    return checks.get(CHECK_KEYS.get(label, label), {}) if isinstance(checks, dict) else {}
+
+def report_cancelled(cancelled, stats):
+    """
+    Prints the Fail Fast summary for checks that were stopped early, and logs them.
+    `cancelled`: list of (label, elapsed_seconds, command)
+    """
+    saved = 0.0
+    known = True
+    for label, elapsed, cmd in cancelled:
+        expected = stats.expected_duration(label)
+        if expected is None:
+            known = False
+        else:
+            saved += max(expected - elapsed, 0)
+        print(f"🚫 {label} Cancelled after {elapsed:.2f}s")
+        log_to_history(label, "CANCELLED", "Cancelled", 0, 0, elapsed, cmd)
+    names = ", ".join(label for label, _, _ in cancelled)
+    estimate = f"~{saved:.2f}s" if known else f"≥{saved:.2f}s (no history for some checks)"
+    print(f"🛑 Fail Fast cancelled {len(cancelled)} check(s) [{names}]. Wall time saved: {estimate}")
 
-    config = load_config()
+def build_tasks(config, scripts, impact=None, stats=None, failed_first=None, commands=None):
+    """
+    Detects which checks apply to this project.
+    `failed_first`: True/False forces failed-first test ordering on/off; None defers to lofi.toml.
+    `commands`: the output of `detect_commands` if already known (e.g. from the plan cache).
+    Returns: a list of (label, fn, command) where `fn()` runs the check.
+    """
+    tasks = []
     gate_config = config.get("gate", {})
-    
+    commands = detect_commands(config, scripts) if commands is None else commands
+
     # Defaults
-    # We default `security_check` to True because we want to be secure by default.
-    do_security = gate_config.get("security_check", True)
-    
     # We default `security_fail_on_error` to True. 
     # Rationale: If a security vulnerability is found, it should block deployment.
     # However, for legacy projects or verified agent workflows (like Issue-24), 
     # users might need to downgrade this to a warning (exit code 0).
     security_fail_on_error = gate_config.get("security_fail_on_error", True)
-    
-    do_lint = gate_config.get("lint_check", True)
-    
+
     # 1. TDD Check
     if gate_config.get("strict_tdd", True):
-        tasks.append(("TDD Check", lambda: check_strict_tdd()))
+        tasks.append(("TDD Check", lambda: check_strict_tdd(config), "git status"))
 
     # 2. Security
-    def run_security(cmd):
-        exit_code, output, duration, command = run_command(cmd, "Security")
+    def warn_only(exit_code, output, duration, command):
         # If the user has opted out of "hard blocks" for security (e.g. strict peer deps),
         # we still run the check to show the output (visibility), 
         # but we suppress the non-zero exit code so the pipeline continues.
         if not security_fail_on_error and exit_code != 0:
-             return 0, f"⚠️  Security Check Failed (Warn Only) - Exit Code {exit_code}\n" + output, duration, command
+             return 0, prepend_output(f"⚠️  Security Check Failed (Warn Only) - Exit Code {exit_code}\n", output), duration, command
         return exit_code, output, duration, command
 
-    if do_security:
-        if os.path.exists("package.json"):
-            tasks.append(("Security Scan", lambda: run_security("npm audit --audit-level=high")))
-        elif os.path.exists("Cargo.toml"):
-            tasks.append(("Security Scan", lambda: run_security("cargo audit")))
+    # Opt-in: replay audits for an unchanged lockfile (see audit.py).
+    try:
+        audit_ttl = parse_ttl(check_settings(config, "Security Scan").get("cache_ttl"))
+    except ValueError as e:
+        print(f"⚠️  {e} in lofi.toml. Audit cache disabled.")
+        audit_ttl = None
+
+    def security_task(cmd):
+        if audit_ttl:
+            store = ResultCache(max_bytes=int(gate_config.get("cache_max_mb", DEFAULT_MAX_MB) * 1024 * 1024))
+            return lambda: warn_only(*run_audit(cmd, run_command, audit_ttl, store=store))
+        return CommandCheck(cmd, "Security", run_command, finish=warn_only)
+
+    if commands["security"]:
+        tasks.append(("Security Scan", security_task(commands["security"]), commands["security"]))
 
     # 3. Lint
-    if do_lint:
-        if "lint" in scripts:
-            tasks.append(("Lint", lambda: run_command("npm run lint", "Lint")))
-        elif os.path.exists("Cargo.toml"):
-            tasks.append(("Lint", lambda: run_command("cargo check", "Lint")))
-        elif os.path.exists("go.mod"):
-            tasks.append(("Lint", lambda: run_command("go vet ./...", "Lint")))
+    lint_cmd = commands["lint"]
+    if lint_cmd:
+        if check_settings(config, "Lint").get("incremental", False):
+            # Only the files changed since the last clean lint (see lint.py).
+            tasks.append(("Lint", lambda: run_lint(lint_cmd, run_command, scripts), lint_cmd))
+        else:
+            tasks.append(("Lint", CommandCheck(lint_cmd, "Lint", run_command), lint_cmd))
 
     # 4. Tests
-    test_cmd = determine_test_command(scripts, config.get("project", {}).get("test_command"))
+    test_cmd = commands["tests"]
+    use_impact = config.get("project", {}).get("test_impact", False) if impact is None else impact
+    if test_cmd and use_impact:
+        # Only run the tests affected by the current change (falls back to the full suite).
+        narrowed = select_test_command(test_cmd, scripts)
+        if narrowed:
+            print(f"🎯 Impact analysis: {narrowed}")
+            test_cmd = narrowed
+        else:
+            print("🎯 Impact analysis: change not mappable. Running the full suite.")
+    shards = int(config.get("project", {}).get("shards", 1) or 1)
+    # Failed-first ordering and targeted retries (see rerun.py).
+    failed_first = config.get("project", {}).get("failed_first", False) if failed_first is None else failed_first
+    retries = int(check_settings(config, "Test Suite").get("retries", 0) or 0)
+
+    def run_tests():
+        # Sharded: N concurrent workers, reported as ONE check (falls back to a single run).
+        plan = plan_shards(test_cmd, shards, scripts, stats) if shards > 1 else None
+        if plan:
+            print(f"🧩 Test Suite split into {len(plan[0])} shards")
+            if failed_first or retries:
+                # Concurrent shards share the runner's last-failed cache, so `--lf` style reruns can't be trusted.
+                print("⚠️  Sharded Test Suite: `retries` and `failed_first` are not applied. Set shards = 1 to use them.")
+            return run_sharded(test_cmd, plan, run_command, stats)
+        if failed_first or retries:
+            expected = stats.expected_duration("Test Suite") if stats else None
+            return run_tests_with_retries(test_cmd, run_command, "Tests", failed_first, retries, expected)
+        return run_command(test_cmd, "Tests")
+
     if test_cmd:
-        tasks.append(("Test Suite", lambda: run_command(test_cmd, "Tests")))
+        plain = shards <= 1 and not failed_first and not retries
+        tasks.append(("Test Suite", CommandCheck(test_cmd, "Tests", run_command) if plain else run_tests, test_cmd))
     else:
         print("⚠️  No test framework detected. Skipping Test Suite.")
 
     # 5. Coverage
     if "coverage" in scripts:
-        tasks.append(("Coverage", lambda: run_command("npm run coverage", "Coverage")))
+        tasks.append(("Coverage", CommandCheck("npm run coverage", "Coverage", run_command), "npm run coverage"))
+
+    return tasks
+
+def run_checks(parallel=False, cache=None, impact=None, fail_fast=False, config=None, scripts=None, only=None, results=None, monorepo=None, engine=None, failed_first=None):
+    """
+    Runs the verification suite.
+    All Ledger entries from this run are flushed in a single batched write.
+    `cache`: True/False forces the result cache on/off; None defers to lofi.toml.
+    `impact`: True/False forces test impact selection on/off; None defers to lofi.toml.
+    `fail_fast`: in parallel mode, cancel the remaining checks on the first failure.
+    `config` / `scripts`: pre-loaded lofi.toml / package.json scripts (e.g. kept in memory by `watch`).
+    `only`: run just these check labels.
+    `results`: if given, filled with {label: exit_code} for every check that completed.
+    `monorepo`: True/False forces per-project gates on/off; None defers to lofi.toml.
+    `engine`: "threads" or "async" for parallel runs; None defers to lofi.toml.
+    `failed_first`: True/False forces failed-first test ordering on/off; None defers to lofi.toml.
+    """
+    with trace.span("run_checks"), ledger_batch():
+        return _run_checks(parallel, cache, impact, fail_fast, config, scripts, only, results, monorepo, engine, failed_first)
+
+def traced_check(label, fn, command):
+    """
+    Wraps a check so its whole run (in whichever worker thread) is one span of the profile.
+    """
+    if isinstance(fn, CommandCheck):
+        # Stays a CommandCheck, so the async engine can still run it on its loop.
+        return fn.replace(span=label)
+
+    def run():
+        with trace.span(label, "check", command=command):
+            return fn()
+    return run
+
+def log_project(label, status, output, duration, command):
+    """
+    One Ledger entry per monorepo project (its gate already printed a token-optimized report).
+    """
+    error_content = output if status != "PASS" else None
+    log_to_history(label, status, status.title(), output_tokens(output), 0, duration, command, error_content=error_content)
+
+def _run_checks(parallel=False, cache=None, impact=None, fail_fast=False, config=None, scripts=None, only=None, results=None, monorepo=None, engine=None, failed_first=None):
+    start_total = time.time()
+    commands = None
+    if config is None and scripts is None:
+        with trace.span("plan.load"):
+            config, scripts, commands = load_plan()
+    else:
+        with trace.span("scripts.load"):
+            scripts = load_scripts() if scripts is None else scripts
+        with trace.span("config.load"):
+            config = load_config() if config is None else config
+    gate_config = config.get("gate", {})
+
+    # Monorepo: one child gate per touched project, each in its own directory.
+    use_monorepo = config.get("project", {}).get("monorepo", False) if monorepo is None else monorepo
+    if use_monorepo:
+        options = {"parallel": parallel, "cache": cache, "impact": impact, "fail_fast": fail_fast, "engine": engine, "failed_first": failed_first}
+        plan = plan_projects(config, options=options)
+        workers = config.get("project", {}).get("project_workers", DEFAULT_WORKERS)
+        return run_projects(plan, run_command, log_project, workers)
+
+    stats = CheckStats()
+    # Opt-in: repeated failures are listed by name only (see fingerprint.py).
+    fingerprints = FailureFingerprints() if gate_config.get("failure_diff", False) else None
+
+    # Opt-in: keep the complete (gzipped) output of every check on disk for the Ledger.
+    CAPTURE_SETTINGS["spill_output"] = gate_config.get("spill_output", False)
+
+    # Opt-in: token-accurate truncation.
+    # `token_budget` caps each check; `run_token_budget` is shared by all failing checks.
+    token_budget = gate_config.get("token_budget")
+    run_token_budget = gate_config.get("run_token_budget")
+    CAPTURE_SETTINGS["count_tokens"] = bool(token_budget or run_token_budget)
+
+    # Noise filters between the tool and the report (ANSI, redraws, repeats, framework frames).
+    CAPTURE_SETTINGS["filters"] = resolve_filters(config)
+
+    # Opt-in: per-check timeouts and resource limits.
+    CHECK_LIMITS.clear()
+    CHECK_LIMITS.update(resolve_limits(config))
+    
+    with trace.span("checks.detect"):
+        tasks = build_tasks(config, scripts, impact, stats, failed_first, commands)
+
+    if only is not None:
+        tasks = [task for task in tasks if task[0] in only]
+
+    # 6. Result Cache
+    # Unchanged tree + unchanged config + same command => replay the stored result.
+    use_cache = gate_config.get("cache", False) if cache is None else cache
+    if use_cache:
+        with trace.span("cache.tree_key"):
+            tree_key = tree_state_key(config)
+        if tree_key:
+            store = ResultCache(max_bytes=int(gate_config.get("cache_max_mb", DEFAULT_MAX_MB) * 1024 * 1024))
+            tasks = [(label, store.wrap(label, fn, cmd, tree_key), cmd) for label, fn, cmd in tasks]
+        else:
+            print("⚠️  Not a git work tree. Result cache disabled.")
 
     overall_failure = False
     total_savings = 0
+    RUNNING.reset()
+
+    def record(label, code, out, dur):
+        if results is not None:
+            results[label] = code
+        # Only real, complete runs teach us how long a check takes.
+        if not getattr(out, "from_cache", False) and not getattr(out, "status", None):
+            stats.record(label, dur, failed=(code != 0))
+            stats.add_time_saved(label, getattr(out, "time_saved", 0))
+
+    # 7. Schedule
+    # Past runs decide the order: sequential wants failures early, parallel wants the long poles first.
+    tasks = order_parallel(tasks, stats) if parallel else order_sequential(tasks, stats)
+    if trace.enabled():
+        tasks = [(label, traced_check(label, fn, cmd), cmd) for label, fn, cmd in tasks]
 
     if parallel:
-        print(f"🚀 Running {len(tasks)} checks in PARALLEL...")
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_to_label = {executor.submit(fn): label for label, fn in tasks}
-            for future in concurrent.futures.as_completed(future_to_label):
-                label = future_to_label[future]
+        engine = gate_config.get("engine", "threads") if engine is None else engine
+        if engine not in ENGINES:
+            print(f"⚠️  Unknown engine '{engine}' in lofi.toml. Using threads.")
+            engine = "threads"
+        mode = "PARALLEL (fail-fast)" if fail_fast else "PARALLEL"
+        if engine == "async":
+            mode += " [async]"
+        print(f"🚀 Running {len(tasks)} checks in {mode}...")
+        # With a run budget, failures are held back until every check is done,
+        # so the budget can be split between them proportionally.
+        deferred = []
+        cancelled = []
+        max_workers = gate_config.get("max_workers")
+        weights = {label: check_settings(config, label).get("weight", 1) for label, _, _ in tasks}
+        if engine == "async":
+            # One event loop reads every check's output as it streams: live progress, and with
+            # fail-fast the siblings are cancelled on the first failing TEST, not the first failed check.
+            on_failure = (lambda _label, handle: RUNNING.cancel_all(keep=handle)) if fail_fast else None
+            progress = LiveProgress(gate_config.get("progress_interval", PROGRESS_INTERVAL), on_failure)
+            pool = AsyncExecutor(max_workers, CAPTURE_SETTINGS, CHECK_LIMITS, progress)
+        else:
+            import concurrent.futures
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        with pool as executor:
+            scheduler = WeightedScheduler(executor, capacity=max_workers, weights=weights)
+            for (label, _, planned_cmd), future in scheduler.run(tasks, should_stop=lambda: RUNNING.cancelled.is_set()):
+                if future is None:
+                    # Never started: fail-fast fired while it was still queued.
+                    cancelled.append((label, 0.0, planned_cmd))
+                    continue
                 try:
                     code, out, dur, cmd = future.result()
-                    exit_code, saved = print_result(label, code, out, dur, cmd)
+                    if getattr(out, "status", None) == "CANCELLED":
+                        cancelled.append((label, dur, cmd))
+                        continue
+                    record(label, code, out, dur)
+                    if fail_fast and code != 0:
+                        # First failure: tear down every sibling process tree (SIGTERM, then SIGKILL).
+                        RUNNING.cancel_all()
+                    if run_token_budget and code != 0:
+                        deferred.append((label, code, out, dur, cmd))
+                        overall_failure = True
+                        continue
+                    exit_code, saved = print_result(label, code, out, dur, cmd, token_budget, fingerprints)
                     total_savings += saved
                     if exit_code != 0:
                         overall_failure = True
                 except Exception as e:
                     print(f"❌ {label} Crashed: {e}")
                     overall_failure = True
+                    if fail_fast:
+                        RUNNING.cancel_all()
+
+        if cancelled:
+            report_cancelled(cancelled, stats)
+
+        if deferred:
+            budgets = allocate_budget(run_token_budget, {d[0]: output_tokens(d[2]) for d in deferred}, token_budget)
+            for label, code, out, dur, cmd in deferred:
+                _, saved = print_result(label, code, out, dur, cmd, budgets[label], fingerprints)
+                total_savings += saved
     else:
-        print(f"🐢 Running {len(tasks)} checks SEQUENTIALLY...")
-        for label, fn in tasks:
+        print(f"🐢 Running {len(tasks)} checks SEQUENTIALLY: {' → '.join(t[0] for t in tasks)}")
+        # Fail Fast means at most ONE failure is shown, so it gets the whole run budget.
+        sequential_budget = min(b for b in (token_budget, run_token_budget) if b) if (token_budget or run_token_budget) else None
+        for label, fn, _ in tasks:
             print(f"👉 Starting {label}...")
             code, out, dur, cmd = fn()
-            exit_code, saved = print_result(label, code, out, dur, cmd)
+            record(label, code, out, dur)
+            exit_code, saved = print_result(label, code, out, dur, cmd, sequential_budget, fingerprints)
             total_savings += saved
             if exit_code != 0:
                 print("🛑 Fail Fast triggered.")
+                stats.save()
                 return 1
 
+    with trace.span("stats.save"):
+        stats.save()
     total_duration = time.time() - start_total
     
     if overall_failure:
@@ -0,0 +1,170 @@
+import json
+import os
+import shlex
+import sys
+import time
+
+from .impact import DOC_EXTENSIONS, SKIP_DIRS, changed_paths
+from .logger import NO_LEDGER_ENV
+
+# --- Constants ---
+
+# A directory holding any of these is a project with its own gate.
+PROJECT_MARKERS = ("package.json", "Cargo.toml", "go.mod", "pyproject.toml", "setup.py", "requirements.txt")
+
+# Merged per-project config files handed to the child gates.
+PROJECTS_DIR = os.path.join(".lofi-gate", "projects")
+
+# A child gate reads its resolved config from this file instead of ./lofi.toml
+# (and, via NO_LEDGER_ENV, leaves the Ledger to the parent: one entry per project).
+CONFIG_ENV = "LOFI_GATE_CONFIG_FILE"
+
+# Projects verified at the same time (each child may run its own checks in parallel).
+DEFAULT_WORKERS = 4
+
+
+def discover_projects(root="."):
+    """
+    Finds every project root below `root` (including `root` itself).
+    Returns: sorted relative paths ("." for the root).
+    """
+    projects = []
+    for current, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        if any(marker in files for marker in PROJECT_MARKERS):
+            projects.append(os.path.normpath(os.path.relpath(current, root)))
+    return sorted(projects)
+
+
+def owner_of(path, projects):
+    """
+    Returns: the deepest project containing `path`, or None.
+    """
+    path = os.path.normpath(path)
+    owners = [p for p in projects if p == "." or path == p or path.startswith(p + os.sep)]
+    return max(owners, key=lambda p: 0 if p == "." else len(p)) if owners else None
+
+
+def touched_projects(projects, changed):
+    """
+    Keeps only the projects the change touches.
+    A non-doc change outside every project (shared config, CI files) touches them all;
+    `changed=None` (git can't tell) also means all.
+    """
+    if changed is None:
+        return list(projects)
+    selected = set()
+    for path in changed:
+        owner = owner_of(path, projects)
+        if owner is not None:
+            selected.add(owner)
+        elif not path.endswith(DOC_EXTENSIONS):
+            return list(projects)
+    return [p for p in projects if p in selected]
+
+
+def merge_config(base, override):
+    """
+    Deep-merges a project's lofi.toml over the root one (tables merge, values replace).
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def project_config(root_config, project):
+    config = root_config
+    local = os.path.join(project, "lofi.toml")
+    if project != "." and os.path.exists(local):
+        import toml
+        try:
+            config = merge_config(root_config, toml.load(local))
+        except Exception as e:
+            print(f"⚠️  Failed to load {local}: {e}")
+    # A child gate verifies its own directory only.
+    config = merge_config(config, {"project": {"monorepo": False}})
+    return config
+
+
+def project_command(project, config_path, options):
+    """
+    The child gate invocation: its own interpreter, working directory and config.
+    """
+    flags = ["verify", "--no-daemon"]
+    if options.get("parallel"):
+        flags.append("--parallel")
+    if options.get("fail_fast"):
+        flags.append("--fail-fast")
+    if options.get("cache") is not None:
+        flags.append("--cached" if options["cache"] else "--no-cache")
+    if options.get("impact") is not None:
+        flags.append("--impact" if options["impact"] else "--full")
+    if options.get("failed_first") is not None:
+        flags.append("--failed-first" if options["failed_first"] else "--in-order")
+    if options.get("engine"):
+        flags.append(f"--engine {options['engine']}")
+    env = f"{CONFIG_ENV}={shlex.quote(os.path.abspath(config_path))} {NO_LEDGER_ENV}=1"
+    return f"cd {shlex.quote(project)} && {env} {shlex.quote(sys.executable)} -m lofi_gate.cli " + " ".join(flags)
+
+
+def project_label(project):
+    return "Project (root)" if project == "." else f"Project {project}"
+
+
+def plan_projects(config, changed=None, options=None):
+    """
+    Returns: [(project, command)] for every touched project.
+    """
+    projects = discover_projects()
+    selected = touched_projects(projects, changed_paths() if changed is None else changed)
+    print(f"🗂️  Monorepo: {len(projects)} project(s) found, {len(selected)} touched by the change.")
+
+    os.makedirs(PROJECTS_DIR, exist_ok=True)
+    plan = []
+    for project in selected:
+        slug = "root" if project == "." else project.replace(os.sep, "__")
+        config_path = os.path.join(PROJECTS_DIR, f"{slug}.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(project_config(config, project), f, indent=2, default=str)
+        plan.append((project, project_command(project, config_path, options or {})))
+    return plan
+
+
+def run_projects(plan, run, log, workers=DEFAULT_WORKERS):
+    """
+    Runs each child gate on a bounded pool and prints ONE aggregated report.
+    `run(command, label)` executes a command; `log(label, status, output, duration, command)` writes the Ledger.
+    Returns: the overall exit code.
+    """
+    if not plan:
+        print("✨ No project touched by the change. Nothing to verify.")
+        return 0
+    import concurrent.futures
+    start = time.time()
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(int(workers), 1)) as executor:
+        futures = {executor.submit(run, cmd, project_label(project)): (project, cmd) for project, cmd in plan}
+        for future in concurrent.futures.as_completed(futures):
+            project, cmd = futures[future]
+            try:
+                code, output, duration, _ = future.result()
+            except Exception as e:
+                code, output, duration = 1, f"❌ Crashed: {e}", 0.0
+            results[project] = (code, output, duration)
+            print("=" * 40)
+            print(f"{'✅' if code == 0 else '❌'} {project_label(project)} ({duration:.2f}s)")
+            print("=" * 40)
+            print(str(output).rstrip())
+            log(project_label(project), "PASS" if code == 0 else "FAIL", output, duration, cmd)
+
+    print("\n📋 Monorepo summary:")
+    for project, _ in plan:
+        code, _, duration = results[project]
+        print(f"  {'✅' if code == 0 else '❌'} {project} ({duration:.2f}s)")
+    failed = [p for p, (code, _, _) in results.items() if code != 0]
+    print(f"{'❌' if failed else '✨'} {len(plan) - len(failed)}/{len(plan)} project(s) passed in {time.time() - start:.2f}s")
+    return 1 if failed else 0
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import time
+
+from . import __version__
+
+# --- Constants ---
+
+# The resolved plan of the last run: lofi.toml, the package.json scripts and the detected check commands.
+PLAN_PATH = os.path.join(".lofi-gate", "plan.json")
+
+# Everything detection reads or probes. Any change in mtime, size or existence => re-detect.
+PLAN_INPUTS = ["lofi.toml", "package.json", "Cargo.toml", "go.mod", "pyproject.toml", "requirements.txt", "tests"]
+
+# A file modified this recently (seconds) could change again within the same mtime tick
+# without its key changing (coarse filesystem clocks), so no plan is saved from it.
+RACY_WINDOW = 2.0
+
+
+def plan_key(inputs=PLAN_INPUTS):
+    """
+    Fingerprint of the plan inputs from `os.stat` alone (nothing is read or parsed).
+    Returns: (key, newest_mtime)
+    """
+    digest = hashlib.sha256(__version__.encode("utf-8"))
+    newest = 0.0
+    for name in inputs:
+        try:
+            st = os.stat(name)
+        except OSError:
+            digest.update(f"\0{name}\0-".encode("utf-8"))
+            continue
+        if os.path.isdir(name):
+            # Only its existence matters (e.g. `tests/` means pytest).
+            digest.update(f"\0{name}\0dir".encode("utf-8"))
+            continue
+        digest.update(f"\0{name}\0{st.st_mtime_ns}\0{st.st_size}".encode("utf-8"))
+        newest = max(newest, st.st_mtime)
+    return digest.hexdigest(), newest
+
+
+class PlanCache:
+    """
+    The last resolved plan, kept in `.lofi-gate/` and served while its key still matches.
+    """
+    def __init__(self, path=PLAN_PATH):
+        self.path = path
+
+    def get(self, key):
+        """
+        Returns: the plan dict, or None (no plan, other key, unreadable).
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("key") != key:
+            return None
+        return data.get("plan")
+
+    def put(self, key, plan, newest=0.0):
+        """
+        Saves `plan` under `key`, unless an input is too fresh to trust its mtime (see RACY_WINDOW).
+        Returns: True if it was saved.
+        """
+        if time.time() - newest < RACY_WINDOW:
+            return False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "plan": plan}, f, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError, ValueError):
+            # TypeError: a lofi.toml value JSON can't hold (e.g. a TOML datetime). Just don't cache.
+            return False
+        return True
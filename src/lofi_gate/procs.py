@@ -0,0 +1,265 @@
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+
+# --- Constants ---
+
+# Seconds a cancelled process tree gets to exit after SIGTERM before we SIGKILL it.
+GRACE_PERIOD = 3.0
+
+# How often the watchdog samples the tree's memory (seconds).
+WATCHDOG_INTERVAL = 0.25
+
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
+def group_kwargs(kwargs):
+    """
+    Adds the spawn options that put a child in its OWN process group (session),
+    so the whole tree (`npm` -> `node` -> workers) can be signalled at once.
+    """
+    if os.name == "posix":
+        kwargs.setdefault("start_new_session", True)
+    else:
+        kwargs.setdefault("creationflags", getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0))
+    return kwargs
+
+
+def spawn(command, **kwargs):
+    """
+    Starts a shell command in its own process group (see `group_kwargs`).
+    """
+    return subprocess.Popen(command, shell=True, **group_kwargs(kwargs))
+
+
+def signal_tree(process, sig):
+    """
+    Sends `sig` to the process group led by `process` (falls back to the process itself).
+    """
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, sig)
+        elif sig == getattr(signal, "SIGKILL", None):
+            process.kill()
+        else:
+            process.terminate()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def tree_alive(process):
+    """
+    True while the leader OR anything else in its process group is still running.
+    A `sh -c` leader often dies on SIGTERM at once while a grandchild that traps it lives on.
+    """
+    if process.poll() is None:
+        return True
+    if not hasattr(os, "killpg"):
+        return False
+    try:
+        os.killpg(process.pid, 0)
+    except (ProcessLookupError, PermissionError, OSError):
+        return False
+    return True
+
+
+def kill_tree(process, grace=GRACE_PERIOD):
+    """
+    SIGTERM the tree, wait up to `grace` seconds, then SIGKILL whatever is left.
+    """
+    signal_tree(process, signal.SIGTERM)
+    deadline = time.time() + grace
+    while tree_alive(process) and time.time() < deadline:
+        time.sleep(0.05)
+    # Always: the leader's state says nothing about the rest of its group.
+    signal_tree(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+
+def parse_size(value):
+    """
+    Accepts a byte count or a human size ("512M", "2G", "10MB").
+    Returns: bytes (int), or None when unset.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.match(r"^\s*([\d.]+)\s*([kmgt]?)i?b?\s*$", str(value), re.I)
+    if not match:
+        raise ValueError(f"invalid size: {value!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def tree_rss(pgid):
+    """
+    Resident memory of every process in a process group (Linux /proc).
+    Returns: bytes, or None when /proc is unavailable.
+    """
+    if not os.path.isdir("/proc/self"):
+        return None
+    page = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                fields = f.read().rsplit(b")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        # After "(comm)": state ppid pgrp ... rss is the 22nd field.
+        if int(fields[2]) == pgid:
+            total += int(fields[21]) * page
+    return total
+
+
+def limited_command(command, max_memory=None):
+    """
+    Wraps a shell command so its tree starts under RLIMIT_AS: the shell sets it on itself
+    (`ulimit -v`) before running the command, and every process it starts inherits it.
+    Memory is watched tree-wide via /proc where possible (see Watchdog); RLIMIT_AS, which
+    counts reserved address space and trips runtimes like V8 or Go, is only the fallback.
+    No `preexec_fn`: it can deadlock the child while other threads (the parallel pool,
+    watchdogs) are running.
+    Returns: the command to spawn.
+    """
+    if not max_memory or os.path.isdir("/proc/self") or os.name != "posix":
+        return command
+    return f"ulimit -v {max(int(max_memory) // 1024, 1)}; {command}"
+
+
+def renice_tree(process, cpu_niceness=None):
+    """
+    Lowers the priority of the process group led by `process` by `cpu_niceness`, right
+    after spawn. Processes the tree starts later inherit it.
+    """
+    if not cpu_niceness or not hasattr(os, "setpriority"):
+        return
+    try:
+        niceness = os.getpriority(os.PRIO_PROCESS, 0) + int(cpu_niceness)
+        os.setpriority(os.PRIO_PGRP, process.pid, niceness)
+    except OSError:
+        pass
+
+
+class Watchdog:
+    """
+    Enforces wall-clock and memory limits on a process tree from a background thread.
+    When a limit trips, the WHOLE tree is killed and `tripped` holds (status, reason).
+    """
+    def __init__(self, process, timeout=None, max_memory=None, interval=WATCHDOG_INTERVAL):
+        self.process = process
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.interval = interval
+        self.tripped = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.timeout or self.max_memory:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def trip(self, status, reason):
+        with self._lock:
+            if self.tripped:
+                return
+            self.tripped = (status, reason)
+        kill_tree(self.process)
+
+    def _run(self):
+        deadline = time.time() + self.timeout if self.timeout else None
+        while not self._done.wait(self.interval if self.max_memory else max(deadline - time.time(), 0)):
+            if deadline is not None and time.time() >= deadline:
+                self.trip("TIMEOUT", f"timed out after {self.timeout:g}s")
+                return
+            if self.max_memory:
+                rss = tree_rss(self.process.pid)
+                if rss is not None and rss > self.max_memory:
+                    self.trip("LIMIT", f"memory {format_size(rss)} over the {format_size(self.max_memory)} limit")
+                    return
+
+    def stop(self):
+        self._done.set()
+        if self._thread:
+            self._thread.join()
+
+
+class ProcessRegistry:
+    """
+    Tracks the process trees started by the current run so they can be
+    cancelled together (parallel fail-fast).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = {}
+        self._cancelled_pids = set()
+        self.cancelled = threading.Event()
+        self.cancelled_at = None
+
+    def reset(self):
+        with self._lock:
+            self._running = {}
+            self._cancelled_pids = set()
+            self.cancelled = threading.Event()
+            self.cancelled_at = None
+
+    def register(self, label, process):
+        """
+        Returns: False if the run was already cancelled (the process is killed right away).
+        """
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._running[process.pid] = (label, process)
+                return True
+            self._cancelled_pids.add(process.pid)
+        kill_tree(process, grace=0)
+        return False
+
+    def unregister(self, process):
+        with self._lock:
+            self._running.pop(process.pid, None)
+
+    def was_cancelled(self, process):
+        with self._lock:
+            return process.pid in self._cancelled_pids
+
+    def cancel_all(self, grace=GRACE_PERIOD, keep=None):
+        """
+        Cancels every running tree: SIGTERM to all groups at once, then SIGKILL after `grace`.
+        `keep`: a process to spare (a failing check that is still printing its report).
+        Returns: the labels that were cancelled.
+        """
+        with self._lock:
+            if self.cancelled.is_set():
+                return []
+            self.cancelled.set()
+            self.cancelled_at = time.time()
+            victims = [entry for entry in self._running.values() if entry[1] is not keep]
+            self._cancelled_pids.update(p.pid for _, p in victims)
+
+        for _, process in victims:
+            signal_tree(process, signal.SIGTERM)
+        deadline = time.time() + grace
+        for _, process in victims:
+            while tree_alive(process) and time.time() < deadline:
+                time.sleep(0.05)
+            signal_tree(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+        return [label for label, _ in victims]
+
+
+# One registry per process; `run_checks` resets it at the start of every run.
+RUNNING = ProcessRegistry()
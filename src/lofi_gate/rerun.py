@@ -0,0 +1,171 @@
+import json
+import os
+import shlex
+import time
+
+from .capture import CapturedOutput, prepend_output
+from .extract import extractor_for
+
+# --- Constants ---
+
+# Which tests failed in the previous run, per test command (for `failed_first`).
+FAILED_PATH = os.path.join(".lofi-gate", "failed_tests.json")
+
+# Flaky tests are reported with this status (the check itself passes).
+FLAKY = "FLAKY"
+
+
+def framework_of(command):
+    extractor = extractor_for(command)
+    return extractor.framework if extractor else None
+
+
+def _append_runner_args(command, args):
+    # `npm test` forwards arguments to the runner only after "--".
+    if command.startswith("npm ") and " -- " not in command:
+        return f"{command} -- {args}"
+    return f"{command} {args}"
+
+
+def targeted_command(command, names):
+    """
+    Narrows a test command to the tests that just failed:
+    pytest `--lf`, jest `--onlyFailures`, `go test -run '^(A|B)$'`, `cargo test -- --exact a b`.
+    pytest and jest remember the failures themselves; go and cargo get the names.
+    Returns: the command, or None when this runner can't be narrowed.
+    """
+    framework = framework_of(command)
+    if framework == "pytest":
+        return f"{command} --lf"
+    if framework == "jest":
+        # vitest has no equivalent flag.
+        return None if "vitest" in command else _append_runner_args(command, "--onlyFailures")
+    if not names:
+        return None
+    if framework == "go test" and command.count("go test") == 1:
+        # Subtests run with their parent.
+        tests = sorted({name.split("/")[0] for name in names})
+        return command.replace("go test", "go test -run " + shlex.quote(f"^({'|'.join(tests)})$"), 1)
+    if framework == "cargo test":
+        filters = " ".join(shlex.quote(name) for name in sorted(names))
+        if " -- " in command:
+            return f"{command} --exact {filters}"
+        return f"{command} -- --exact {filters}"
+    return None
+
+
+def failed_first_command(command):
+    """
+    pytest can run the last failures first and then the rest in ONE run (`--ff`).
+    Returns: that command, or None (other runners get a separate failures-only phase).
+    """
+    return f"{command} --ff" if framework_of(command) == "pytest" else None
+
+
+def failed_names(output):
+    """
+    Returns: the names of the failing tests found by the extractor, or None when
+    they aren't all known (no parser, or more failures than it keeps).
+    """
+    extraction = getattr(output, "extraction", None)
+    if not extraction or not extraction.failures or extraction.dropped:
+        return None
+    return [failure.name for failure in extraction.failures]
+
+
+class FailedTests:
+    """
+    The failing test names of the last run of each test command, kept in `.lofi-gate/`.
+    """
+    def __init__(self, path=FAILED_PATH):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, command):
+        return self.data.get(command, [])
+
+    def set(self, command, names):
+        if names:
+            self.data[command] = list(names)
+        else:
+            self.data.pop(command, None)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def _annotate(output, flaky, time_saved):
+    if not isinstance(output, CapturedOutput):
+        output = CapturedOutput(output)
+    output.flaky = sorted(flaky)
+    output.time_saved = time_saved
+    return output
+
+
+def run_tests(command, run_command, label="Tests", failed_first=False, retries=0, expected=None, store=None):
+    """
+    Runs the Test Suite with failed-first ordering and targeted retries.
+
+    `failed_first`: run the tests that failed last time BEFORE the rest. pytest does it
+    in one run (`--ff`); other runners first run only those tests and stop there if they still fail.
+    `retries`: rerun ONLY the failing tests up to N times. Tests that pass on a retry are flaky;
+    if every failure was flaky the suite passes and the output carries `flaky` (their names).
+    `expected`: typical duration of a full run (seconds), to estimate the wall time saved
+    compared with full reruns (`time_saved` on the output).
+    Returns: (exit_code, output_text, duration_seconds, command_string)
+    """
+    store = store or FailedTests()
+    start = time.time()
+    previous = store.get(command)
+    main_command = command
+
+    if failed_first and previous:
+        main_command = failed_first_command(command) or command
+        targeted = None if main_command != command else targeted_command(command, previous)
+        if targeted:
+            print(f"⏮️  Failed first: rerunning {len(previous)} test(s) that failed last time")
+            code, output, duration, cmd = run_command(targeted, label)
+            if code != 0 and not getattr(output, "status", None):
+                # Still broken: no need to run the rest of the suite to know that.
+                store.set(command, failed_names(output) or previous)
+                saved = max(expected - duration, 0) if expected else 0.0
+                return code, _annotate(output, [], saved), time.time() - start, cmd
+
+    code, output, duration, cmd = run_command(main_command, label)
+    failing = failed_names(output)
+    flaky = set()
+    saved = 0.0
+    if code != 0 and retries and failing and not getattr(output, "status", None):
+        for attempt in range(1, int(retries) + 1):
+            targeted = targeted_command(command, failing)
+            if not targeted:
+                break
+            print(f"🔁 Retry {attempt}/{retries}: rerunning {len(failing)} failing test(s)")
+            retry_code, retry_output, retry_duration, _ = run_command(targeted, label)
+            saved += max(duration - retry_duration, 0)
+            if getattr(retry_output, "status", None):
+                break
+            if retry_code == 0:
+                flaky.update(failing)
+                failing = []
+                break
+            still = failed_names(retry_output)
+            if still is None:
+                break
+            flaky.update(set(failing) - set(still))
+            failing = still
+        if not failing:
+            code = 0
+        elif flaky:
+            output = prepend_output(f"🎲 Flaky (passed on retry): {', '.join(sorted(flaky))}\n", output)
+    store.set(command, failing if code != 0 else [])
+    return code, _annotate(output, flaky, saved), time.time() - start, cmd
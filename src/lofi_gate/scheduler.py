@@ -0,0 +1,104 @@
+# --- Constants ---
+
+# What we assume about a check we've never seen run.
+DEFAULT_FAIL_RATE = 0.5
+DEFAULT_DURATION = 1.0
+
+# Floor so a 0.01s check doesn't get an infinite "cheap" score.
+MIN_DURATION = 0.1
+
+
+def _expectations(tasks, stats):
+    """
+    Returns: {label: (expected_duration, fail_rate)}, filling gaps with sensible priors.
+    Unknown durations get the average of the known ones, so a new check lands mid-pack.
+    """
+    known = [d for d in (stats.expected_duration(t[0]) for t in tasks) if d is not None]
+    fallback = sum(known) / len(known) if known else DEFAULT_DURATION
+    result = {}
+    for task in tasks:
+        label = task[0]
+        duration = stats.expected_duration(label)
+        fail_rate = stats.fail_rate(label)
+        result[label] = (
+            fallback if duration is None else duration,
+            DEFAULT_FAIL_RATE if fail_rate is None else fail_rate,
+        )
+    return result
+
+
+def order_sequential(tasks, stats):
+    """
+    Sequential mode stops at the first failure, so we want failures EARLY:
+    run the checks that are cheap and likely to fail first (highest fail_rate / duration).
+    Ties (e.g. no history at all) keep the original order.
+    """
+    expect = _expectations(tasks, stats)
+
+    def score(task):
+        duration, fail_rate = expect[task[0]]
+        return -(fail_rate + 0.01) / max(duration, MIN_DURATION)
+
+    return sorted(tasks, key=score)
+
+
+def order_parallel(tasks, stats):
+    """
+    Parallel mode waits for the slowest check, so start the LONGEST checks first
+    (Longest Processing Time first) to cut total wall time.
+    """
+    expect = _expectations(tasks, stats)
+    return sorted(tasks, key=lambda task: -expect[task[0]][0])
+
+
+class WeightedScheduler:
+    """
+    Runs tasks on an executor while respecting a CPU budget.
+
+    Each task has a weight (e.g. `cargo test` = 4, `cargo check` = 2). A task only
+    starts when the sum of running weights stays within `capacity`. Pending tasks
+    are started in priority order, first-fit (a light task may overtake a heavy one
+    that doesn't fit yet).
+    """
+    def __init__(self, executor, capacity=None, weights=None):
+        self.executor = executor
+        self.capacity = capacity
+        self.weights = weights or {}
+
+    def weight_of(self, label):
+        weight = max(self.weights.get(label, 1), 0)
+        if self.capacity:
+            # A task heavier than the whole machine still has to run eventually.
+            weight = min(weight, self.capacity)
+        return weight
+
+    def run(self, tasks, should_stop=lambda: False):
+        """
+        Yields (task, future) as each task completes.
+        Once `should_stop()` is True, tasks that never started are yielded as (task, None).
+        """
+        import concurrent.futures
+        pending = list(tasks)
+        running = {}
+        used = 0
+
+        while pending or running:
+            if should_stop():
+                for task in pending:
+                    yield task, None
+                pending = []
+            else:
+                for task in list(pending):
+                    weight = self.weight_of(task[0])
+                    if self.capacity is None or used + weight <= self.capacity or not running:
+                        running[self.executor.submit(task[1])] = (task, weight)
+                        used += weight
+                        pending.remove(task)
+
+            if not running:
+                continue
+            done, _ = concurrent.futures.wait(list(running), return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                task, weight = running.pop(future)
+                used -= weight
+                yield task, future
@@ -0,0 +1,165 @@
+import contextlib
+import io
+import json
+import os
+import socketserver
+import threading
+
+from .cache import tree_state_key
+from .client import SOCKET_PATH, VERIFY_OPTIONS, request
+from .logic import load_config, load_scripts, run_checks
+
+# --- Constants ---
+
+# Reloading these changes what `verify` runs.
+WATCHED_FILES = ("lofi.toml", "package.json")
+
+
+class WarmState:
+    """
+    Config + detection kept in memory between requests.
+    Reloaded only when lofi.toml or package.json change on disk.
+    """
+    def __init__(self):
+        self._stamps = None
+        self.config = {}
+        self.scripts = {}
+
+    def _read_stamps(self):
+        stamps = []
+        for name in WATCHED_FILES:
+            try:
+                st = os.stat(name)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append(None)
+        return stamps
+
+    def refresh(self):
+        stamps = self._read_stamps()
+        if stamps != self._stamps:
+            self.config = load_config()
+            self.scripts = load_scripts()
+            self._stamps = stamps
+
+
+class Coordinator:
+    """
+    Coalesces identical requests.
+
+    A request is keyed by (tree state, options). While a run for a key is queued or
+    in progress, every new request with the same key attaches to it and gets the
+    same result. Different keys run one after another (checks share the CPU,
+    the Ledger and process-wide capture settings).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._inflight = {}
+
+    def submit(self, key, execute):
+        """
+        Runs `execute()` unless an identical run is already pending (key None never coalesces).
+        Returns: (result, coalesced)
+        """
+        with self._lock:
+            run = self._inflight.get(key) if key is not None else None
+            coalesced = run is not None
+            if run is None:
+                run = {"done": threading.Event(), "result": None}
+                if key is not None:
+                    self._inflight[key] = run
+
+        if coalesced:
+            run["done"].wait()
+            return run["result"], True
+
+        try:
+            with self._run_lock:
+                run["result"] = execute()
+        except Exception as e:
+            run["result"] = {"exit_code": 1, "output": f"❌ Gate daemon crashed: {e}\n"}
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is run:
+                    del self._inflight[key]
+            run["done"].set()
+        return run["result"], False
+
+
+class Daemon:
+    def __init__(self):
+        self.state = WarmState()
+        self.coordinator = Coordinator()
+
+    def verify(self, options):
+        options = {k: options.get(k) for k in VERIFY_OPTIONS}
+        options["parallel"] = bool(options.get("parallel"))
+        options["fail_fast"] = bool(options.get("fail_fast"))
+        self.state.refresh()
+        tree_key = tree_state_key(self.state.config)
+        key = None if tree_key is None else f"{tree_key}:{json.dumps(options, sort_keys=True)}"
+
+        def execute():
+            self.state.refresh()
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                exit_code = run_checks(config=self.state.config, scripts=self.state.scripts, **options)
+            return {"exit_code": exit_code, "output": output.getvalue()}
+
+        result, coalesced = self.coordinator.submit(key, execute)
+        return dict(result, coalesced=coalesced)
+
+    def handle(self, message):
+        cmd = message.get("cmd")
+        if cmd == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if cmd == "verify":
+            return self.verify(message.get("options") or {})
+        return {"error": f"unknown command: {cmd}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            reply = self.server.gate.handle(json.loads(line.decode("utf-8")))
+        except ValueError:
+            reply = {"error": "malformed request"}
+        try:
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+        except OSError:
+            # The client went away; other attached clients still get their copy.
+            pass
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(path=SOCKET_PATH):
+    """
+    Binds the daemon socket, replacing a stale one.
+    Raises: RuntimeError if another daemon is already serving this checkout.
+    """
+    if os.path.exists(path):
+        if request({"cmd": "ping"}, path, timeout=2) is not None:
+            raise RuntimeError(f"a gate daemon is already listening on {path}")
+        os.unlink(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    server = _Server(path, _Handler)
+    server.gate = Daemon()
+    return server
+
+
+def serve(path=SOCKET_PATH):
+    server = make_server(path)
+    print(f"🛰️  LoFi Gate daemon listening on {path} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
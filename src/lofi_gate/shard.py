@@ -0,0 +1,293 @@
+import os
+import re
+import shlex
+import subprocess
+import time
+
+from .capture import CapturedOutput
+from .extract import Extraction, MAX_FAILURES
+
+# --- Constants ---
+
+# Stats keys for per-unit timings look like "Test Suite::tests/test_api.py".
+# Units are test files (pytest), packages (go) and test modules (cargo), never single tests,
+# so both the shard commands and stats.json stay proportional to the size of the tree.
+UNIT_PREFIX = "Test Suite::"
+
+# A shard command is ONE `sh -c` argument, which Linux caps at 128 KiB (MAX_ARG_STRLEN).
+# Longer => run the suite unsharded rather than fail with "Argument list too long".
+MAX_COMMAND_CHARS = 100000
+
+# `go test` prints one result line per package: "ok  	example.com/pkg	0.123s".
+GO_RESULT = re.compile(r"^(?:ok|FAIL)\s+(\S+)\s+([\d.]+)s", re.M)
+
+PYTEST_RUNNERS = ("python -m pytest", "pytest")
+
+
+def _list(command):
+    """
+    Runs a listing command (collection only, nothing is executed).
+    Returns: its stdout, or None if it failed.
+    """
+    try:
+        result = subprocess.run(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except Exception:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+# --- pytest ---
+
+def _pytest_split(test_cmd):
+    """
+    Returns: (runner, options) where `options` drops positional paths / node IDs,
+    or None if this is not a pytest command.
+    """
+    for runner in PYTEST_RUNNERS:
+        if test_cmd == runner or test_cmd.startswith(runner + " "):
+            args = shlex.split(test_cmd[len(runner):])
+            options = [a for a in args if not os.path.exists(a.split("::")[0])]
+            return runner, options
+    return None
+
+
+def pytest_units(test_cmd):
+    """
+    Returns: the test FILES that hold collected tests, in collection order.
+    """
+    split = _pytest_split(test_cmd)
+    if not split:
+        return None
+    out = _list(f"{test_cmd} --collect-only -q")
+    if out is None:
+        return None
+    node_ids = [line.strip() for line in out.splitlines() if "::" in line and not line.startswith(" ")]
+    return list(dict.fromkeys(node_id.split("::", 1)[0] for node_id in node_ids))
+
+
+def pytest_command(test_cmd, units):
+    runner, options = _pytest_split(test_cmd)
+    return " ".join([runner] + [shlex.quote(a) for a in options + list(units)])
+
+
+# --- go ---
+
+def _go_args(test_cmd):
+    args = shlex.split(test_cmd[len("go test"):])
+    flags = [a for a in args if a.startswith("-")]
+    packages = [a for a in args if not a.startswith("-")] or ["./..."]
+    return flags, packages
+
+
+def go_units(test_cmd):
+    if not test_cmd.startswith("go test"):
+        return None
+    _, packages = _go_args(test_cmd)
+    out = _list("go list " + " ".join(shlex.quote(p) for p in packages))
+    if out is None:
+        return None
+    return [line.strip() for line in out.splitlines() if line.strip()]
+
+
+def go_command(test_cmd, units):
+    flags, _ = _go_args(test_cmd)
+    return " ".join(["go test"] + [shlex.quote(a) for a in flags + list(units)])
+
+
+# --- cargo ---
+
+def _cargo_args(test_cmd):
+    head, _, tail = test_cmd[len("cargo test"):].partition(" -- ")
+    return head.strip(), tail.strip()
+
+
+def cargo_units(test_cmd):
+    """
+    Returns: the test modules (`a::b::` for `a::b::test_x`), plus the names of top-level tests.
+    """
+    if not test_cmd.startswith("cargo test"):
+        return None
+    head, _ = _cargo_args(test_cmd)
+    out = _list(f"cargo test {head} -- --list".replace("  ", " "))
+    if out is None:
+        return None
+    units = []
+    for line in out.splitlines():
+        if line.endswith(": test"):
+            name = line[:-len(": test")]
+            module, sep, _ = name.rpartition("::")
+            units.append(module + sep if sep else name)
+    return list(dict.fromkeys(units))
+
+
+def cargo_command(test_cmd, units):
+    """
+    libtest filters are substrings: `a::b::` runs every test of that module. A filter can
+    also match inside a longer path (`b::` in `ab::`), which only runs a test twice, never skips one.
+    """
+    head, tail = _cargo_args(test_cmd)
+    parts = ["cargo test"] + ([head] if head else []) + ["--"] + ([tail] if tail else [])
+    return " ".join(parts + [shlex.quote(u) for u in units])
+
+
+# --- Planning ---
+
+def partition(units, count, durations=None):
+    """
+    Splits `units` into at most `count` shards of roughly equal expected duration
+    (greedy Longest Processing Time first). Units without history are assumed to
+    take the average of the known ones, so with no history this is a split by count.
+    Returns: a list of non-empty lists, each in the original relative order.
+    """
+    durations = durations or {}
+    known = [d for d in (durations.get(u) for u in units) if d is not None]
+    fallback = sum(known) / len(known) if known else 1.0
+    cost = {u: fallback if durations.get(u) is None else durations[u] for u in units}
+
+    bins = [[0.0, []] for _ in range(min(count, len(units)))]
+    for unit in sorted(units, key=lambda u: -cost[u]):
+        lightest = min(bins, key=lambda b: b[0])
+        lightest[0] += cost[unit]
+        lightest[1].append(unit)
+
+    position = {u: i for i, u in enumerate(units)}
+    return [sorted(b[1], key=position.get) for b in bins if b[1]]
+
+
+def plan_shards(test_cmd, count, scripts=None, stats=None):
+    """
+    Builds one command per shard using the framework's native mechanism.
+    Returns: (commands, groups) where `groups[i]` are the units of shard i
+    (None for jest, which shards itself), or None to run the suite unsharded.
+    """
+    if count < 2 or not test_cmd:
+        return None
+    scripts = scripts or {}
+
+    if test_cmd.startswith("npm"):
+        script = scripts.get("test:agent" if "test:agent" in test_cmd else "test", "")
+        if "jest" not in script:
+            return None
+        separator = " " if " -- " in test_cmd else " -- "
+        commands = [f"{test_cmd}{separator}--shard={i}/{count}" for i in range(1, count + 1)]
+        return commands, [None] * count
+
+    for lister, builder in ((pytest_units, pytest_command), (go_units, go_command), (cargo_units, cargo_command)):
+        units = lister(test_cmd)
+        if units is None:
+            continue
+        if len(units) < 2:
+            return None
+        durations = {u: stats.expected_duration(UNIT_PREFIX + u) for u in units} if stats else {}
+        groups = partition(units, count, durations)
+        commands = [builder(test_cmd, g) for g in groups]
+        if max(len(c) for c in commands) > MAX_COMMAND_CHARS:
+            print(f"🧩 Shard commands would exceed {MAX_COMMAND_CHARS} chars. Running the suite unsharded.")
+            return None
+        return commands, groups
+    return None
+
+
+# --- Running ---
+
+def record_unit_timings(stats, groups, results):
+    """
+    Teaches `stats` how long each unit took, so the next run balances by time.
+    Go reports per-package times; otherwise a shard's time is split between its
+    units in proportion to what we expected them to cost.
+    """
+    for units, (_, out, dur, command) in zip(groups, results):
+        if not units or getattr(out, "status", None):
+            continue
+        reported = {}
+        if command.startswith("go test"):
+            reported = {m.group(1): float(m.group(2)) for m in GO_RESULT.finditer(out)}
+        priors = [stats.expected_duration(UNIT_PREFIX + u) or 1.0 for u in units]
+        scale = dur / sum(priors) if priors else 0
+        for unit, prior in zip(units, priors):
+            stats.record(UNIT_PREFIX + unit, reported.get(unit, prior * scale))
+    # Units that no longer exist (deleted files, keys from older versions) are forgotten.
+    stats.prune(UNIT_PREFIX, {UNIT_PREFIX + u for units in groups if units for u in units})
+
+
+def merge_results(results, wall_time):
+    """
+    Folds the shard results into ONE (code, output, duration, timings) result.
+    Failing shards come first so truncation keeps their output.
+    """
+    count = len(results)
+    sections = []
+    failures = []
+    dropped = 0
+    framework = None
+    code = 0
+    for index, (shard_code, out, dur, _) in enumerate(results, 1):
+        header = f"── Shard {index}/{count} ({dur:.2f}s, exit {shard_code}) ──"
+        sections.append((shard_code == 0, index, f"{header}\n{out}"))
+        if shard_code != 0 and code == 0:
+            code = shard_code
+        extraction = getattr(out, "extraction", None)
+        if extraction is not None:
+            framework = extraction.framework
+            failures.extend(extraction.failures)
+            dropped += extraction.dropped
+
+    text = "\n".join(s[2] for s in sorted(sections))
+    outputs = [r[1] for r in results]
+    tokens = [getattr(o, "tokens", None) for o in outputs]
+    merged = CapturedOutput(
+        text,
+        total_chars=sum(getattr(o, "total_chars", len(o)) for o in outputs),
+        total_bytes=sum(getattr(o, "total_bytes", len(o)) for o in outputs),
+        omitted_chars=sum(getattr(o, "omitted_chars", 0) for o in outputs),
+        spill_path=", ".join(o.spill_path for o in outputs if getattr(o, "spill_path", None)) or None,
+        extraction=Extraction(framework, failures[:MAX_FAILURES], dropped + max(len(failures) - MAX_FAILURES, 0)) if framework else None,
+        tokens=sum(tokens) if None not in tokens else None,
+        raw_chars=sum(getattr(o, "raw_chars", len(o)) for o in outputs),
+        filter_savings=merge_savings(getattr(o, "filter_savings", None) for o in outputs),
+    )
+    # One stopped shard stops the suite: a cancel wins, otherwise the first timeout / limit.
+    stopped = [o for o in outputs if getattr(o, "status", None)]
+    if stopped:
+        first = next((o for o in stopped if o.status == "CANCELLED"), stopped[0])
+        merged.status = first.status
+        merged.status_detail = first.status_detail
+
+    timings = ", ".join(f"{i}/{count} {r[2]:.2f}s" for i, r in enumerate(results, 1))
+    return code, merged, wall_time, timings
+
+
+def merge_savings(savings):
+    merged = {}
+    for per_filter in savings:
+        for name, saved in (per_filter or {}).items():
+            merged[name] = merged.get(name, 0) + saved
+    return merged
+
+
+def run_shards(commands, run):
+    """
+    Runs every shard command concurrently through `run(command, label)`.
+    Returns: the per-shard (code, output, duration, command) results, in shard order.
+    """
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        futures = [executor.submit(run, cmd, "Tests") for cmd in commands]
+        return [f.result() for f in futures]
+
+
+def run_sharded(test_cmd, plan, run, stats=None):
+    """
+    Runs a sharded Test Suite and reports it as a single check.
+    The per-shard timings ride on the output (`shard_timings`), not in the command,
+    so the command stays the same from run to run (failure fingerprints, history.db).
+    Returns: (code, merged_output, wall_time, test_cmd)
+    """
+    commands, groups = plan
+    start = time.time()
+    results = run_shards(commands, run)
+    if stats is not None:
+        record_unit_timings(stats, groups, results)
+    code, merged, wall_time, timings = merge_results(results, time.time() - start)
+    merged.shard_timings = f"{len(commands)} shards: {timings}"
+    return code, merged, wall_time, test_cmd
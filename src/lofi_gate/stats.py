@@ -0,0 +1,75 @@
+import json
+import os
+
+# --- Constants ---
+
+# Per-check timing history used to estimate how long a check "usually" takes.
+STATS_PATH = os.path.join(".lofi-gate", "stats.json")
+
+# Weight of the newest sample in the moving average (higher = adapts faster).
+EWMA_ALPHA = 0.3
+
+
+class CheckStats:
+    """
+    Small persistent record of how each check behaved in past runs.
+    Keyed by check label; holds exponentially-weighted averages of the
+    duration and of the failure rate.
+    """
+    def __init__(self, path=STATS_PATH):
+        self.path = path
+        self.data = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def record(self, label, duration, failed=False):
+        outcome = 1.0 if failed else 0.0
+        entry = self.data.setdefault(label, {"duration": duration, "fail_rate": outcome, "runs": 0})
+        if entry["runs"]:
+            entry["duration"] = EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * entry["duration"]
+            entry["fail_rate"] = EWMA_ALPHA * outcome + (1 - EWMA_ALPHA) * entry.get("fail_rate", outcome)
+        else:
+            entry["duration"] = duration
+            entry["fail_rate"] = outcome
+        entry["runs"] += 1
+
+    def add_time_saved(self, label, seconds):
+        """
+        Accumulates wall time saved for a check (e.g. targeted reruns instead of full ones).
+        """
+        entry = self.data.get(label)
+        if entry is not None and seconds > 0:
+            entry["time_saved"] = entry.get("time_saved", 0.0) + seconds
+
+    def prune(self, prefix, keep):
+        """
+        Drops every entry whose key starts with `prefix` and is not in `keep`.
+        """
+        self.data = {k: v for k, v in self.data.items() if not k.startswith(prefix) or k in keep}
+
+    def expected_duration(self, label):
+        """
+        Returns: the typical duration in seconds, or None if we've never seen this check.
+        """
+        entry = self.data.get(label)
+        return entry["duration"] if entry else None
+
+    def fail_rate(self, label):
+        """
+        Returns: the recent failure rate (0.0 - 1.0), or None if we've never seen this check.
+        """
+        entry = self.data.get(label)
+        return entry.get("fail_rate") if entry else None
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+from . import trace
+
+# --- Constants ---
+
+# Test naming conventions per language, keyed by the TEST file's extension.
+# `{name}` is the module under test; the file extension is not part of the pattern.
+DEFAULT_CONVENTIONS = {
+    ".py": ["test_{name}", "{name}_test", "{name}_tests"],
+    ".js": ["{name}.test", "{name}.spec"],
+    ".jsx": ["{name}.test", "{name}.spec"],
+    ".ts": ["{name}.test", "{name}.spec"],
+    ".tsx": ["{name}.test", "{name}.spec"],
+    ".go": ["{name}_test"],
+    ".rs": ["{name}_test", "{name}_tests", "test_{name}"],
+}
+
+# Any file inside one of these directories is a test for the module with the same name
+# (`tests/parser.rs`, `src/components/__tests__/Button.tsx`).
+TEST_DIRS = {"test", "tests", "__tests__", "spec", "specs"}
+
+# Modules that never need a test of their own.
+EXEMPT_NAMES = {"__init__", "__main__"}
+
+# The tracked part of the index only changes when the git index does.
+INDEX_PATH = os.path.join(".lofi-gate", "tdd_index.json")
+
+
+def normalize(name):
+    """
+    `user_service`, `user-service` and `UserService` are the same module.
+    """
+    return re.sub(r"[-_.]", "", name).lower()
+
+
+def load_conventions(settings=None):
+    """
+    Merges `[checks.tdd] conventions` (per extension, e.g. `py = ["check_{name}"]`) over the defaults.
+    """
+    conventions = dict(DEFAULT_CONVENTIONS)
+    for ext, patterns in ((settings or {}).get("conventions") or {}).items():
+        ext = ext if ext.startswith(".") else "." + ext
+        conventions[ext] = list(patterns)
+    return conventions
+
+
+def _compile(conventions):
+    compiled = {}
+    for ext, patterns in conventions.items():
+        compiled[ext] = [
+            re.compile("^" + re.escape(p).replace(re.escape("{name}"), "(?P<name>.+)") + "$", re.I)
+            for p in patterns
+        ]
+    return compiled
+
+
+def is_test_path(path):
+    """
+    Tests, specs and benchmarks exercise code rather than being code that needs a test.
+    """
+    lowered = path.lower()
+    return "test" in lowered or "spec" in lowered or "bench" in lowered
+
+
+def subjects_of(path, compiled):
+    """
+    Returns: the normalized module names a test file covers (empty if it isn't a test).
+    """
+    stem, ext = os.path.splitext(os.path.basename(path))
+    patterns = compiled.get(ext)
+    if patterns is None:
+        return set()
+    subjects = set()
+    for pattern in patterns:
+        match = pattern.match(stem)
+        if match:
+            subjects.add(normalize(match.group("name")))
+    if not subjects and TEST_DIRS & set(os.path.normpath(path).split(os.sep)[:-1]):
+        subjects.add(normalize(stem))
+    return subjects
+
+
+def build_index(paths, compiled):
+    """
+    Returns: the set of normalized module names that have at least one test.
+    """
+    covered = set()
+    for path in paths:
+        covered |= subjects_of(path, compiled)
+    return covered
+
+
+def _git_lines(args):
+    result = subprocess.run(["git"] + args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed")
+    return [line for line in result.stdout.split("\0") if line]
+
+
+def _index_stamp():
+    """
+    Identifies the current state of .git/index (it is rewritten whenever tracked files change).
+    """
+    path = subprocess.run(["git", "rev-parse", "--git-path", "index"], stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size, os.getcwd()]
+    except OSError:
+        return None
+
+
+def tracked_index(conventions, compiled, index_path=INDEX_PATH):
+    """
+    The tracked half of the index, rebuilt only when .git/index or the conventions change.
+    """
+    stamp = _index_stamp()
+    digest = hashlib.sha256(json.dumps(conventions, sort_keys=True).encode("utf-8")).hexdigest()
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if stamp is not None and cached.get("stamp") == stamp and cached.get("conventions") == digest:
+            return set(cached["covered"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    with trace.span("tdd.index_rebuild"):
+        covered = build_index(_git_lines(["ls-files", "-z"]), compiled)
+    if stamp is not None:
+        try:
+            os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+            tmp_path = index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stamp": stamp, "conventions": digest, "covered": sorted(covered)}, f)
+            os.replace(tmp_path, index_path)
+        except OSError:
+            pass
+    return covered
+
+
+def find_violations(settings=None, index_path=INDEX_PATH):
+    """
+    Lists new source files (untracked or staged as added) that have no test anywhere in the repo.
+    """
+    conventions = load_conventions(settings)
+    compiled = _compile(conventions)
+
+    untracked = _git_lines(["ls-files", "--others", "--exclude-standard", "-z"])
+    added = _git_lines(["diff", "--cached", "--name-only", "--relative", "--diff-filter=A", "-z"])
+    covered = tracked_index(conventions, compiled, index_path) | build_index(untracked, compiled)
+
+    violations = []
+    for path in sorted(set(untracked) | set(added)):
+        stem, ext = os.path.splitext(os.path.basename(path))
+        if ext not in conventions or stem in EXEMPT_NAMES or is_test_path(path) or subjects_of(path, compiled):
+            continue
+        if normalize(stem) not in covered:
+            violations.append(path)
+    return violations
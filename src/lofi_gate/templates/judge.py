@@ -1,5 +1,17 @@
 #!/usr/bin/env python3
 import sys
+
+if __name__ == "__main__":
+    # Fast path: a running `lofi-gate serve` daemon answers without importing the gate,
+    # and attaches us to an identical run that is already in progress.
+    try:
+        from lofi_gate.client import verify_via_daemon
+        exit_code = verify_via_daemon()
+        if exit_code is not None:
+            sys.exit(exit_code)
+    except ImportError:
+        pass
+
 try:
     from lofi_gate.logic import run_checks
 except ImportError:
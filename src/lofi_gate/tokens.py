@@ -0,0 +1,125 @@
+import threading
+
+# --- Constants ---
+
+# The encoding used for token-accurate budgets (GPT-4 / GPT-3.5 family).
+ENCODING_NAME = "cl100k_base"
+
+# Long outputs are encoded in slices of this many chars, so we never build
+# one giant token list for a multi-MB log.
+CHUNK_CHARS = 64 * 1024
+
+# Each check gets at least this many tokens when a run budget is split.
+MIN_CHECK_BUDGET = 100
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    """
+    Lazily imports `tiktoken` and loads the encoding ONCE per process.
+    Nothing is imported unless a token budget is configured, so default startup stays fast.
+    Returns: the encoding, or None if tiktoken (or its vocab file) is unavailable.
+    """
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:
+                print(f"⚠️  tiktoken unavailable ({type(e).__name__}). Falling back to the 4-chars-per-token heuristic.")
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text):
+    """
+    Counts tokens with the real tokenizer, slice by slice.
+    Falls back to the `len // 4` heuristic when no encoder is available.
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // 4
+    total = 0
+    for start in range(0, len(text), CHUNK_CHARS):
+        total += len(encoding.encode_ordinary(text[start:start + CHUNK_CHARS]))
+    return total
+
+
+class TokenCounter:
+    """
+    Incremental counter fed by StreamCapture, so the FULL stream is counted
+    even though only its head/tail is kept in memory.
+    """
+    def __init__(self):
+        self.tokens = 0
+
+    def feed(self, text):
+        self.tokens += count_tokens(text)
+
+
+def truncate_to_tokens(text, budget, marker="\n... [Truncated {omitted} tokens] ...\n"):
+    """
+    Keeps the first and last `budget / 2` tokens of `text`.
+    Only the edges are encoded (not the whole text), so this is cheap on huge inputs.
+    Returns: (truncated_text, kept_tokens)
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        if len(text) <= budget * 4:
+            return text, len(text) // 4
+        half = budget * 2
+        return text[:half] + marker.format(omitted=(len(text) - 2 * half) // 4) + text[-half:], budget
+
+    # 8 chars per token is a safe upper bound for source code and logs.
+    window = budget * 8
+    if len(text) <= window * 2:
+        tokens = encoding.encode_ordinary(text)
+        if len(tokens) <= budget:
+            return text, len(tokens)
+        half = budget // 2
+        omitted = len(tokens) - 2 * half
+        return encoding.decode(tokens[:half]) + marker.format(omitted=omitted) + encoding.decode(tokens[-half:]), budget
+
+    half = budget // 2
+    head = encoding.encode_ordinary(text[:window])[:half]
+    tail = encoding.encode_ordinary(text[-window:])[-half:]
+    omitted = max(count_tokens(text) - len(head) - len(tail), 0)
+    return encoding.decode(head) + marker.format(omitted=omitted) + encoding.decode(tail), len(head) + len(tail)
+
+
+def allocate_budget(run_budget, sizes, per_check=None):
+    """
+    Splits a run-wide token budget across failing checks, proportionally to how
+    much each one printed (a 50k-token test failure deserves more than a 200-token lint error).
+    Checks whose share falls below the floor (MIN_CHECK_BUDGET, or an equal split of a small
+    budget) get the floor first; the rest is split among the others. Never exceeds `run_budget`.
+    `sizes`: {label: raw_tokens}
+    Returns: {label: budget}
+    """
+    if not sizes:
+        return {}
+    floor = min(MIN_CHECK_BUDGET, run_budget // len(sizes))
+    budgets = {}
+    left, remaining = run_budget, {label: max(size, 1) for label, size in sizes.items()}
+    while remaining:
+        total = sum(remaining.values())
+        floored = [label for label, size in remaining.items() if int(left * size / total) < floor]
+        if not floored:
+            break
+        for label in floored:
+            budgets[label] = floor
+            left -= floor
+            del remaining[label]
+    total = sum(remaining.values())
+    for label, size in remaining.items():
+        budgets[label] = int(left * size / total)
+    if per_check:
+        budgets = {label: min(share, per_check) for label, share in budgets.items()}
+    return {label: budgets[label] for label in sizes}
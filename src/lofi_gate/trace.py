@@ -0,0 +1,137 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# --- Constants ---
+
+# Where `verify --profile` writes the trace (open it in chrome://tracing or https://ui.perfetto.dev).
+TRACE_PATH = os.path.join(".lofi-gate", "profile.json")
+
+# Rows in the printed "slowest phases" table.
+SUMMARY_ROWS = 12
+
+# Returned by `span()` while tracing is off: entering/exiting it is all the overhead we add.
+_NULL_SPAN = contextlib.nullcontext()
+
+# The active Tracer (None = tracing off).
+_tracer = None
+
+
+class Tracer:
+    """
+    Collects timed spans from every thread of this process.
+    Spans are stored as Chrome trace "complete" events (ph = "X"), timestamps in microseconds.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, category, start, end, args=None):
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": self.pid,
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    @contextlib.contextmanager
+    def span(self, name, category, args):
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(name, category, start, time.perf_counter(), args)
+
+    def chrome_trace(self):
+        """
+        Returns: the trace as a Chrome trace-event JSON object (with process/thread names).
+        """
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+        meta = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "lofi-gate"}}]
+        for tid, name in threads.items():
+            meta.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}})
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+    def write(self, path=TRACE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        os.replace(tmp_path, path)
+        return path
+
+    def summary(self, rows=SUMMARY_ROWS):
+        """
+        Aggregates spans by name.
+        Returns: [(name, category, count, total_seconds, max_seconds)], slowest total first.
+        """
+        totals = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            key = (event["name"], event["cat"])
+            count, total, longest = totals.get(key, (0, 0.0, 0.0))
+            seconds = event["dur"] / 1e6
+            totals[key] = (count + 1, total + seconds, max(longest, seconds))
+        ranked = sorted(totals.items(), key=lambda item: -item[1][1])
+        return [(name, cat, count, total, longest) for (name, cat), (count, total, longest) in ranked[:rows]]
+
+
+def span(name, category="phase", **args):
+    """
+    Times the enclosed block as a span (a no-op unless tracing is on).
+
+        with trace.span("config.load"):
+            ...
+
+    The yielded dict (None when off) can be used to attach results to the span.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, args)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def start():
+    """
+    Turns tracing on for this process. Returns: the new Tracer.
+    """
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop():
+    """
+    Turns tracing off. Returns: the Tracer that was active (or None).
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def print_summary(tracer, rows=SUMMARY_ROWS):
+    print("\n🔬 Profile: slowest phases")
+    print(f"  {'span':<34} {'kind':<8} {'count':>5} {'total':>10} {'max':>10}")
+    for name, category, count, total, longest in tracer.summary(rows):
+        print(f"  {name[:34]:<34} {category:<8} {count:>5} {total * 1000:>8.1f}ms {longest * 1000:>8.1f}ms")
@@ -0,0 +1,351 @@
+import contextlib
+import ctypes
+import ctypes.util
+import datetime
+import io
+import os
+import select
+import struct
+import sys
+import time
+
+from .logger import LOG_FILENAME
+from .impact import SKIP_DIRS, DOC_EXTENSIONS
+from .lint import CONFIG_FILES as LINT_CONFIG
+
+# --- Constants ---
+
+# The Agent reads this instead of re-running `verify`.
+REPORT_PATH = os.path.join(".lofi-gate", "latest_report.md")
+
+# A burst of saves is over once the tree has been quiet this long (seconds).
+DEBOUNCE_SECONDS = 0.3
+
+# How often the polling fallback rescans the tree (seconds).
+POLL_INTERVAL = 1.0
+
+# Changing these changes WHAT we run => reload config/detection and rerun everything.
+CONFIG_FILES = {"lofi.toml", "package.json"}
+
+# Dependency manifests: the only inputs of the security audit.
+MANIFEST_FILES = {"package.json", "package-lock.json", "yarn.lock", "pnpm-lock.yaml",
+                  "npm-shrinkwrap.json", "Cargo.toml", "Cargo.lock"}
+
+# Linter / formatter configs: they only change what Lint reports.
+LINT_CONFIG_FILES = {name for names in LINT_CONFIG.values() for name in names if name.startswith((".", "eslint.config"))} | {
+    ".flake8", ".pylintrc", ".golangci.yml", ".golangci.yaml", ".prettierignore", ".stylelintignore"}
+LINT_CONFIG_PREFIXES = (".eslintrc", ".prettierrc", ".stylelintrc")
+
+# Files written as a side effect of running or editing (coverage data, editor swap/backup files).
+NOISE_FILES = {".coverage", ".DS_Store"}
+NOISE_PREFIXES = (".coverage.", ".#")
+NOISE_SUFFIXES = (".swp", ".swo", "~")
+
+# Sentinel "path" meaning "we lost track (e.g. inotify overflow), assume everything changed".
+EVERYTHING = "*"
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _ignored_dir(name):
+    return name in SKIP_DIRS or (name.startswith(".") and name not in (".", ".."))
+
+
+def is_ignored(path):
+    """
+    True for paths that can't affect any check (VCS, dependencies, build and coverage output,
+    editor swap files, and the gate's OWN writes, which would otherwise retrigger it forever).
+    Other dotfiles (`.eslintrc.json`, `.env`, ...) are inputs and still count.
+    """
+    path = os.path.normpath(path)
+    parts = path.split(os.sep)
+    name = parts[-1]
+    if path == LOG_FILENAME or name in NOISE_FILES or name.startswith(NOISE_PREFIXES) or name.endswith(NOISE_SUFFIXES):
+        return True
+    return any(_ignored_dir(p) for p in parts[:-1])
+
+
+def _walk_dirs(root):
+    for current, dirs, _ in os.walk(root):
+        dirs[:] = [d for d in dirs if not _ignored_dir(d)]
+        yield current
+
+
+class PollingWatcher:
+    """
+    Portable fallback: rescans (mtime, size) of every file in the tree.
+    """
+    def __init__(self, root=".", interval=POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        state = {}
+        for directory in _walk_dirs(self.root):
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.relpath(os.path.join(directory, name), self.root)
+                if is_ignored(path):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.root, path))
+                except OSError:
+                    continue
+                if not os.path.isdir(os.path.join(self.root, path)):
+                    state[path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def wait(self, timeout=None):
+        """
+        Returns: the set of changed paths (empty if nothing changed within `timeout`).
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            current = self._scan()
+            changed = {p for p in set(current) | set(self.snapshot) if current.get(p) != self.snapshot.get(p)}
+            self.snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.time() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else max(min(self.interval, deadline - time.time()), 0))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux: kernel change notifications, one watch per directory (inotify is not recursive).
+    Directories created later get their own watch as they appear.
+    """
+    def __init__(self, root="."):
+        self.root = root
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        for directory in _walk_dirs(root):
+            self._add(directory)
+
+    def _add(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = directory
+
+    def wait(self, timeout=None):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.add(EVERYTHING)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None:
+                continue
+            full = os.path.join(directory, os.fsdecode(name))
+            path = os.path.relpath(full, self.root)
+            if is_ignored(path):
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not _ignored_dir(os.path.basename(full)):
+                    for sub in _walk_dirs(full):
+                        self._add(sub)
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def make_watcher(root="."):
+    """
+    Returns: an inotify watcher where the kernel supports it, a polling one otherwise.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root)
+
+
+def collect_changes(watcher, quiet=DEBOUNCE_SECONDS):
+    """
+    Blocks until something changes, then keeps collecting until the tree has been
+    quiet for `quiet` seconds (an editor "save all" is one run, not twenty).
+    """
+    changed = set()
+    while not changed:
+        changed = watcher.wait(None)
+    while True:
+        more = watcher.wait(quiet)
+        if not more:
+            return changed
+        changed |= more
+
+
+def _is_lint_config(name):
+    return name in LINT_CONFIG_FILES or name.startswith(LINT_CONFIG_PREFIXES)
+
+
+def checks_for(paths, labels):
+    """
+    Maps changed paths to the checks whose inputs they are.
+    Returns: the set of labels to rerun (empty for doc-only changes).
+    """
+    if EVERYTHING in paths:
+        return set(labels)
+    names = {os.path.basename(p) for p in paths}
+    code = [p for p in paths if not p.endswith(DOC_EXTENSIONS)]
+    lint_config = [p for p in code if _is_lint_config(os.path.basename(p))]
+    selected = set()
+    if names & MANIFEST_FILES:
+        selected.add("Security Scan")
+    if lint_config:
+        selected.add("Lint")
+    if len(code) > len(lint_config):
+        selected.update({"TDD Check", "Lint", "Test Suite", "Coverage"})
+    return selected & set(labels)
+
+
+class Tee(io.TextIOBase):
+    """
+    Writes to the real stdout AND keeps a copy for the report file.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self._copy = io.StringIO()
+
+    def write(self, text):
+        self.stream.write(text)
+        self._copy.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def getvalue(self):
+        return self._copy.getvalue()
+
+
+def write_report(path, exit_code, statuses, trigger, output):
+    """
+    Atomically replaces the report (readers never see a half-written file).
+    """
+    lines = [
+        "# LoFi Gate: Latest Report",
+        "",
+        f"- **Result**: {'✅ PASS' if exit_code == 0 else '❌ FAIL'}",
+        f"- **Updated**: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"- **Trigger**: {trigger}",
+        "",
+        "| Check | Status |",
+        "| --- | --- |",
+    ]
+    for label, code in statuses.items():
+        status = "⏸️ not run" if code is None else ("✅ PASS" if code == 0 else "❌ FAIL")
+        lines.append(f"| {label} | {status} |")
+    lines += ["", "## Output of the last run", "", "```", output.rstrip(), "```", ""]
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    os.replace(tmp_path, path)
+
+
+class Session:
+    """
+    Keeps config, detection results and the last status of every check in memory
+    between runs; they are only reloaded when lofi.toml or package.json change.
+    """
+    def __init__(self, run_checks, load_config, load_scripts, list_checks, report_path=REPORT_PATH, **options):
+        self.run_checks = run_checks
+        self.load_config = load_config
+        self.load_scripts = load_scripts
+        self.list_checks = list_checks
+        self.report_path = report_path
+        self.options = options
+        self.reload()
+
+    def reload(self):
+        self.config = self.load_config()
+        self.scripts = self.load_scripts()
+        self.labels = self.list_checks(self.config, self.scripts)
+        self.statuses = {label: None for label in self.labels}
+
+    def run(self, changed=None):
+        """
+        Runs the checks affected by `changed` (all of them when None).
+        Returns: the exit code, or None if nothing needed to run.
+        """
+        if changed is None:
+            only, trigger = None, "initial run"
+        else:
+            if EVERYTHING in changed or {os.path.basename(p) for p in changed if os.path.dirname(p) == ""} & CONFIG_FILES:
+                print("🔄 Configuration changed. Reloading.")
+                self.reload()
+                only = None
+            else:
+                only = checks_for(changed, self.labels)
+                if not only:
+                    return None
+            shown = sorted(changed)
+            trigger = ", ".join(shown[:5]) + (f" (+{len(shown) - 5} more)" if len(shown) > 5 else "")
+
+        results = {}
+        tee = Tee(sys.stdout)
+        with contextlib.redirect_stdout(tee):
+            exit_code = self.run_checks(config=self.config, scripts=self.scripts, only=only, results=results, **self.options)
+        # Checks we didn't rerun keep their previous status.
+        self.statuses.update(results)
+        overall = 0 if exit_code == 0 and all(c == 0 for c in self.statuses.values() if c is not None) else 1
+        write_report(self.report_path, overall, self.statuses, trigger, tee.getvalue())
+        print(f"📝 Report: {self.report_path}")
+        return overall
+
+
+def watch_loop(session, watcher, quiet=DEBOUNCE_SECONDS, max_runs=None):
+    """
+    Initial full run, then one incremental run per debounced burst of changes.
+    """
+    session.run()
+    runs = 1
+    while max_runs is None or runs < max_runs:
+        print("👀 Watching for changes (Ctrl+C to stop)...")
+        changed = collect_changes(watcher, quiet)
+        if session.run(changed) is not None:
+            runs += 1
@@ -0,0 +1,83 @@
+import time
+from unittest.mock import patch
+
+from lofi_gate import logic
+from lofi_gate.audit import parse_ttl, run_audit
+from lofi_gate.cache import ResultCache
+
+AUDIT = "npm audit --audit-level=high"
+OFFLINE = "npm ERR! code ENOTFOUND\nnpm ERR! request to https://registry.npmjs.org/-/npm/v1/security/advisories/bulk failed"
+
+
+def audit(*results):
+    calls = []
+
+    def run(cmd, label=None):
+        code, text = results[len(calls)]
+        calls.append(cmd)
+        return code, text, 2.0, cmd
+    return run, calls
+
+
+def test_parse_ttl():
+    assert parse_ttl("6h") == 6 * 3600
+    assert parse_ttl(90) == 90
+    assert parse_ttl(None) is None
+
+
+def test_audit_replays_until_the_lockfile_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "package-lock.json").write_text('{"lockfileVersion": 3}')
+    run, calls = audit((1, "1 high severity vulnerability"), (0, "found 0 vulnerabilities"))
+
+    assert run_audit(AUDIT, run, ttl=3600)[0] == 1
+    code, output, _, _ = run_audit(AUDIT, run, ttl=3600)
+    assert (code, output.from_cache) == (1, True)
+    assert len(calls) == 1
+
+    (tmp_path / "package-lock.json").write_text('{"lockfileVersion": 3, "packages": {}}')
+    assert run_audit(AUDIT, run, ttl=3600)[0] == 0
+    assert len(calls) == 2
+
+
+def test_result_is_stored_under_the_advisory_revision_the_audit_fetched(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Cargo.lock").write_text("# lock")
+    run, calls = audit((0, "Success No vulnerable packages found"))
+    # The first lookup sees the old checkout; `cargo audit` then pulls a new revision.
+    with patch("lofi_gate.audit.advisory_revision", side_effect=["rev-old", "rev-new", "rev-new"]):
+        run_audit("cargo audit", run, ttl=3600)
+        code, output, _, _ = run_audit("cargo audit", run, ttl=3600)
+    assert (code, output.from_cache, len(calls)) == (0, True, 1)
+
+
+def test_expired_result_reruns_the_audit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "package-lock.json").write_text("{}")
+    run, calls = audit((0, "ok"), (0, "ok"))
+    run_audit(AUDIT, run, ttl=3600)
+    with patch("lofi_gate.cache.time.time", return_value=time.time() + 7200):
+        run_audit(AUDIT, run, ttl=3600)
+    assert len(calls) == 2
+
+
+def test_offline_audit_replays_the_last_result_marked_stale(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "package.json").write_text("{}")
+    (tmp_path / "package-lock.json").write_text("{}")
+    (tmp_path / "lofi.toml").write_text('[gate]\nstrict_tdd = false\n[checks.security]\ncache_ttl = "1h"\n')
+    run, _ = audit((0, "found 0 vulnerabilities"))
+    run_audit(AUDIT, run, ttl=3600)
+
+    offline, _ = audit((1, OFFLINE))
+    with patch("lofi_gate.cache.time.time", return_value=time.time() + 7200), \
+            patch("lofi_gate.logic.run_command", side_effect=offline):
+        assert logic.run_checks(only=["Security Scan"]) == 0
+    assert "✅ Security Scan ♻️ (cached) ⚠️ (stale: offline, 2h old) Passed!" in capsys.readouterr().out
+
+
+def test_offline_without_a_cached_result_still_fails(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "package-lock.json").write_text("{}")
+    run, _ = audit((1, OFFLINE))
+    assert run_audit(AUDIT, run, ttl=3600, store=ResultCache(str(tmp_path / "c")))[0] == 1
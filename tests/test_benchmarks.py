@@ -0,0 +1,40 @@
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import harness  # noqa: E402
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"slow": 0.100, "same": 0.100, "noise": 0.0005, "gone": 1.0}
+    current = {"slow": 0.150, "same": 0.110, "noise": 0.0010, "new": 1.0}
+    rows = {row[0]: row for row in harness.compare(baseline, current, threshold=0.25)}
+
+    assert set(rows) == {"slow", "same", "noise"}
+    assert rows["slow"][4] is True
+    assert rows["same"][4] is False
+    # Doubling a sub-millisecond metric is timer noise.
+    assert rows["noise"][4] is False
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "out" / "run.json")
+    harness.save(path, {"startup.version": 0.1})
+
+    assert harness.load(path) == {"startup.version": 0.1}
+    with open(path) as f:
+        assert "python" in json.load(f)["meta"]
+
+
+def test_orchestration_stub_accepts_what_run_checks_passes(tmp_path, monkeypatch):
+    import bench_orchestration
+    from lofi_gate import logic
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lofi.toml").write_text(bench_orchestration.CONFIG)
+    # The stub replaces logic.build_tasks: it must keep up with every argument added to it.
+    with patch("lofi_gate.logic.build_tasks", bench_orchestration.synthetic_tasks(1)):
+        assert logic.run_checks() == 0
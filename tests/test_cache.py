@@ -0,0 +1,74 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from lofi_gate import logic
+from lofi_gate.cache import ResultCache, tree_state_key
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    subprocess.run(["git", "init", "-q"], check=True)
+    subprocess.run(["git", "config", "user.email", "t@t"], check=True)
+    subprocess.run(["git", "config", "user.name", "t"], check=True)
+    (tmp_path / "app.py").write_text("x = 1\n")
+    subprocess.run(["git", "add", "."], check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], check=True)
+    return tmp_path
+
+
+def test_tree_key_tracks_edits_but_ignores_the_ledger(repo):
+    key = tree_state_key({})
+    assert key == tree_state_key({})
+
+    (repo / "verification_history.md").write_text("ledger")
+    assert tree_state_key({}) == key
+
+    (repo / "app.py").write_text("x = 2\n")
+    edited = tree_state_key({})
+    assert edited != key
+
+    (repo / "new.py").write_text("y = 1\n")
+    assert tree_state_key({}) != edited
+
+    assert tree_state_key({"gate": {"lint_check": False}}) != tree_state_key({})
+
+
+def test_tree_key_is_none_outside_git(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert tree_state_key({}) is None
+
+
+def test_cache_roundtrip_and_lru_eviction(tmp_path):
+    store = ResultCache(cache_dir=str(tmp_path), max_bytes=10 ** 9)
+    store.put("a", 1, "x" * 20000, 2.5, "npm test")
+
+    code, out, duration, cmd = store.get("a")
+    assert (code, duration, cmd) == (1, 2.5, "npm test")
+    assert out.total_chars == 20000
+    assert out.from_cache
+
+    store.put("b", 0, "ok", 0.1, "npm run lint")
+    os.utime(os.path.join(str(tmp_path), "a.json"), (1, 1))
+    store.max_bytes = os.path.getsize(os.path.join(str(tmp_path), "b.json"))
+    store.evict()
+    assert store.get("a") is None
+    assert store.get("b") is not None
+
+
+def test_run_checks_replays_cached_results(repo, capsys):
+    (repo / "package.json").write_text('{"scripts": {"test": "jest"}}')
+    (repo / "lofi.toml").write_text("[gate]\nstrict_tdd = false\nsecurity_check = false\n")
+
+    with patch("lofi_gate.logic.run_command", return_value=(0, "ok", 0.1, "npm test")) as mock_run:
+        assert logic.run_checks(cache=True) == 0
+        assert logic.run_checks(cache=True) == 0
+        assert mock_run.call_count == 1
+
+        assert logic.run_checks(cache=False) == 0
+        assert mock_run.call_count == 2
+
+    assert "(cached)" in capsys.readouterr().out
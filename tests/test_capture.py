@@ -0,0 +1,69 @@
+import gzip
+import io
+import sys
+from unittest.mock import patch
+
+from lofi_gate import logic
+from lofi_gate.capture import StreamCapture, capture_stream, prepend_output
+
+
+def test_small_output_is_kept_verbatim():
+    out = capture_stream(io.BytesIO(b"hello\r\nworld\n"))
+    assert out == "hello\nworld\n"
+    assert out.total_chars == len("hello\nworld\n")
+    assert out.omitted_chars == 0
+
+
+def test_large_output_keeps_only_head_and_tail():
+    data = b"H" * 50 + b"x" * 100000 + b"T" * 50
+    out = capture_stream(io.BytesIO(data), StreamCapture(head_limit=50, tail_limit=50), chunk_size=777)
+
+    assert out.startswith("H" * 50)
+    assert out.endswith("T" * 50)
+    assert out.total_chars == len(data)
+    assert out.omitted_chars == 100000
+    assert out.raw_tokens == len(data) // 4
+    assert len(out) < 200
+
+
+def test_multibyte_chars_split_across_chunks():
+    data = "é" * 10
+    out = capture_stream(io.BytesIO(data.encode("utf-8")), chunk_size=3)
+    assert out == data
+    assert out.total_bytes == 20
+
+
+def test_spill_file_has_the_full_stream(tmp_path):
+    spill = tmp_path / "logs" / "tests.log.gz"
+    data = b"line\n" * 5000
+    out = capture_stream(io.BytesIO(data), StreamCapture(head_limit=10, tail_limit=10, spill_path=str(spill)))
+
+    assert out.spill_path == str(spill)
+    with gzip.open(spill, "rt", encoding="utf-8") as f:
+        assert f.read() == data.decode()
+
+
+def test_prepend_output_keeps_metadata():
+    out = capture_stream(io.BytesIO(b"a" * 100), StreamCapture(head_limit=10, tail_limit=10))
+    banner = prepend_output("WARN\n", out)
+    assert banner.startswith("WARN\n")
+    assert banner.total_chars == 105
+
+
+def test_run_command_reports_full_size():
+    cmd = f'{sys.executable} -c "print(\'x\' * 500000)"'
+    code, out, duration, command = logic.run_command(cmd, "Tests")
+    assert code == 0
+    assert out.total_chars == 500001
+    assert len(out) < 200000
+
+
+def test_print_result_uses_full_size_metrics(capsys):
+    out = capture_stream(io.BytesIO(b"x" * 10000), StreamCapture(head_limit=1500, tail_limit=1500))
+    with patch("lofi_gate.logic.log_to_history"):
+        _, saved = logic.print_result("Tests", 1, out, 0.1)
+
+    printed = capsys.readouterr().out
+    assert "[Truncated 8000 chars]" in printed
+    # 10000 chars streamed (2500 tokens), ~2000 chars shown.
+    assert 1900 < saved < 2000
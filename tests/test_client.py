@@ -0,0 +1,31 @@
+import os
+import socket
+import threading
+
+import pytest
+
+from lofi_gate.client import request, verify_via_daemon
+from lofi_gate.serve import make_server
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+def test_client_round_trip(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lofi.toml").write_text("[gate]\nstrict_tdd = false\nsecurity_check = false\nlint_check = false\n")
+    path = os.path.join(".lofi-gate", "gate.sock")
+    assert verify_via_daemon(path) is None
+
+    server = make_server(path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert request({"cmd": "ping"}, path)["ok"] is True
+        with pytest.raises(RuntimeError):
+            make_server(path)
+
+        assert verify_via_daemon(path) == 0
+        assert "All systems go" in capsys.readouterr().out
+    finally:
+        server.shutdown()
+        server.server_close()
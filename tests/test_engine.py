@@ -0,0 +1,103 @@
+import io
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+from lofi_gate import logic
+from lofi_gate.engine import AsyncExecutor, CommandCheck, LiveProgress
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+
+# Prints one passing file, a failing one, then keeps "running" for a while.
+FAKE_PYTEST = """\
+import sys, time
+print("tests/test_a.py ....", flush=True)
+print("tests/test_b.py ..F.", flush=True)
+time.sleep(float(sys.argv[1]))
+sys.exit(1)
+"""
+
+
+@pytest.fixture
+def fake_pytest(tmp_path):
+    script = tmp_path / "fake_pytest.py"
+    script.write_text(FAKE_PYTEST)
+    logic.RUNNING.reset()
+    return f"{sys.executable} {script}"
+
+
+def test_command_check_calls_its_runner_and_finish():
+    runner = lambda cmd, label: (1, f"{label} ran {cmd}", 0.1, cmd)
+    check = CommandCheck("make audit", "Security", runner, finish=lambda code, out, dur, cmd: (0, "warned: " + out, dur, cmd))
+    assert check() == (0, "warned: Security ran make audit", 0.1, "make audit")
+
+
+def test_failure_is_reported_while_the_check_is_still_running(fake_pytest):
+    stream = io.StringIO()
+    with AsyncExecutor(progress=LiveProgress(interval=0, stream=stream)) as executor:
+        future = executor.submit(CommandCheck(f"{fake_pytest} 1.5", "Tests", runner=None))
+        deadline = time.time() + 1.0
+        while "first failure" not in stream.getvalue() and time.time() < deadline:
+            time.sleep(0.02)
+        assert not future.done()
+        code, output, _, _ = future.result(timeout=10)
+
+    assert "❌ Tests: first failure after" in stream.getvalue()
+    assert "tests/test_b.py (still running)" in stream.getvalue()
+    assert "⏳ Tests: 7 passed, 1 failed so far" in stream.getvalue()
+    assert code == 1
+    assert "test_b.py ..F." in output
+
+
+def test_async_fail_fast_cancels_siblings_on_the_first_failing_test(tmp_path, monkeypatch, capsys, fake_pytest):
+    monkeypatch.chdir(tmp_path)
+    # A "lint" that would run for 30s: it must be cancelled as soon as the tests report a failure.
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "npm").write_text("#!/bin/sh\nsleep 30\n")
+    (bin_dir / "npm").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    (tmp_path / "package.json").write_text('{"scripts": {"lint": "eslint"}}')
+    (tmp_path / "lofi.toml").write_text(
+        f'[project]\ntest_command = "{fake_pytest} 1"\n'
+        "[gate]\nstrict_tdd = false\nsecurity_check = false\nengine = \"async\"\n"
+    )
+
+    start = time.time()
+    assert logic.run_checks(parallel=True, fail_fast=True) == 1
+    assert time.time() - start < 15
+
+    printed = capsys.readouterr().out
+    assert "PARALLEL (fail-fast) [async]" in printed
+    assert "❌ Tests: first failure after" in printed
+    assert "🚫 Lint Cancelled" in printed
+    assert "❌ Test Suite Failed" in printed
+
+
+def test_async_timeout_kills_a_grandchild_that_traps_sigterm():
+    import asyncio
+    from lofi_gate.engine import run_command_async
+
+    logic.RUNNING.reset()
+    tree = (f'{sys.executable} -c "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(20)"; true')
+    start = time.time()
+    code, output, _, _ = asyncio.run(run_command_async(tree, "Tests", limits={"Tests": {"timeout": 0.5}}))
+    assert time.time() - start < 8
+    assert code != 0
+    assert output.status == "TIMEOUT"
+
+
+def test_plain_function_tasks_still_run_on_threads():
+    with AsyncExecutor(max_workers=2) as executor:
+        assert executor.submit(lambda: (0, "ok", 0.0, "git status")).result(timeout=5)[1] == "ok"
+
+
+def test_unknown_engine_falls_back_to_threads(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lofi.toml").write_text('[project]\ntest_command = "true"\n[gate]\nstrict_tdd = false\nengine = "fibers"\n')
+    with patch("lofi_gate.logic.run_command", return_value=(0, "ok", 0.1, "true")):
+        assert logic.run_checks(parallel=True) == 0
+    assert "Unknown engine 'fibers'" in capsys.readouterr().out
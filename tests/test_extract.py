@@ -0,0 +1,172 @@
+import io
+from unittest.mock import patch
+
+from lofi_gate import logic
+from lofi_gate.capture import StreamCapture, capture_stream
+from lofi_gate.extract import extractor_for, progress_for, Extraction
+
+PYTEST_OUTPUT = """\
+============================= test session starts ==============================
+collected 300 items
+
+tests/test_a.py ........F.......                                        [100%]
+
+=================================== FAILURES ===================================
+_______________________________ TestMath.test_add ______________________________
+
+self = <tests.test_a.TestMath object at 0x7f>
+
+    def test_add(self):
+>       assert add(1, 1) == 3
+E       assert 2 == 3
+E        +  where 2 = add(1, 1)
+
+tests/test_a.py:12: AssertionError
+=========================== short test summary info ============================
+FAILED tests/test_a.py::TestMath::test_add - assert 2 == 3
+======================== 1 failed, 299 passed in 1.23s =========================
+"""
+
+JEST_OUTPUT = """\
+FAIL src/sum.test.js
+  ● math › adds numbers
+
+    expect(received).toBe(expected) // Object.is equality
+
+    Expected: 3
+    Received: 2
+
+      at Object.<anonymous> (src/sum.test.js:4:19)
+      at Promise.then.completed (node_modules/jest-circus/build/utils.js:298:28)
+
+Tests:       1 failed, 12 passed, 13 total
+"""
+
+CARGO_OUTPUT = """\
+running 2 tests
+test tests::it_works ... ok
+test tests::it_fails ... FAILED
+
+failures:
+
+---- tests::it_fails stdout ----
+thread 'tests::it_fails' panicked at src/lib.rs:10:9:
+assertion `left == right` failed
+  left: 1
+ right: 2
+note: run with `RUST_BACKTRACE=1` environment variable to display a backtrace
+
+failures:
+    tests::it_fails
+
+test result: FAILED. 1 passed; 1 failed
+"""
+
+GO_OUTPUT = """\
+--- FAIL: TestAdd (0.00s)
+    math_test.go:9: expected 3, got 2
+FAIL
+FAIL\texample.com/m\t0.01s
+"""
+
+GO_VERBOSE_OUTPUT = """\
+=== RUN   TestAdd
+    math_test.go:9: expected 3, got 2
+--- FAIL: TestAdd (0.00s)
+=== RUN   TestSub
+--- PASS: TestSub (0.00s)
+FAIL
+FAIL\texample.com/m\t0.01s
+"""
+
+
+def extract(command, text):
+    extractor = extractor_for(command)
+    for line in text.splitlines():
+        extractor.feed_line(line)
+    return extractor.result()
+
+
+def test_pytest_failures_use_node_ids_and_assertions():
+    result = extract("python -m pytest", PYTEST_OUTPUT)
+    assert [f.name for f in result.failures] == ["tests/test_a.py::TestMath::test_add"]
+    failure = result.failures[0]
+    assert any("assert 2 == 3" in m for m in failure.message)
+    assert failure.frames == ["tests/test_a.py:12: AssertionError"]
+
+
+def test_jest_failures_skip_framework_frames():
+    result = extract("npm test", JEST_OUTPUT)
+    failure = result.failures[0]
+    assert failure.name == "math › adds numbers"
+    assert any("Received: 2" in m for m in failure.message)
+    assert failure.frames == ["Object.<anonymous> (src/sum.test.js:4:19)"]
+
+
+def test_cargo_failures_keep_panic_location():
+    result = extract("cargo test", CARGO_OUTPUT)
+    failure = result.failures[0]
+    assert failure.name == "tests::it_fails"
+    assert failure.frames == ["src/lib.rs:10:9"]
+    assert any("left: 1" in m for m in failure.message)
+
+
+def test_go_failures_keep_file_and_message():
+    for output in (GO_OUTPUT, GO_VERBOSE_OUTPUT):
+        result = extract("go test ./...", output)
+        assert [f.name for f in result.failures] == ["TestAdd"]
+        assert result.failures[0].frames == ["math_test.go:9"]
+        assert result.failures[0].message == ["expected 3, got 2"]
+
+
+def test_unknown_tool_has_no_extractor():
+    assert extractor_for("make check") is None
+    assert progress_for("make check") is None
+
+
+def progress(command, text):
+    counter = progress_for(command)
+    for line in text.splitlines():
+        counter.feed_line(line)
+    return counter
+
+
+def test_progress_counts_passes_and_names_the_first_failure():
+    counter = progress("python -m pytest", PYTEST_OUTPUT)
+    assert (counter.passed, counter.failed, counter.first_failure) == (15, 1, "tests/test_a.py")
+
+    counter = progress("python -m pytest -v", "tests/test_a.py::test_one PASSED  [ 50%]\ntests/test_a.py::test_two FAILED  [100%]\n")
+    assert (counter.passed, counter.failed, counter.first_failure) == (1, 1, "tests/test_a.py::test_two")
+
+    counter = progress("npm test", "PASS src/a.test.js (1.2 s)\n" + JEST_OUTPUT)
+    assert (counter.passed, counter.failed, counter.first_failure) == (1, 1, "src/sum.test.js")
+
+    counter = progress("cargo test", "test tests::it_works ... ok\ntest tests::it_fails ... FAILED\n")
+    assert (counter.passed, counter.failed, counter.first_failure) == (1, 1, "tests::it_fails")
+
+    counter = progress("go test ./...", GO_VERBOSE_OUTPUT)
+    assert (counter.passed, counter.failed, counter.first_failure) == (1, 1, "TestAdd")
+
+
+def test_render_respects_budget_and_lists_every_name():
+    extraction = extract("go test ./...", "".join(f"--- FAIL: Test{i} (0.00s)\n    x_test.go:{i}: {'boom ' * 20}\n" for i in range(30)))
+    text = extraction.render(600)
+    assert len(text) <= 600
+    assert "Test0" in text
+    assert "more" in text
+
+    roundtrip = Extraction.from_dict(extraction.to_dict())
+    assert roundtrip.render(600) == text
+
+
+def test_print_result_shows_the_assertion_buried_in_the_middle(capsys):
+    noisy = "noise line\n" * 5000
+    stream = (noisy + PYTEST_OUTPUT + noisy).encode()
+    out = capture_stream(io.BytesIO(stream), StreamCapture(extractor=extractor_for("python -m pytest")))
+
+    with patch("lofi_gate.logic.log_to_history"):
+        logic.print_result("Test Suite", 1, out, 1.0, "python -m pytest")
+
+    printed = capsys.readouterr().out
+    assert "tests/test_a.py::TestMath::test_add" in printed
+    assert "assert 2 == 3" in printed
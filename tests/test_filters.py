@@ -0,0 +1,131 @@
+import io
+import sys
+from unittest.mock import patch
+
+from lofi_gate import logic
+from lofi_gate.capture import StreamCapture, capture_stream
+from lofi_gate.filters import FilterChain, OutputFilter, build_chain, register_filter
+
+
+def run_chain(names, data, chunk=7):
+    """Feeds `data` in small chunks so lines and escapes straddle chunk boundaries."""
+    capture = StreamCapture(filters=build_chain(names))
+    for i in range(0, len(data), chunk):
+        capture.feed(data[i:i + chunk])
+    return capture.close()
+
+
+def test_ansi_is_stripped():
+    out = run_chain(["ansi"], b"\x1b[31mFAILED\x1b[0m test_a\n\x1b]0;title\x07done\n")
+    assert out == "FAILED test_a\ndone\n"
+    assert out.raw_chars > out.total_chars
+
+
+def test_carriage_return_redraws_keep_the_last_frame():
+    bar = b"".join(b"\rDownloading %3d%%" % i for i in range(101))
+    out = run_chain(["carriage_return"], bar + b"\r\nok\r\n")
+    assert out == "Downloading 100%\nok\n"
+    assert out.filter_savings["carriage_return"] > 0
+
+
+def test_lone_carriage_returns_are_newlines_without_the_filter():
+    assert run_chain(["ansi"], b"a\rb\n") == "a\nb\n"
+
+
+def test_repeated_lines_are_run_length_encoded():
+    data = b"start\n" + b"npm WARN deprecated glob@7.2.3: Glob versions prior to v9\n" * 50 + b"\n\nend"
+    out = run_chain(["repeats"], data)
+    assert out == (
+        "start\nnpm WARN deprecated glob@7.2.3: Glob versions prior to v9\n"
+        "... [previous line repeated 49 more times]\n\n\nend"
+    )
+
+
+def test_framework_frames_are_folded():
+    data = (
+        b"Traceback (most recent call last):\n"
+        b'  File "/app/tests/test_api.py", line 12, in test_get\n'
+        b"    client.get('/users')\n"
+        b'  File "/venv/lib/python3.11/site-packages/requests/api.py", line 73, in get\n'
+        b"    return request('get', url)\n"
+        b'  File "/venv/lib/python3.11/site-packages/requests/sessions.py", line 589, in request\n'
+        b"    resp = self.send(prep)\n"
+        b"           ^^^^^^^^^^^^^^^\n"
+        b"ConnectionError: refused\n"
+        b"    at Object.<anonymous> (src/api.test.js:4:9)\n"
+        b"    at Promise.then.completed (node_modules/jest-circus/build/utils.js:298:28)\n"
+        b"    at new Promise (<anonymous>)\n"
+    )
+    out = run_chain(["frames"], data)
+    assert "test_api.py" in out and "client.get" in out
+    assert "site-packages" not in out
+    assert "  ... [5 framework/library frame lines folded]\nConnectionError: refused\n" in out
+    # Runs too short to be worth a marker stay as they are.
+    assert "node_modules/jest-circus" in out
+
+
+def test_rust_std_frames_are_folded():
+    data = (
+        b"thread 'main' panicked at src/main.rs:4:5\n"
+        b"   0: rust_begin_unwind\n"
+        b"             at /rustc/90b35a/library/std/src/panicking.rs:645:5\n"
+        b"   1: core::panicking::panic_fmt\n"
+        b"             at /rustc/90b35a/library/core/src/panicking.rs:72:14\n"
+        b"   2: app::main\n"
+        b"             at ./src/main.rs:4:5\n"
+    )
+    out = run_chain(["frames"], data)
+    assert "   ... [4 framework/library frame lines folded]\n   2: app::main\n" in out
+
+
+def test_custom_filters_can_be_registered():
+    @register_filter
+    class DropDebug(OutputFilter):
+        name = "drop_debug"
+
+        def process(self, lines):
+            return [line for line in lines if not line.startswith("DEBUG")]
+
+    out = run_chain(["drop_debug", "repeats"], b"DEBUG a\nreal\nDEBUG b\n")
+    assert out == "real\n"
+    assert set(out.filter_savings) == {"drop_debug"}
+
+
+def test_memory_stays_bounded_for_endless_redraws():
+    chain = FilterChain(build_chain(["carriage_return"]).filters)
+    for i in range(10000):
+        chain.feed("\rprogress %d" % i)
+    assert len(chain._partial) < 64
+
+
+def test_run_command_filters_and_ledger_shows_savings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logic.RUNNING.reset()
+    monkeypatch.setitem(logic.CAPTURE_SETTINGS, "filters", logic.resolve_filters({"gate": {"output_filters": ["ansi", "repeats"]}}))
+    script = "import sys; sys.stdout.write(('\\x1b[33mwarning: unused\\x1b[0m\\n' * 200) + 'boom\\n'); sys.exit(1)"
+    code, out, dur, cmd = logic.run_command(f'{sys.executable} -c "{script}"', "Tests")
+
+    assert code == 1
+    assert out == "warning: unused\n... [previous line repeated 199 more times]\nboom\n"
+    with patch("lofi_gate.logic.log_to_history") as log:
+        _, saved = logic.print_result("Test Suite", code, out, dur, cmd)
+    assert saved == sum(out.filter_savings.values()) > 0
+    assert set(log.call_args.kwargs["filter_savings"]) == {"ansi", "repeats"}
+
+
+def test_filters_are_configurable_per_check(capsys):
+    config = {"gate": {"output_filters": ["ansi"]}, "checks": {"lint": {"output_filters": []}, "tests": {"output_filters": ["nope"]}}}
+    filters = logic.resolve_filters(config)
+
+    assert filters["Security"] == ["ansi"]
+    assert filters["Lint"] == []
+    assert build_chain(filters["Lint"]) is None
+    assert "nope" in capsys.readouterr().out
+    # Opt-in: nothing rewrites the output unless lofi.toml asks for it.
+    assert logic.resolve_filters({})["Tests"] == []
+
+
+def test_unfiltered_capture_is_unchanged():
+    out = capture_stream(io.BytesIO(b"\x1b[31mred\x1b[0m\r\n"))
+    assert out == "\x1b[31mred\x1b[0m\n"
+    assert out.filter_savings == {}
@@ -0,0 +1,102 @@
+import io
+import json
+from unittest.mock import patch
+
+from lofi_gate import logic
+from lofi_gate.capture import StreamCapture, capture_stream
+from lofi_gate.extract import Extraction, Failure, extractor_for
+from lofi_gate.fingerprint import FailureFingerprints, fingerprint
+
+FAILURE_BLOCKS = {
+    "test_add": ("tests/test_a.py", 12, "E       assert 2 == 3"),
+    "test_tmp": ("tests/test_b.py", 40, "E       FileNotFoundError: {tmp}/out.json (handle at {addr})"),
+    "test_new": ("tests/test_c.py", 7, "E       KeyError: 'id'"),
+}
+
+
+def pytest_output(names, run=1):
+    lines = ["=================================== FAILURES ==================================="]
+    for name in names:
+        path, line, message = FAILURE_BLOCKS[name]
+        lines += [
+            f"_______________________________ {name} ______________________________",
+            message.format(tmp=f"/tmp/pytest-of-root/pytest-{run}/{name}0", addr=hex(0x7f00 + run)),
+            f"{path}:{line + run}: AssertionError",
+        ]
+    lines.append("=========================== short test summary info ============================")
+    lines += [f"FAILED {FAILURE_BLOCKS[name][0]}::{name}" for name in names]
+    lines.append(f"======================== {len(names)} failed in {run}.23s =========================")
+    return "\n".join(lines) + "\n"
+
+
+def captured(text):
+    capture = StreamCapture(extractor=extractor_for("python -m pytest"))
+    return capture_stream(io.BytesIO(text.encode("utf-8")), capture)
+
+
+def failure(name, *message):
+    result = Failure(name)
+    result.message = list(message)
+    return result
+
+
+def test_fingerprint_ignores_run_specific_noise():
+    first = failure("test_io", "OSError at 0x7f3a2b10 in /tmp/pytest-of-ci/pytest-3/x0 after 12.5s (test_io.py:10)")
+    second = failure("test_io", "OSError at 0x55aa0020 in /tmp/pytest-of-ci/pytest-9/x0 after 0.8s (test_io.py:14)")
+    other = failure("test_io", "PermissionError at 0x7f3a2b10")
+
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint(other)
+    assert len(fingerprint(first)) == 16
+
+
+def test_diff_splits_new_still_and_fixed(tmp_path):
+    store = FailureFingerprints(str(tmp_path / "fp.json"))
+    first = store.diff("Test Suite", "pytest", Extraction("pytest", [failure("a", "boom"), failure("b", "bad")]))
+    assert [f.name for f in first.new] == ["a", "b"] and first.fixed == []
+
+    # Same store reloaded from disk, as on the next gate run.
+    store = FailureFingerprints(str(tmp_path / "fp.json"))
+    second = store.diff("Test Suite", "pytest", Extraction("pytest", [failure("a", "boom"), failure("b", "worse"), failure("c", "new")]))
+    assert second.still == ["a"]
+    # `b` fails differently: new again, not fixed.
+    assert [f.name for f in second.new] == ["b", "c"]
+    assert second.fixed == []
+
+    third = store.diff("Test Suite", "pytest", Extraction("pytest", [failure("c", "new")]))
+    assert (third.still, third.fixed) == (["c"], ["a", "b"])
+
+    # A narrowed command didn't run the other tests: nothing can be called fixed.
+    assert store.diff("Test Suite", "pytest tests/test_c.py").fixed is None
+    assert json.loads((tmp_path / "fp.json").read_text()) == {}
+
+
+def test_repeated_failures_are_listed_by_name_only(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lofi.toml").write_text(
+        '[gate]\nstrict_tdd = false\nsecurity_check = false\nlint_check = false\nfailure_diff = true\n'
+        '[project]\ntest_command = "python -m pytest"\n'
+    )
+    runs = iter([
+        (1, captured(pytest_output(["test_add", "test_tmp"], run=1))),
+        (1, captured(pytest_output(["test_add", "test_tmp", "test_new"], run=2))),
+        (1, captured(pytest_output(["test_new"], run=3))),
+        (0, "3 passed"),
+    ])
+    with patch("lofi_gate.logic.run_command", side_effect=lambda cmd, label=None: (*next(runs), 0.1, cmd)):
+        logic.run_checks()
+        assert "assert 2 == 3" in capsys.readouterr().out
+
+        logic.run_checks()
+        out = capsys.readouterr().out
+        assert "🆕 1 new failing test(s) (pytest):" in out
+        assert "KeyError: 'id'" in out
+        assert "🔁 Still failing (2, details shown in an earlier run): tests/test_a.py::test_add, tests/test_b.py::test_tmp" in out
+        assert "assert 2 == 3" not in out
+
+        logic.run_checks()
+        out = capsys.readouterr().out
+        assert "🩹 Fixed since last run (2): tests/test_a.py::test_add, tests/test_b.py::test_tmp" in out
+
+        logic.run_checks()
+        assert "🩹 Fixed since last run (1): tests/test_c.py::test_new" in capsys.readouterr().out
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+
+from click.testing import CliRunner
+
+from lofi_gate import history, ledger, logger, logic
+from lofi_gate.capture import CapturedOutput
+from lofi_gate.cli import cli
+
+
+def seed(path, rows, replay=""):
+    history.record([(ts, label, status, duration, 100, saved, "cmd", replay) for ts, label, status, duration, saved in rows], path)
+
+
+def test_summary_percentiles_failure_rate_and_savings(tmp_path):
+    path = str(tmp_path / "history.db")
+    seed(path, [(1000 + i, "Test Suite", "FAIL" if i % 4 == 0 else "PASS", float(i), 10) for i in range(1, 101)])
+    seed(path, [(2000, "Lint", "CANCELLED", 5.0, 0), (2001, "Lint", "TIMEOUT", 9.0, 0)])
+
+    conn = history.connect(path)
+    summary = {row["label"]: row for row in history.summarize(conn)}
+    assert summary["Test Suite"]["runs"] == 100
+    assert summary["Test Suite"]["p50"] == 50.0
+    assert summary["Test Suite"]["p95"] == 95.0
+    assert summary["Test Suite"]["fail_rate"] == 0.25
+    assert summary["Test Suite"]["tokens_saved"] == 1000
+    # A fail-fast cancel isn't the check's failure; a timeout is.
+    assert summary["Lint"]["failures"] == 1
+
+    recent = list(history.recent(conn, label="Test Suite", status="fail", since=1090, limit=5))
+    assert [r["ts"] for r in recent] == [1100, 1096, 1092]
+    conn.close()
+
+
+def test_parse_since():
+    assert history.parse_since("2d", now=10 * 86400) == 8 * 86400
+    assert history.parse_since("90m", now=6000) == 600
+    assert history.parse_since("2024-05-01") > 0
+
+
+def test_every_logged_check_is_recorded(tmp_path):
+    root = str(tmp_path)
+    with logger.ledger_batch(project_root=root):
+        logger.log_to_history("Lint", "PASS", "Passed", 10, 1, 0.5, "npm run lint", project_root=root)
+        logger.log_to_history("Test Suite", "FAIL", "Failed", 20, 2, 1.5, "npm test", project_root=root)
+    logger.log_to_history("Lint", "PASS", "Passed", 10, 1, 0.7, "npm run lint", project_root=root, wait=False)
+    ledger.flush_all()
+
+    conn = history.connect(history.history_path(root))
+    rows = list(history.recent(conn))
+    conn.close()
+    assert [(r["label"], r["status"], r["duration"], r["command"]) for r in reversed(rows)] == [
+        ("Lint", "PASS", 0.5, "npm run lint"),
+        ("Test Suite", "FAIL", 1.5, "npm test"),
+        ("Lint", "PASS", 0.7, "npm run lint"),
+    ]
+
+
+def test_history_command(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    assert "No history yet" in runner.invoke(cli, ["history"]).output
+
+    seed(history.history_path(), [(1000, "Test Suite", "PASS", 2.0, 30), (1001, "Test Suite", "FAIL", 4.0, 70)])
+    result = runner.invoke(cli, ["history", "--label", "Test Suite", "--runs", "1"])
+
+    assert result.exit_code == 0
+    assert "Test Suite" in result.output and "50%" in result.output
+    assert "Total token savings: 100" in result.output
+    assert "FAIL" in result.output.split("Last 1 run(s):")[1]
+    assert runner.invoke(cli, ["history", "--since", "soon"]).exit_code == 2
+    assert os.path.exists(history.history_path())
+
+
+def test_replays_keep_the_check_name_and_stay_out_of_the_durations(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    output = CapturedOutput("2 passed")
+    output.from_cache = True
+    output.stale = "3h old"
+    with logger.ledger_batch():
+        logic.print_result("Test Suite", 0, output, 30.0, "npm test")
+    assert "Test Suite ♻️ (cached) ⚠️ (stale: 3h old)" in capsys.readouterr().out
+    assert "Test Suite ♻️ (cached, stale: 3h old)" in (tmp_path / "verification_history.md").read_text()
+
+    path = history.history_path()
+    seed(path, [(1000, "Test Suite", "PASS", 2.0, 0), (1001, "Test Suite", "FAIL", 4.0, 0)])
+    conn = history.connect(path)
+    replayed = next(history.recent(conn))
+    assert (replayed["label"], replayed["command"], replayed["replay"]) == ("Test Suite", "npm test", "cached, stale: 3h old")
+    [summary] = history.summarize(conn)
+    assert (summary["runs"], summary["replays"], summary["fail_rate"]) == (2, 1, 0.5)
+    assert (summary["p95"], summary["avg"]) == (4.0, 3.0)
+    conn.close()
+
+
+def test_old_history_db_gains_the_replay_column(tmp_path):
+    path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE checks (id INTEGER PRIMARY KEY, ts REAL NOT NULL, label TEXT NOT NULL, status TEXT NOT NULL, "
+                 "duration REAL NOT NULL DEFAULT 0, tokens_used INTEGER NOT NULL DEFAULT 0, "
+                 "tokens_saved INTEGER NOT NULL DEFAULT 0, command TEXT NOT NULL DEFAULT '')")
+    conn.execute("INSERT INTO checks (ts, label, status, duration) VALUES (1, 'Lint', 'PASS', 1.5)")
+    conn.commit()
+    conn.close()
+
+    seed(path, [(2, "Lint", "PASS", 2.5, 0)])
+    conn = history.connect(path)
+    assert [row["replay"] for row in history.recent(conn)] == ["", ""]
+    assert history.summarize(conn)[0]["runs"] == 2
+    conn.close()
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from lofi_gate import impact
+
+
+def write(path, text=""):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_pytest_selection_follows_the_import_graph(workdir):
+    write("src/pkg/__init__.py")
+    write("src/pkg/core.py", "X = 1\n")
+    write("src/pkg/api.py", "from .core import X\n")
+    write("src/pkg/other.py", "Y = 2\n")
+    write("tests/test_api.py", "from pkg import api\n")
+    write("tests/test_other.py", "from pkg.other import Y\n")
+
+    cmd = impact.select_test_command("python -m pytest", changed=["src/pkg/core.py"])
+    assert cmd == "python -m pytest tests/test_api.py"
+
+
+def test_pytest_selection_keeps_importers_of_a_deleted_module(workdir):
+    write("src/pkg/__init__.py")
+    write("src/pkg/api.py", "from .core import X\n")
+    write("src/pkg/other.py", "Y = 2\n")
+    write("tests/test_api.py", "from pkg import api\nfrom pkg.core import X\n")
+    write("tests/test_other.py", "from pkg.other import Y\n")
+
+    # src/pkg/core.py was deleted: everything importing it is now broken.
+    cmd = impact.select_test_command("python -m pytest", changed=["src/pkg/core.py", "src/pkg/other.py"])
+    assert cmd == "python -m pytest tests/test_api.py tests/test_other.py"
+
+
+def test_pytest_falls_back_on_global_files(workdir):
+    write("src/app.py")
+    write("tests/test_app.py", "import app\n")
+    assert impact.select_test_command("python -m pytest", changed=["src/app.py", "conftest.py"]) is None
+    assert impact.select_test_command("python -m pytest", changed=["src/app.py", "data.json"]) is None
+    assert impact.select_test_command("python -m pytest", changed=["README.md", "src/app.py"]) == "python -m pytest tests/test_app.py"
+
+
+def test_go_selection_includes_reverse_dependencies(workdir):
+    write("go.mod", "module example.com/m\n\ngo 1.21\n")
+    write("store/store.go", "package store\n")
+    write("api/api.go", 'package api\n\nimport (\n\t"fmt"\n\t"example.com/m/store"\n)\n')
+    write("cli/cli.go", "package cli\n")
+
+    cmd = impact.select_test_command("go test ./...", changed=["store/store.go"])
+    assert cmd == "go test ./api ./store"
+
+
+def test_cargo_selection_uses_workspace_path_dependencies(workdir):
+    write("Cargo.toml", '[workspace]\nmembers = ["crates/*"]\n')
+    write("crates/core/Cargo.toml", '[package]\nname = "core"\n')
+    write("crates/web/Cargo.toml", '[package]\nname = "web"\n\n[dependencies]\ncore = { path = "../core" }\n')
+    write("crates/cli/Cargo.toml", '[package]\nname = "cli"\n')
+
+    cmd = impact.select_test_command("cargo test", changed=["crates/core/src/lib.rs"])
+    assert cmd == "cargo test -p core -p web"
+
+
+def test_jest_uses_find_related_tests(workdir):
+    cmd = impact.select_test_command("npm test", {"test": "jest"}, changed=["src/a.ts"])
+    assert cmd == "npm test -- --findRelatedTests src/a.ts"
+    assert impact.select_test_command("npm test", {"test": "mocha"}, changed=["src/a.ts"]) is None
+
+
+def test_unknown_runner_or_clean_tree_runs_full_suite(workdir):
+    assert impact.select_test_command("make test", changed=["a.py"]) is None
+    assert impact.select_test_command("python -m pytest", changed=[]) is None
@@ -0,0 +1,106 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from lofi_gate import ledger, logger
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKPOINT_LOGGER = os.path.join(REPO, ".agent", "skills", "lofi-gate-checkpoint", "scripts", "logger.py")
+
+
+def totals(path):
+    _, size, savings = ledger.read_log(path)
+    return size, savings
+
+
+def entry_count(path):
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f if line.startswith("- **["))
+
+
+def test_concurrent_threads_lose_nothing(tmp_path):
+    root = str(tmp_path)
+
+    def writer(n):
+        for i in range(30):
+            logger.log_to_history(f"Check {n}.{i}", "PASS", "Passed", 3, 1, project_root=root)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    path = logger.get_log_path(root)
+    assert totals(path) == (16 * 30 * 3, 16 * 30)
+    # 480 entries crossed the rotation threshold: live log + archive hold every one.
+    archive_dir = os.path.join(root, ledger.ARCHIVE_DIR)
+    archived = sum(entry_count(os.path.join(archive_dir, f)) for f in os.listdir(archive_dir))
+    assert entry_count(path) + archived == 480
+    assert not [f for f in os.listdir(root) + os.listdir(os.path.join(root, ".lofi-gate")) if f.endswith(".tmp")]
+
+
+@pytest.mark.skipif(ledger.fcntl is None and ledger.msvcrt is None, reason="no advisory locks")
+def test_concurrent_processes_keep_totals(tmp_path):
+    script = (
+        "import sys; from lofi_gate import logger\n"
+        "for i in range(25):\n"
+        "    logger.log_to_history('P' + sys.argv[1], 'FAIL', 'Failed', 2, 1, error_content='boom', project_root=sys.argv[2])\n"
+    )
+    procs = [subprocess.Popen([sys.executable, "-c", script, str(n), str(tmp_path)]) for n in range(6)]
+    assert all(p.wait() == 0 for p in procs)
+
+    assert totals(logger.get_log_path(str(tmp_path))) == (6 * 25 * 2, 6 * 25)
+
+
+def test_write_behind_returns_before_the_disk_and_flushes(tmp_path):
+    root = str(tmp_path)
+    path = logger.get_log_path(root)
+    for i in range(50):
+        logger.log_to_history(f"Check {i}", "PASS", "Passed", 1, 0, project_root=root, wait=False)
+    ledger.queue_for(path, root).flush()
+
+    assert totals(path) == (50, 0)
+    assert entry_count(path) == 50
+
+
+def test_checkpoint_skill_writes_through_the_shared_ledger(tmp_path):
+    scripts = tmp_path / ".agent" / "skills" / "lofi-gate-checkpoint" / "scripts"
+    scripts.mkdir(parents=True)
+    shutil.copy(CHECKPOINT_LOGGER, scripts / "logger.py")
+    logger.log_to_history("Test Suite", "PASS", "Passed", 10, 4, project_root=str(tmp_path))
+
+    result = subprocess.run(
+        [sys.executable, str(scripts / "logger.py"), "--source", "CHECKPOINT", "--status", "APPROVED", "--tokens-used", "5"],
+        capture_output=True, text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    path = logger.get_log_path(str(tmp_path))
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert "✅ **CHECKPOINT**: APPROVED" in text
+    assert text.count("Total Token Size") == 1
+    assert totals(path) == (15, 4)
+
+
+def test_commit_appends_in_place_until_rotation(tmp_path):
+    path = str(tmp_path / "verification_history.md")
+    ledger.commit(path, ["- **[t]** first\n"], 10, 1, project_root=str(tmp_path))
+    inode = os.stat(path).st_ino
+
+    # The body is never read back: only the fixed-size footer.
+    with patch("lofi_gate.ledger.read_log", side_effect=AssertionError):
+        ledger.commit(path, ["- **[t]** second\n"], 5, 2, project_root=str(tmp_path))
+    assert os.stat(path).st_ino == inode
+    assert totals(path) == (15, 3)
+    assert entry_count(path) == 2
+
+    ledger.commit(path, ["- **[t]** more\n" * ledger.ROTATE_AT_LINES], 0, 0, project_root=str(tmp_path))
+    assert os.stat(path).st_ino != inode
+    assert totals(path) == (15, 3)
@@ -0,0 +1,86 @@
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from lofi_gate import logic
+from lofi_gate.lint import LintState, eslint_command, plan_lint, run_lint
+
+
+@pytest.fixture
+def go_repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    subprocess.run(["git", "init", "-q"], check=True)
+    subprocess.run(["git", "config", "user.email", "t@t"], check=True)
+    subprocess.run(["git", "config", "user.name", "t"], check=True)
+    (tmp_path / "go.mod").write_text("module example.com/m\n")
+    for pkg, imports in (("a", ""), ("b", 'import "example.com/m/a"\n'), ("c", "")):
+        (tmp_path / pkg).mkdir()
+        (tmp_path / pkg / f"{pkg}.go").write_text(f"package {pkg}\n{imports}")
+    subprocess.run(["git", "add", "."], check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], check=True)
+    return tmp_path
+
+
+def lint(code=0):
+    calls = []
+
+    def run(cmd, label=None):
+        calls.append(cmd)
+        return code, "vet output", 0.1, cmd
+    return run, calls
+
+
+def test_only_changed_packages_and_their_dependents_are_linted(go_repo):
+    run, calls = lint()
+    run_lint("go vet ./...", run)
+    assert calls == ["go vet ./..."]  # No baseline yet.
+
+    (go_repo / "c" / "c.go").write_text("package c\n// edit\n")
+    run_lint("go vet ./...", run)
+    assert calls[-1] == "go vet ./c"
+
+    # Unchanged since its clean lint: never linted again.
+    assert run_lint("go vet ./...", run)[0] == 0
+    assert len(calls) == 2
+
+    (go_repo / "a" / "a.go").write_text("package a\n// edit\n")
+    run_lint("go vet ./...", run)
+    assert calls[-1] == "go vet ./a ./b"
+
+
+def test_failures_are_not_cached(go_repo):
+    run_lint("go vet ./...", lint()[0])
+    (go_repo / "c" / "c.go").write_text("package c\nbroken\n")
+    failing, _ = lint(code=1)
+    assert run_lint("go vet ./...", failing)[0] == 1
+    assert plan_lint("go vet ./...")[:2] == ("incremental", "go vet ./c")
+
+
+def test_config_change_falls_back_to_a_full_lint(go_repo):
+    run_lint("go vet ./...", lint()[0])
+    (go_repo / "go.mod").write_text("module example.com/m\n\ngo 1.22\n")
+    assert plan_lint("go vet ./...")[0] == "full"
+
+
+def test_commits_since_the_last_clean_lint_are_included(go_repo):
+    run_lint("go vet ./...", lint()[0])
+    (go_repo / "c" / "c.go").write_text("package c\n// committed\n")
+    subprocess.run(["git", "commit", "-qam", "edit"], check=True)
+    assert plan_lint("go vet ./...")[:2] == ("incremental", "go vet ./c")
+
+
+def test_eslint_script_is_narrowed_to_the_changed_files():
+    assert eslint_command("eslint . --ext .js,.ts -c .eslintrc.json --max-warnings 0", ["src/a.js"]) == \
+        "npx eslint --ext .js,.ts -c .eslintrc.json --max-warnings 0 src/a.js"
+    assert eslint_command("next lint", ["src/a.js"]) is None
+    assert eslint_command("tsc --noEmit && eslint .", ["src/a.js"]) is None
+
+
+def test_incremental_lint_is_opt_in_per_check(go_repo, capsys):
+    (go_repo / "lofi.toml").write_text("[gate]\nstrict_tdd = false\n[project]\ntest_command = \"true\"\n[checks.lint]\nincremental = true\n")
+    LintState().mark_clean("stale config", "deadbeef")
+    with patch("lofi_gate.logic.run_command", side_effect=lambda cmd, label=None: (0, "ok", 0.1, cmd)) as run:
+        assert logic.run_checks(only=["Lint"]) == 0
+    assert run.call_args[0] == ("go vet ./...", "Lint")
+    assert "Incremental lint" in capsys.readouterr().out
@@ -0,0 +1,84 @@
+import os
+
+from lofi_gate import logger
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_entries_are_appended_and_totals_accumulate(tmp_path):
+    root = str(tmp_path)
+    logger.log_to_history("Lint", "PASS", "Passed", 10, 1, 0.5, "npm run lint", project_root=root)
+    logger.log_to_history("Test Suite", "FAIL", "Failed", 20, 2, 1.0, "npm test", error_content="boom", project_root=root)
+
+    text = read(logger.get_log_path(root))
+    assert text.index("**Lint**") < text.index("**Test Suite**")
+    assert text.count("Total Token Size") == 1
+    _, size, savings = logger.parse_footer(text.splitlines(keepends=True))
+    assert (size, savings) == (30, 3)
+
+
+def test_entry_shows_tokens_saved_per_filter():
+    entry = logger.format_entry("Test Suite", "FAIL", 500, 300, 1.0, "pytest", filter_savings={"ansi": 40, "repeats": 260})
+    assert "(tokens truncated: 300) (filtered: ansi 40, repeats 260)" in entry
+
+
+def test_append_does_not_rewrite_existing_body(tmp_path):
+    root = str(tmp_path)
+    logger.log_to_history("Lint", "PASS", "Passed", 10, 0, project_root=root)
+    path = logger.get_log_path(root)
+    before = read(path)
+    body = before.split("\n> 📊")[0]
+
+    logger.log_to_history("Lint", "PASS", "Passed", 5, 0, project_root=root)
+    assert read(path).startswith(body)
+
+
+def test_legacy_footer_is_migrated(tmp_path):
+    root = str(tmp_path)
+    path = logger.get_log_path(root)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("- **[old]** [npm test] ✅ **Tests**: PASS\n")
+        f.write("\n> 📊 **Total Token Size:** 100 | 💰 **Total Token Savings:** 40\n")
+
+    logger.log_to_history("Lint", "PASS", "Passed", 1, 2, project_root=root)
+
+    text = read(path)
+    assert "**Tests**: PASS" in text
+    assert text.count("Total Token Size") == 1
+    _, size, savings = logger.parse_footer(text.splitlines(keepends=True))
+    assert (size, savings) == (101, 42)
+
+
+def test_batch_flushes_once(tmp_path):
+    root = str(tmp_path)
+    path = logger.get_log_path(root)
+    with logger.ledger_batch(project_root=root):
+        logger.log_to_history("A", "PASS", "Passed", 1, 0, project_root=root)
+        logger.log_to_history("B", "PASS", "Passed", 2, 0, project_root=root)
+        assert not os.path.exists(path)
+
+    text = read(path)
+    assert "**A**" in text and "**B**" in text
+    _, size, _ = logger.parse_footer(text.splitlines(keepends=True))
+    assert size == 3
+
+
+def test_rotation_moves_old_entries_to_archive(tmp_path):
+    root = str(tmp_path)
+    for i in range(logger.ROTATE_AT_LINES + 1):
+        logger.log_to_history(f"Check {i}", "PASS", "Passed", 1, 0, project_root=root)
+
+    text = read(logger.get_log_path(root))
+    assert "History truncated" in text
+    assert f"**Check {logger.ROTATE_AT_LINES}**" in text
+    assert "**Check 0**:" not in text
+    _, size, _ = logger.parse_footer(text.splitlines(keepends=True))
+    assert size == logger.ROTATE_AT_LINES + 1
+
+    archive_dir = os.path.join(root, logger.ARCHIVE_DIR)
+    segments = os.listdir(archive_dir)
+    assert len(segments) == 1
+    assert "**Check 0**:" in read(os.path.join(archive_dir, segments[0]))
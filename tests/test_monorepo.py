@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+
+from lofi_gate import logic
+from lofi_gate.monorepo import discover_projects, merge_config, project_config, touched_projects
+
+
+def write(path, text=""):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_discovery_skips_dependencies(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write("package.json", "{}")
+    write("packages/api/package.json", "{}")
+    write("packages/api/node_modules/dep/package.json", "{}")
+    write("services/billing/go.mod", "module billing\n")
+    write("docs/README.md")
+    assert discover_projects() == [".", "packages/api", "services/billing"]
+
+
+def test_only_touched_projects_run():
+    projects = ["packages/api", "packages/web", "services/billing"]
+    assert touched_projects(projects, ["packages/api/src/a.ts", "README.md"]) == ["packages/api"]
+    assert touched_projects(projects, ["docs/guide.md"]) == []
+    # A shared file outside every project could affect any of them.
+    assert touched_projects(projects, ["tsconfig.base.json"]) == projects
+    assert touched_projects(projects, None) == projects
+
+
+def test_project_lofi_toml_overrides_the_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write("api/lofi.toml", "[gate]\nlint_check = false\n")
+    root = {"gate": {"lint_check": True, "security_check": False}, "project": {"monorepo": True}}
+    config = project_config(root, "api")
+    assert config["gate"] == {"lint_check": False, "security_check": False}
+    assert config["project"]["monorepo"] is False
+    assert merge_config({"a": {"b": 1}}, {"a": {"c": 2}}) == {"a": {"b": 1, "c": 2}}
+
+
+def test_each_project_gets_one_ledger_entry(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    write("lofi.toml", "[project]\nmonorepo = true\n[gate]\nstrict_tdd = false\nsecurity_check = false\n")
+    ok = f'{sys.executable} -c "print(42)"'
+    bad = f'{sys.executable} -c "import sys; print(\'boom\'); sys.exit(1)"'
+    write("good/requirements.txt")
+    write("good/lofi.toml", f"[project]\ntest_command = {json.dumps(ok)}\n")
+    write("bad/requirements.txt")
+    write("bad/lofi.toml", f"[project]\ntest_command = {json.dumps(bad)}\n[gate]\nlint_check = false\n")
+
+    assert logic.run_checks() == 1
+
+    out = capsys.readouterr().out
+    assert "2 project(s) found, 2 touched" in out
+    assert "1/2 project(s) passed" in out
+    ledger = (tmp_path / "verification_history.md").read_text()
+    assert "**Project good**: PASS" in ledger
+    assert "**Project bad**: FAIL" in ledger and "boom" in ledger
+    # Children never write their own Ledger.
+    assert not (tmp_path / "good" / "verification_history.md").exists()
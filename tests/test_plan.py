@@ -0,0 +1,73 @@
+import os
+import time
+from unittest.mock import patch
+
+from lofi_gate import logic
+from lofi_gate.plan import PlanCache, plan_key
+
+PLAN = {"config": {}, "scripts": {}, "commands": {"security": None, "lint": None, "tests": "go test ./..."}}
+
+
+def age(*paths, seconds=60):
+    past = time.time() - seconds
+    for path in paths:
+        os.utime(path, (past, past))
+
+
+def test_plan_key_follows_mtime_size_and_existence(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    empty, _ = plan_key()
+    (tmp_path / "go.mod").write_text("module x\n")
+    created, _ = plan_key()
+    assert created != empty
+
+    age("go.mod")
+    aged, newest = plan_key()
+    assert aged != created
+    assert newest < time.time() - 30
+
+    # A test directory only counts by existence: adding a test file changes nothing.
+    (tmp_path / "tests").mkdir()
+    with_tests, _ = plan_key()
+    (tmp_path / "tests" / "test_x.py").write_text("")
+    assert plan_key()[0] == with_tests != aged
+
+
+def test_plan_cache_round_trip_and_racy_inputs(tmp_path):
+    store = PlanCache(str(tmp_path / "plan.json"))
+    assert store.put("k", PLAN, newest=time.time() - 60)
+    assert store.get("k") == PLAN
+    assert store.get("other") is None
+
+    # Just written: the same mtime tick could hide another edit.
+    assert not store.put("k2", PLAN, newest=time.time())
+    assert store.get("k2") is None
+
+
+def test_load_plan_skips_parsing_and_probes_until_an_input_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lofi.toml").write_text('[project]\ntest_command = "make test"\n')
+    (tmp_path / "go.mod").write_text("module x\n")
+    age("lofi.toml", "go.mod")
+
+    config, _, commands = logic.load_plan()
+    assert config["project"]["test_command"] == "make test"
+    assert commands == {"security": None, "lint": "go vet ./...", "tests": "make test"}
+
+    with patch("lofi_gate.logic.read_config", side_effect=AssertionError), \
+            patch("lofi_gate.logic.detect_commands", side_effect=AssertionError):
+        assert logic.load_plan()[2] == commands
+
+    (tmp_path / "lofi.toml").write_text('[project]\ntest_command = "make check"\n')
+    assert logic.load_plan()[2]["tests"] == "make check"
+
+
+def test_broken_config_is_never_cached(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lofi.toml").write_text("[gate\n")
+    age("lofi.toml")
+
+    assert logic.load_plan()[0] == {}
+    assert logic.load_plan()[0] == {}
+    assert capsys.readouterr().out.count("Failed to load lofi.toml") == 2
+    assert not os.path.exists(os.path.join(".lofi-gate", "plan.json"))
@@ -0,0 +1,173 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from lofi_gate import logic
+from lofi_gate.procs import ProcessRegistry, limited_command, spawn
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+
+
+def test_cancel_all_kills_the_whole_tree():
+    registry = ProcessRegistry()
+    # The shell spawns a grandchild; killing only the shell would leave `sleep` running.
+    process = spawn("sleep 30 & sleep 30; wait")
+    registry.register("Tests", process)
+
+    start = time.time()
+    assert registry.cancel_all(grace=1.0) == ["Tests"]
+    process.wait(timeout=5)
+    assert time.time() - start < 5
+    assert registry.was_cancelled(process)
+
+    # Nothing in the group survives (orphaned zombies may take a moment to be reaped).
+    deadline = time.time() + 5
+    with pytest.raises(ProcessLookupError):
+        while time.time() < deadline:
+            os.killpg(process.pid, 0)
+            time.sleep(0.05)
+
+
+def test_register_after_cancel_kills_immediately():
+    registry = ProcessRegistry()
+    registry.cancel_all()
+    process = spawn("sleep 30")
+    assert registry.register("Lint", process) is False
+    process.wait(timeout=5)
+    assert registry.was_cancelled(process)
+
+
+def test_parallel_fail_fast_cancels_siblings(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "package.json").write_text('{"scripts": {"lint": "eslint", "test": "jest"}}')
+    (tmp_path / "lofi.toml").write_text("[gate]\nstrict_tdd = false\nsecurity_check = false\n")
+
+    real_run_command = logic.run_command
+
+    def fake_run(cmd, label=None):
+        if cmd == "npm run lint":
+            time.sleep(0.3)
+            return 1, "lint error", 0.3, cmd
+        return real_run_command(f'{sys.executable} -c "import time; time.sleep(30)"', label)
+
+    start = time.time()
+    with patch("lofi_gate.logic.run_command", side_effect=fake_run):
+        assert logic.run_checks(parallel=True, fail_fast=True) == 1
+    assert time.time() - start < 15
+
+    printed = capsys.readouterr().out
+    assert "🚫 Test Suite Cancelled" in printed
+    assert "Wall time saved" in printed
+    assert "CANCELLED" in (tmp_path / "verification_history.md").read_text()
+
+
+def test_fail_fast_kills_a_sibling_that_ignores_sigterm(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "package.json").write_text('{"scripts": {"lint": "eslint", "test": "jest"}}')
+    (tmp_path / "lofi.toml").write_text("[gate]\nstrict_tdd = false\nsecurity_check = false\n")
+
+    real_run_command = logic.run_command
+    stubborn = (f'{sys.executable} -c "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); '
+                f'time.sleep(20)"; true')
+
+    def fake_run(cmd, label=None):
+        if cmd == "npm run lint":
+            time.sleep(0.3)
+            return 1, "lint error", 0.3, cmd
+        return real_run_command(stubborn, label)
+
+    start = time.time()
+    with patch("lofi_gate.logic.run_command", side_effect=fake_run):
+        assert logic.run_checks(parallel=True, fail_fast=True) == 1
+    # The grace period, not the sibling's 20s.
+    assert time.time() - start < 10
+    assert "🚫 Test Suite Cancelled" in capsys.readouterr().out
+
+
+@pytest.fixture
+def limits():
+    logic.RUNNING.reset()
+    logic.CHECK_LIMITS.clear()
+    yield logic.CHECK_LIMITS
+    logic.CHECK_LIMITS.clear()
+
+
+def test_timeout_kills_the_tree_and_keeps_partial_output(limits):
+    limits["Tests"] = {"timeout": 0.5}
+    cmd = f'{sys.executable} -c "print(\'started\', flush=True); import time; time.sleep(30)"'
+    start = time.time()
+    code, output, _, _ = logic.run_command(cmd, "Tests")
+    assert time.time() - start < 10
+    assert code != 0
+    assert output.status == "TIMEOUT"
+    assert "started" in output
+
+
+# The shell leader dies on SIGTERM at once; its child ignores it and keeps the pipe open.
+TERM_TRAPPING_TREE = (
+    f'{sys.executable} -c "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); '
+    f'print(\'started\', flush=True); time.sleep(20)"; true'
+)
+
+
+def test_timeout_kills_a_grandchild_that_traps_sigterm(limits):
+    limits["Tests"] = {"timeout": 0.5}
+    start = time.time()
+    code, output, _, _ = logic.run_command(TERM_TRAPPING_TREE, "Tests")
+    # Timeout + grace period, not the 20s the grandchild would sleep.
+    assert time.time() - start < 8
+    assert output.status == "TIMEOUT"
+    assert "started" in output
+
+
+def test_output_cap_stops_a_runaway_check(limits):
+    limits["Lint"] = {"max_output_bytes": 10000}
+    cmd = f'{sys.executable} -c "import sys\nwhile True: sys.stdout.write(\'x\' * 1000)"'
+    code, output, _, _ = logic.run_command(cmd, "Lint")
+    assert code != 0
+    assert output.status == "LIMIT"
+    assert output.total_bytes == 10000
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="tree memory is read from /proc")
+def test_memory_limit_counts_the_whole_tree(limits):
+    limits["Tests"] = {"max_memory": 50 * 1024 * 1024, "cpu_niceness": 5}
+    hog = f'{sys.executable} -c "import time; data = bytearray(40 * 1024 * 1024); time.sleep(30)"'
+    # Two 40 MB children: each is under the limit, together they are not.
+    code, output, _, _ = logic.run_command(f"{hog} & {hog}; wait", "Tests")
+    assert output.status == "LIMIT"
+    assert "memory" in output.status_detail
+
+
+@pytest.mark.skipif(not hasattr(os, "setpriority"), reason="POSIX priorities")
+def test_niceness_reaches_children_without_a_preexec_fn(limits):
+    limits["Tests"] = {"cpu_niceness": 5}
+    base = os.getpriority(os.PRIO_PROCESS, 0)
+    child = f'{sys.executable} -c "import os; print(\'nice\', os.getpriority(os.PRIO_PROCESS, 0))"'
+    with patch("subprocess.Popen", wraps=subprocess.Popen) as popen:
+        code, output, _, _ = logic.run_command(f"sleep 0.2; {child}", "Tests")
+    assert "preexec_fn" not in popen.call_args.kwargs
+    assert (code, output.strip()) == (0, f"nice {min(base + 5, 19)}")
+
+
+def test_memory_rlimit_fallback_is_applied_by_the_shell(monkeypatch):
+    monkeypatch.setattr(os.path, "isdir", lambda path: False)
+    assert limited_command("make test", 64 * 1024 * 1024) == "ulimit -v 65536; make test"
+    assert limited_command("make test") == "make test"
+
+
+def test_timeout_is_its_own_status(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lofi.toml").write_text(
+        "[project]\ntest_command = \"sleep 30\"\n"
+        "[gate]\nstrict_tdd = false\nsecurity_check = false\n"
+        "[checks.tests]\ntimeout = 0.5\n"
+    )
+    assert logic.run_checks() == 1
+    assert "⏱️ Test Suite TIMEOUT: timed out after 0.5s" in capsys.readouterr().out
+    assert "**Test Suite**: TIMEOUT" in (tmp_path / "verification_history.md").read_text()
@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+from lofi_gate import logic
+from lofi_gate.capture import StreamCapture
+from lofi_gate.extract import extractor_for
+from lofi_gate.rerun import FailedTests, failed_first_command, run_tests, targeted_command
+
+GO = "go test ./..."
+
+
+def go_output(*failing):
+    text = "".join(f"--- FAIL: {name} (0.00s)\n    x_test.go:9: boom\n" for name in failing)
+    text += "FAIL\nFAIL\texample.com/m\t0.01s\n" if failing else "ok\texample.com/m\t0.01s\n"
+    capture = StreamCapture(extractor=extractor_for(GO))
+    capture.feed_text(text)
+    return capture.close()
+
+
+def scripted(*runs):
+    """A fake run_command that replays (exit_code, failing names) per call, recording the commands."""
+    calls = []
+
+    def run(cmd, label=None):
+        code, failing = runs[len(calls)]
+        calls.append(cmd)
+        return code, go_output(*failing), 10.0 if len(calls) == 1 else 1.0, cmd
+    return run, calls
+
+
+def test_targeted_commands_per_runner():
+    assert targeted_command("python -m pytest", ["t.py::a"]) == "python -m pytest --lf"
+    assert targeted_command("npm test", ["a › b"]) == "npm test -- --onlyFailures"
+    assert targeted_command("npx jest", ["a › b"]) == "npx jest --onlyFailures"
+    assert targeted_command(GO, ["TestB", "TestA/sub"]) == "go test -run '^(TestA|TestB)$' ./..."
+    assert targeted_command("cargo test", ["tests::b", "tests::a"]) == "cargo test -- --exact tests::a tests::b"
+    assert targeted_command("npx vitest run", ["a > b"]) is None
+    assert targeted_command("make check", ["x"]) is None
+    assert failed_first_command("python -m pytest -q") == "python -m pytest -q --ff"
+    assert failed_first_command(GO) is None
+
+
+def test_retries_rerun_only_the_failures_and_spot_flakes(tmp_path):
+    run, calls = scripted((1, ["TestA", "TestB"]), (1, ["TestB"]), (0, []))
+    store = FailedTests(str(tmp_path / "failed.json"))
+    code, output, _, _ = run_tests(GO, run, retries=2, store=store)
+
+    assert code == 0
+    assert output.flaky == ["TestA", "TestB"]
+    assert calls[1:] == ["go test -run '^(TestA|TestB)$' ./...", "go test -run '^(TestB)$' ./..."]
+    # Two 1s retries instead of two 10s full runs.
+    assert output.time_saved == 18.0
+    assert store.get(GO) == []
+
+
+def test_real_failures_survive_retries_and_are_remembered(tmp_path):
+    run, calls = scripted((1, ["TestA", "TestB"]), (1, ["TestA"]))
+    store = FailedTests(str(tmp_path / "failed.json"))
+    code, output, _, _ = run_tests(GO, run, retries=1, store=store)
+
+    assert code == 1
+    assert output.startswith("🎲 Flaky (passed on retry): TestB")
+    assert FailedTests(str(tmp_path / "failed.json")).get(GO) == ["TestA"]
+
+
+def test_failed_first_stops_when_last_failures_still_fail(tmp_path):
+    store = FailedTests(str(tmp_path / "failed.json"))
+    store.set(GO, ["TestA"])
+    run, calls = scripted((1, ["TestA"]))
+    code, output, _, _ = run_tests(GO, run, failed_first=True, expected=30.0, store=store)
+
+    assert code == 1
+    assert calls == ["go test -run '^(TestA)$' ./..."]
+    assert output.time_saved == 20.0
+
+
+def test_failed_first_runs_the_whole_suite_once_they_pass(tmp_path):
+    store = FailedTests(str(tmp_path / "failed.json"))
+    store.set(GO, ["TestA"])
+    run, calls = scripted((0, []), (0, []))
+    assert run_tests(GO, run, failed_first=True, store=store)[0] == 0
+    assert calls == ["go test -run '^(TestA)$' ./...", GO]
+
+
+def test_flaky_suite_is_reported_and_logged(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "go.mod").write_text("module example.com/m\n")
+    (tmp_path / "lofi.toml").write_text("[gate]\nstrict_tdd = false\nlint_check = false\n[checks.tests]\nretries = 1\n")
+    run, _ = scripted((1, ["TestA"]), (0, []))
+
+    with patch("lofi_gate.logic.run_command", side_effect=run):
+        assert logic.run_checks() == 0
+
+    printed = capsys.readouterr().out
+    assert "🎲 Test Suite Flaky" in printed
+    assert "Targeted reruns saved ~9.0s" in printed
+    ledger = (tmp_path / "verification_history.md").read_text()
+    assert "🎲 **Test Suite**: FLAKY" in ledger
+    assert "passed on retry: TestA" in ledger
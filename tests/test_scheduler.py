@@ -0,0 +1,78 @@
+import concurrent.futures
+import threading
+import time
+
+from lofi_gate.scheduler import WeightedScheduler, order_parallel, order_sequential
+from lofi_gate.stats import CheckStats
+
+
+def make_stats(tmp_path, history):
+    stats = CheckStats(str(tmp_path / "stats.json"))
+    for label, duration, failed in history:
+        stats.record(label, duration, failed=failed)
+    return stats
+
+
+def labels(tasks):
+    return [t[0] for t in tasks]
+
+
+def test_no_history_keeps_declared_order(tmp_path):
+    stats = make_stats(tmp_path, [])
+    tasks = [("TDD Check", None, ""), ("Lint", None, ""), ("Test Suite", None, "")]
+    assert labels(order_sequential(tasks, stats)) == ["TDD Check", "Lint", "Test Suite"]
+    assert labels(order_parallel(tasks, stats)) == ["TDD Check", "Lint", "Test Suite"]
+
+
+def test_sequential_puts_cheap_likely_failures_first(tmp_path):
+    stats = make_stats(tmp_path, [
+        ("Security Scan", 20.0, False),
+        ("Lint", 2.0, True),
+        ("Test Suite", 60.0, True),
+    ])
+    tasks = [("Security Scan", None, ""), ("Lint", None, ""), ("Test Suite", None, "")]
+    assert labels(order_sequential(tasks, stats)) == ["Lint", "Test Suite", "Security Scan"]
+
+
+def test_parallel_starts_longest_first(tmp_path):
+    stats = make_stats(tmp_path, [("Lint", 2.0, False), ("Test Suite", 60.0, False)])
+    tasks = [("Lint", None, ""), ("Test Suite", None, "")]
+    assert labels(order_parallel(tasks, stats)) == ["Test Suite", "Lint"]
+
+
+def test_weights_cap_concurrency():
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def job(weight):
+        def run():
+            with lock:
+                state["now"] += weight
+                state["peak"] = max(state["peak"], state["now"])
+            time.sleep(0.05)
+            with lock:
+                state["now"] -= weight
+            return weight
+        return run
+
+    tasks = [("Tests", job(4), ""), ("Lint", job(2), ""), ("Audit", job(1), ""), ("Coverage", job(2), "")]
+    weights = {"Tests": 4, "Lint": 2, "Audit": 1, "Coverage": 2}
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        done = list(WeightedScheduler(executor, capacity=4, weights=weights).run(tasks))
+
+    assert sorted(t[0] for t, _ in done) == sorted(weights)
+    assert state["peak"] <= 4
+
+
+def test_stop_reports_unstarted_tasks():
+    stop = threading.Event()
+
+    def failing():
+        stop.set()
+        return 1
+
+    tasks = [("Lint", failing, ""), ("Tests", lambda: 0, "")]
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        done = list(WeightedScheduler(executor, capacity=1).run(tasks, should_stop=stop.is_set))
+
+    assert [(t[0], f is None) for t, f in done] == [("Lint", False), ("Tests", True)]
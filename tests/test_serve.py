@@ -0,0 +1,41 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from lofi_gate.serve import Coordinator
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+def test_identical_requests_attach_to_the_running_one():
+    coordinator = Coordinator()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def execute():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return {"exit_code": 0, "output": "ok"}
+
+    replies = []
+    first = threading.Thread(target=lambda: replies.append(coordinator.submit("tree:opts", execute)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: replies.append(coordinator.submit("tree:opts", execute)))
+    second.start()
+    time.sleep(0.1)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(runs) == 1
+    assert sorted(coalesced for _, coalesced in replies) == [False, True]
+    assert all(result["output"] == "ok" for result, _ in replies)
+
+    # Once finished, the same key starts a fresh run.
+    coordinator.submit("tree:opts", execute)
+    assert len(runs) == 2
@@ -0,0 +1,121 @@
+from unittest.mock import patch
+
+from lofi_gate import history, logic
+from lofi_gate.capture import CapturedOutput
+from lofi_gate.extract import Extraction, Failure
+from lofi_gate.shard import (
+    UNIT_PREFIX, cargo_command, go_command, merge_results, partition, plan_shards, record_unit_timings,
+)
+from lofi_gate.stats import CheckStats
+
+
+def test_partition_without_history_splits_by_count():
+    groups = partition(["a", "b", "c", "d", "e"], 2)
+    assert sorted(len(g) for g in groups) == [2, 3]
+    assert sorted(u for g in groups for u in g) == ["a", "b", "c", "d", "e"]
+
+
+def test_partition_balances_by_duration():
+    durations = {"slow": 10.0, "a": 2.0, "b": 2.0, "c": 2.0, "d": 2.0}
+    groups = partition(["a", "slow", "b", "c", "d"], 2, durations)
+    assert ["slow"] in groups
+    assert ["a", "b", "c", "d"] in groups
+
+
+def test_native_shard_commands():
+    assert go_command("go test -race ./...", ["example.com/a", "example.com/b"]) == "go test -race example.com/a example.com/b"
+    assert cargo_command("cargo test -p core", ["tests::", "smoke"]) == "cargo test -p core -- tests:: smoke"
+
+    plan = plan_shards("npm test", 3, {"test": "jest"})
+    assert plan[0] == ["npm test -- --shard=1/3", "npm test -- --shard=2/3", "npm test -- --shard=3/3"]
+    assert plan_shards("npm test", 3, {"test": "mocha"}) is None
+
+
+def test_pytest_shards_by_test_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "tests").mkdir()
+    collected = "tests/test_a.py::test_one\ntests/test_a.py::test_two\ntests/test_b.py::test_three\n\n3 tests collected\n"
+    with patch("lofi_gate.shard._list", return_value=collected) as listing:
+        commands, groups = plan_shards("python -m pytest -x tests", 2)
+
+    assert listing.call_args[0][0] == "python -m pytest -x tests --collect-only -q"
+    assert sorted(commands) == ["python -m pytest -x tests/test_a.py", "python -m pytest -x tests/test_b.py"]
+    assert sorted(u for g in groups for u in g) == ["tests/test_a.py", "tests/test_b.py"]
+
+
+def test_huge_suite_stays_under_the_command_length_limit(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    # 3000 tests in 30 files: 30 paths to pass, not 3000 node IDs.
+    collected = "".join(f"tests/test_mod{i // 100}.py::test_case_number_{i}\n" for i in range(3000))
+    with patch("lofi_gate.shard._list", return_value=collected):
+        commands, groups = plan_shards("python -m pytest", 4)
+    assert len(commands) == 4 and max(len(c) for c in commands) < 1000
+
+    # Even files can be too many for one `sh -c` argument: then the suite runs unsharded.
+    collected = "".join(f"tests/deeply/nested/path/test_module_{i}.py::test_x\n" for i in range(20000))
+    with patch("lofi_gate.shard._list", return_value=collected):
+        assert plan_shards("python -m pytest", 2) is None
+    assert "Running the suite unsharded" in capsys.readouterr().out
+
+
+def test_merge_keeps_failures_and_timings():
+    failing = CapturedOutput("boom", extraction=Extraction("pytest", [Failure("test_b")]))
+    results = [
+        (0, CapturedOutput("ok", extraction=Extraction("pytest")), 1.0, "pytest a"),
+        (1, failing, 2.0, "pytest b"),
+    ]
+    code, merged, duration, timings = merge_results(results, 2.1)
+    assert code == 1
+    assert merged.startswith("── Shard 2/2")
+    assert [f.name for f in merged.extraction.failures] == ["test_b"]
+    assert timings == "1/2 1.00s, 2/2 2.00s"
+
+
+def test_go_package_times_feed_stats(tmp_path):
+    stats = CheckStats(str(tmp_path / "stats.json"))
+    out = "ok  \texample.com/a\t3.50s\nFAIL\texample.com/b\t0.25s\n"
+    record_unit_timings(stats, [["example.com/a", "example.com/b"]], [(1, out, 4.0, "go test example.com/a example.com/b")])
+    assert stats.expected_duration(UNIT_PREFIX + "example.com/a") == 3.5
+    assert stats.expected_duration(UNIT_PREFIX + "example.com/b") == 0.25
+
+
+def test_unit_timings_forget_units_that_are_gone(tmp_path):
+    stats = CheckStats(str(tmp_path / "stats.json"))
+    stats.record(UNIT_PREFIX + "tests/test_a.py::test_old_node_id", 1.0)
+    stats.record("Lint", 2.0)
+    record_unit_timings(stats, [["tests/test_a.py"], ["tests/test_b.py"]], [(0, "ok", 1.0, "pytest a"), (0, "ok", 1.0, "pytest b")])
+    assert sorted(stats.data) == ["Lint", UNIT_PREFIX + "tests/test_a.py", UNIT_PREFIX + "tests/test_b.py"]
+
+
+def test_sharded_suite_is_one_ledger_entry(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "package.json").write_text('{"scripts": {"test": "jest"}}')
+    (tmp_path / "lofi.toml").write_text("[project]\nshards = 2\n[gate]\nstrict_tdd = false\nsecurity_check = false\n")
+
+    def fake_run(cmd, label=None):
+        return 0, f"passed {cmd}", 0.1, cmd
+
+    with patch("lofi_gate.logic.run_command", side_effect=fake_run) as run:
+        assert logic.run_checks() == 0
+
+    assert sorted(c[0][0] for c in run.call_args_list) == ["npm test -- --shard=1/2", "npm test -- --shard=2/2"]
+    ledger = (tmp_path / "verification_history.md").read_text()
+    assert ledger.count("Test Suite") == 1
+    # Timings go in the note; the command is the same on every run (fingerprints, history.db).
+    assert "2 shards: 1/2" in ledger
+    assert "[2 shards" not in ledger
+    conn = history.connect(history.history_path())
+    assert [(r["label"], r["command"]) for r in history.recent(conn, label="Test Suite")] == [("Test Suite", "npm test")]
+    conn.close()
+
+
+def test_sharded_suite_warns_that_retries_are_not_applied(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "package.json").write_text('{"scripts": {"test": "jest"}}')
+    (tmp_path / "lofi.toml").write_text(
+        "[project]\nshards = 2\n[gate]\nstrict_tdd = false\nsecurity_check = false\n[checks.tests]\nretries = 2\n"
+    )
+    with patch("lofi_gate.logic.run_command", side_effect=lambda cmd, label=None: (1, "failed", 0.1, cmd)) as run:
+        assert logic.run_checks() == 1
+    assert len(run.call_args_list) == 2
+    assert "`retries` and `failed_first` are not applied" in capsys.readouterr().out
@@ -0,0 +1,29 @@
+from lofi_gate.stats import CheckStats, EWMA_ALPHA
+
+
+def test_stats_persist_a_moving_average(tmp_path):
+    path = str(tmp_path / "stats.json")
+    stats = CheckStats(path)
+    assert stats.expected_duration("Test Suite") is None
+
+    stats.record("Test Suite", 10.0)
+    stats.record("Test Suite", 20.0)
+    stats.save()
+
+    reloaded = CheckStats(path)
+    assert reloaded.expected_duration("Test Suite") == EWMA_ALPHA * 20.0 + (1 - EWMA_ALPHA) * 10.0
+
+
+def test_corrupt_stats_file_is_ignored(tmp_path):
+    path = tmp_path / "stats.json"
+    path.write_text("{not json")
+    assert CheckStats(str(path)).data == {}
+
+
+def test_stats_track_failure_rate(tmp_path):
+    stats = CheckStats(str(tmp_path / "stats.json"))
+    assert stats.fail_rate("Lint") is None
+
+    stats.record("Lint", 1.0, failed=True)
+    stats.record("Lint", 1.0, failed=False)
+    assert stats.fail_rate("Lint") == 1 - EWMA_ALPHA
@@ -0,0 +1,84 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from lofi_gate import logic, tdd
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    subprocess.run(["git", "init", "-q"], check=True)
+    subprocess.run(["git", "config", "user.email", "t@t"], check=True)
+    subprocess.run(["git", "config", "user.name", "t"], check=True)
+    return tmp_path
+
+
+def write(path, text="x = 1\n"):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def commit():
+    subprocess.run(["git", "add", "."], check=True)
+    subprocess.run(["git", "commit", "-qm", "c"], check=True)
+
+
+def test_tests_anywhere_in_the_repo_count(repo):
+    write("tests/test_user_service.py")
+    write("src/components/__tests__/Button.tsx")
+    write("pkg/parser/parser_test.go")
+    commit()
+
+    write("src/user_service.py")
+    write("src/components/Button.tsx")
+    write("pkg/parser/parser.go")
+    write("src/orphan.ts")
+    write("src/pkg/__init__.py")
+    write("benchmarks/bench_parser.py")
+    assert tdd.find_violations() == ["src/orphan.ts"]
+
+
+def test_new_files_see_each_other_and_names_are_normalized(repo):
+    write("src/user-profile.ts")
+    write("src/UserProfile.spec.ts")
+    write("lib/lonely.py")
+    subprocess.run(["git", "add", "lib/lonely.py"], check=True)
+    assert tdd.find_violations() == ["lib/lonely.py"]
+
+
+def test_custom_conventions(repo):
+    write("checks/check_billing.py")
+    write("billing.py")
+    assert tdd.find_violations() == ["billing.py", "checks/check_billing.py"]
+    assert tdd.find_violations({"conventions": {"py": ["check_{name}"]}}) == []
+
+
+def test_tracked_index_is_cached_until_git_index_changes(repo):
+    write("tests/test_a.py")
+    commit()
+    write("a.py")
+    assert tdd.find_violations() == []
+
+    with patch("lofi_gate.tdd.build_index", wraps=tdd.build_index) as build:
+        tdd.find_violations()
+        # Only the untracked overlay is rebuilt.
+        assert build.call_count == 1
+
+        write("tests/test_b.py")
+        commit()
+        write("b.py")
+        assert tdd.find_violations() == []
+        assert build.call_count == 3
+
+
+def test_strict_tdd_check_reports_violations(repo):
+    write("tests/test_a.py")
+    commit()
+    write("b.py")
+    code, output, _, _ = logic.check_strict_tdd({})
+    assert code == 1
+    assert "b.py" in output
@@ -0,0 +1,95 @@
+import io
+from unittest.mock import patch
+
+import pytest
+
+from lofi_gate import logic, tokens
+from lofi_gate.capture import StreamCapture, capture_stream
+
+
+class FakeEncoding:
+    """One token per character (deterministic, no vocab download)."""
+    def encode_ordinary(self, text):
+        return list(text)
+
+    def decode(self, toks):
+        return "".join(toks)
+
+
+@pytest.fixture
+def fake_encoding():
+    with patch("lofi_gate.tokens.get_encoding", return_value=FakeEncoding()):
+        yield
+
+
+def test_encoding_is_loaded_lazily_and_once(monkeypatch):
+    monkeypatch.setattr(tokens, "_encoding", None)
+    monkeypatch.setattr(tokens, "_encoding_loaded", False)
+    calls = []
+
+    class FakeTiktoken:
+        @staticmethod
+        def get_encoding(name):
+            calls.append(name)
+            return FakeEncoding()
+
+    with patch.dict("sys.modules", {"tiktoken": FakeTiktoken}):
+        tokens.get_encoding()
+        tokens.get_encoding()
+    assert calls == [tokens.ENCODING_NAME]
+
+
+def test_count_tokens_in_chunks(fake_encoding, monkeypatch):
+    monkeypatch.setattr(tokens, "CHUNK_CHARS", 10)
+    assert tokens.count_tokens("x" * 95) == 95
+
+
+def test_truncate_to_tokens_keeps_both_edges(fake_encoding):
+    text = "H" * 5 + "x" * 990 + "T" * 5
+    truncated, kept = tokens.truncate_to_tokens(text, 10)
+    assert truncated.startswith("HHHHH\n")
+    assert truncated.endswith("\nTTTTT")
+    assert "[Truncated 990 tokens]" in truncated
+    assert kept == 10
+
+    huge = "H" * 5 + "x" * 100000 + "T" * 5
+    truncated, _ = tokens.truncate_to_tokens(huge, 10)
+    assert truncated.startswith("HHHHH\n") and truncated.endswith("\nTTTTT")
+
+
+def test_truncate_falls_back_to_heuristic(monkeypatch):
+    monkeypatch.setattr(tokens, "get_encoding", lambda: None)
+    truncated, _ = tokens.truncate_to_tokens("x" * 1000, 10)
+    assert truncated.startswith("x" * 20) and "[Truncated" in truncated
+
+
+def test_allocate_budget_is_proportional():
+    budgets = tokens.allocate_budget(1000, {"Lint": 100, "Tests": 900})
+    assert budgets == {"Lint": 100, "Tests": 900}
+    assert tokens.allocate_budget(1000, {"Lint": 100, "Tests": 900}, per_check=500)["Tests"] == 500
+    assert tokens.allocate_budget(1000, {"Lint": 1, "Tests": 100000})["Lint"] == tokens.MIN_CHECK_BUDGET
+
+
+def test_allocate_budget_never_exceeds_the_run_budget():
+    budgets = tokens.allocate_budget(300, {"TDD": 5, "Security": 40, "Lint": 80, "Tests": 20000, "Coverage": 10})
+    assert sum(budgets.values()) <= 300
+    assert budgets["TDD"] == budgets["Coverage"] == 60
+    assert budgets["Tests"] == max(budgets.values())
+
+    budgets = tokens.allocate_budget(1000, {"Lint": 1, "Types": 1, "Tests": 100000})
+    assert budgets == {"Lint": 100, "Types": 100, "Tests": 800}
+
+
+def test_capture_counts_the_full_stream(fake_encoding):
+    data = b"x" * 100000
+    out = capture_stream(io.BytesIO(data), StreamCapture(head_limit=10, tail_limit=10, token_counter=tokens.TokenCounter()))
+    assert out.raw_tokens == 100000
+
+
+def test_print_result_honours_token_budget(fake_encoding, capsys):
+    text = "H" * 100 + "x" * 5000 + "T" * 100
+    with patch("lofi_gate.logic.log_to_history"):
+        _, saved = logic.print_result("Lint", 1, text, 0.1, "npm run lint", token_budget=50)
+    shown = capsys.readouterr().out.split("-" * 40 + "\n")[-1].rstrip("\n")
+    assert shown.startswith("H" * 25) and shown.endswith("T" * 25)
+    assert saved == len(text) - len(shown)
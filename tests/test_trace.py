@@ -0,0 +1,62 @@
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from lofi_gate import logic, trace
+
+
+@pytest.fixture
+def tracer():
+    t = trace.start()
+    yield t
+    trace.stop()
+
+
+def test_spans_are_free_when_tracing_is_off():
+    assert not trace.enabled()
+    with trace.span("anything", label="x") as info:
+        assert info is None
+
+
+def test_spans_record_thread_and_process(tracer):
+    def work():
+        with trace.span("worker", "check", command="pytest") as info:
+            info["result"] = 0
+
+    thread = threading.Thread(target=work, name="pool-1")
+    thread.start()
+    thread.join()
+    with trace.span("main"):
+        pass
+
+    events = {e["name"]: e for e in tracer.chrome_trace()["traceEvents"]}
+    assert events["worker"]["ph"] == "X"
+    assert events["worker"]["args"] == {"command": "pytest", "result": 0}
+    assert events["worker"]["tid"] != events["main"]["tid"]
+    assert events["thread_name"]["ph"] == "M"
+
+
+def test_summary_ranks_by_total_time(tracer):
+    tracer.add("slow", "phase", 0.0, 0.5)
+    tracer.add("fast", "phase", 0.0, 0.1)
+    tracer.add("fast", "phase", 0.0, 0.1)
+
+    rows = tracer.summary()
+    assert [r[0] for r in rows] == ["slow", "fast"]
+    assert rows[1][2] == 2
+
+
+def test_run_checks_traces_phases_and_checks(tracer, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lofi.toml").write_text("[gate]\nstrict_tdd = false\nsecurity_check = false\n[project]\ntest_command = \"pytest\"\n")
+
+    with patch("lofi_gate.logic.run_command", side_effect=lambda cmd, label=None: (0, "ok", 0.1, cmd)):
+        assert logic.run_checks() == 0
+
+    names = {e["name"] for e in tracer.events}
+    assert {"run_checks", "config.load", "checks.detect", "Test Suite", "truncate", "ledger.write"} <= names
+    path = tracer.write(str(tmp_path / "profile.json"))
+    with open(path) as f:
+        assert json.load(f)["traceEvents"]
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+import pytest
+
+from lofi_gate.watch import (
+    EVERYTHING, InotifyWatcher, PollingWatcher, Session, checks_for, collect_changes, is_ignored, watch_loop,
+)
+
+LABELS = ["TDD Check", "Security Scan", "Lint", "Test Suite"]
+
+
+def test_changes_map_to_their_checks():
+    assert checks_for({"README.md"}, LABELS) == set()
+    assert checks_for({"package-lock.json"}, LABELS) == {"Security Scan", "Lint", "TDD Check", "Test Suite"}
+    assert checks_for({"src/app.py"}, LABELS) == {"TDD Check", "Lint", "Test Suite"}
+    assert checks_for({EVERYTHING}, LABELS) == set(LABELS)
+    assert checks_for({".eslintrc.json"}, LABELS) == {"Lint"}
+    assert checks_for({".env"}, LABELS) == {"TDD Check", "Lint", "Test Suite"}
+
+
+def test_gate_artifacts_are_ignored():
+    assert is_ignored("verification_history.md")
+    assert is_ignored(os.path.join(".lofi-gate", "latest_report.md"))
+    assert is_ignored(os.path.join("node_modules", "x", "index.js"))
+    assert not is_ignored(os.path.join("src", "app.py"))
+    # Coverage reports and editor temp files are written by the run itself.
+    assert is_ignored(".coverage")
+    assert is_ignored(os.path.join("src", ".app.py.swp"))
+    assert is_ignored(os.path.join("htmlcov", "index.html"))
+    assert is_ignored(os.path.join("coverage", "lcov.info"))
+    assert is_ignored(os.path.join("src", "app.py~")) and is_ignored(".DS_Store")
+    # Tool configs are inputs, dotfiles or not.
+    for name in (".eslintrc.json", ".prettierrc", ".flake8", ".golangci.yml", ".env"):
+        assert not is_ignored(name)
+
+
+def test_polling_watcher_sees_edits(tmp_path):
+    (tmp_path / "app.py").write_text("a = 1")
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+    assert watcher.wait(0.05) == set()
+
+    os.utime(tmp_path / "app.py", ns=(0, 0))
+    (tmp_path / "new.py").write_text("b = 2")
+    assert watcher.wait(1) == {"app.py", "new.py"}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_watcher_follows_new_directories(tmp_path):
+    watcher = InotifyWatcher(str(tmp_path))
+    try:
+        (tmp_path / "pkg").mkdir()
+        assert watcher.wait(1) == set()
+        (tmp_path / "pkg" / "mod.py").write_text("x = 1")
+        assert collect_changes(watcher, quiet=0.1) == {os.path.join("pkg", "mod.py")}
+    finally:
+        watcher.close()
+
+
+class FakeWatcher:
+    def __init__(self, bursts):
+        self.bursts = list(bursts)
+
+    def wait(self, timeout=None):
+        if timeout is not None:
+            return set()
+        return self.bursts.pop(0)
+
+
+def test_session_reruns_only_affected_checks_and_reloads_config(tmp_path):
+    calls = []
+    loads = []
+
+    def fake_run_checks(only=None, results=None, **kwargs):
+        calls.append(only)
+        for label in (only or LABELS):
+            results[label] = 1 if label == "Lint" and len(calls) == 1 else 0
+        print("ran")
+        return 0 if all(code == 0 for code in results.values()) else 1
+
+    def fake_load_config():
+        loads.append(time.time())
+        return {}
+
+    report = tmp_path / "latest_report.md"
+    session = Session(fake_run_checks, fake_load_config, lambda: {}, lambda config, scripts: LABELS, report_path=str(report))
+    watcher = FakeWatcher([{"docs/notes.md"}, {"src/app.py"}])
+    watch_loop(session, watcher, quiet=0, max_runs=2)
+
+    assert calls == [None, {"TDD Check", "Lint", "Test Suite"}]
+    assert len(loads) == 1
+    text = report.read_text()
+    assert "✅ PASS" in text and "src/app.py" in text and "ran" in text
+
+    # A config change reloads and reruns everything.
+    session.run({"lofi.toml"})
+    assert len(loads) == 2 and calls[-1] is None